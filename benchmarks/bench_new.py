@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Measures the objects per second created by BaseModel(), with the key built
+from to_dict() by new() (before) and from the class and id (after), and
+the objects per second added by new() and new_many(). Run from the root of
+the repository:
+    python3 -m benchmarks.bench_new --count 100000
+"""
+
+import argparse
+import time
+from unittest.mock import patch
+from models.engine.file_storage import FileStorage
+from models.user import User
+
+
+def legacy_new(self, obj):
+    """sets obj as new() did before, building the key from to_dict()"""
+    if not obj:
+        raise ValueError("Bad instance argument")
+    if not self.validate_instance(obj):
+        raise TypeError("Argument isnt a subclass of BaseModel")
+    obj_data = obj.to_dict()
+    self.all()[f"{obj_data['__class__']}.{obj_data['id']}"] = obj
+
+
+def best_of(function, repeat=3):
+    """returns the shortest time of repeat calls of function"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    """runs the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+    count = args.count
+    storage = FileStorage()
+    with patch("models.base_model.storage", storage):
+
+        def create():
+            storage.load_objects({})
+            for _ in range(count):
+                User()
+
+        with patch.object(FileStorage, "new", legacy_new):
+            print(f"User() before: {count / best_of(create):,.0f} "
+                  "objects/s")
+        print(f"User() after: {count / best_of(create):,.0f} objects/s")
+        users = [User() for _ in range(count)]
+
+        def new():
+            storage.load_objects({})
+            for user in users:
+                storage.new(user)
+
+        def new_many():
+            storage.load_objects({})
+            storage.new_many(users)
+
+        print(f"new(): {count / best_of(new):,.0f} objects/s")
+        print(f"new_many(): {count / best_of(new_many):,.0f} objects/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Measures the startup time, storage.reload() of a generated file, for a
+number of processes decoding the JSON (storage.workers, 0 decodes it in the
+main process). Run from the root of the repository:
+    python3 -m benchmarks.bench_parallel_reload --count 2000000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from unittest.mock import patch
+from models.engine.file_storage import FileStorage
+from .bench_reload import make_file
+
+
+def measure(path, count, workers):
+    """returns the seconds of the best of 3 reloads"""
+    best = None
+    for _ in range(3):
+        storage = FileStorage()
+        storage.fpa = path
+        storage.workers = workers
+        with patch("models.base_model.storage", storage):
+            start = time.perf_counter()
+            storage.reload()
+            elapsed = time.perf_counter() - start
+        assert storage.count() == count
+        storage.load_objects({})
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    """runs the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--count", type=int, default=2000000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({0, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+    print(f"{os.cpu_count()} CPUs, {args.count:,} objects")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "file.json")
+        make_file(path, args.count)
+        for workers in args.workers:
+            elapsed = measure(path, args.count, workers)
+            print(f"workers={workers}: {elapsed:.2f}s, "
+                  f"{args.count / elapsed:,.0f} objects/s")
+
+
+if __name__ == "__main__":
+    main()
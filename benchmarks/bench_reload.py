@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Measures the objects per second storage.reload() makes from a file, with
+the instances made by cls(**record) (before) and by cls.from_record()
+(after). Run from the root of the repository:
+    python3 -m benchmarks.bench_reload --count 1000000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from unittest.mock import patch
+from models.engine.file_storage import FileStorage
+
+
+def make_file(path, count):
+    """writes count Place and User records to path"""
+    storage = FileStorage()
+    storage.fpa = path
+    records = {}
+    for i in range(count):
+        cls = "Place" if i % 2 else "User"
+        uid = f"{i:08x}-0000-4000-8000-000000000000"
+        records[f"{cls}.{uid}"] = {
+            "id": uid, "created_at": "2023-02-12T12:25:43.990292",
+            "updated_at": "2023-02-12T12:27:03.177860", "__class__": cls,
+            "name": f"name {i}", "max_guest": i % 8}
+    storage.write_file(path, storage.file_codec().encode(records))
+
+
+def legacy_make_inst(self, obj):
+    """makes the instance as make_inst did before from_record()"""
+    from exports import valid_classes
+    cls = valid_classes.get(obj["__class__"], None)
+    if not cls:
+        return
+    return self.model_class(cls)(**obj)
+
+
+def measure(path, count, legacy):
+    """returns the objects per second of the best of 3 reloads"""
+    best = None
+    for _ in range(3):
+        storage = FileStorage()
+        storage.fpa = path
+        with patch("models.base_model.storage", storage):
+            start = time.perf_counter()
+            if legacy:
+                with patch.object(FileStorage, "make_inst",
+                                  legacy_make_inst):
+                    storage.reload()
+            else:
+                storage.reload()
+            elapsed = time.perf_counter() - start
+        assert storage.count() == count
+        storage.load_objects({})
+        best = elapsed if best is None else min(best, elapsed)
+    return count / best
+
+
+def main():
+    """runs the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--count", type=int, default=1000000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "file.json")
+        make_file(path, args.count)
+        for name, legacy in (("before", True), ("after", False)):
+            rate = measure(path, args.count, legacy)
+            print(f"{name}: {rate:,.0f} objects/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Parser of the options of the console's <class>.<command>(options) calls.
+The options are split in tokens by one compiled regular expression. The
+tokens' kinds (their "shape", e.g ( value , value , value )) are parsed
+once into a builder kept in an LRU cache, so lines differing only by their
+values, like piped update commands, never go through the parser again.
+It reads the literals the console needs: strings, numbers, True, False,
+None, tuples, lists, dicts and name=value options. Anything else is left to
+ast, see parse_options().
+"""
+
+import ast
+import keyword
+import re
+from functools import lru_cache
+
+# one token per match: punctuation, string, number, name or anything else
+TOKEN = re.compile(r"""
+    ([(){}\[\],:=])
+    |("[^"\\\n]*(?:\\.[^"\\\n]*)*"|'[^'\\\n]*(?:\\.[^'\\\n]*)*')
+    |([-+]?(?:
+        (?:[0-9]+\.[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?
+        |[0-9]+[eE][-+]?[0-9]+
+        |0+|[1-9][0-9]*)(?![\w.]))
+    |([A-Za-z_][A-Za-z_0-9]*)
+    |(\S)""", re.VERBOSE)
+
+CONSTANTS = {"True": True, "False": False, "None": None}
+
+
+class ShapeError(Exception):
+    """The options are outside of the grammar of this module"""
+
+
+def tokenize(text):
+    """splits text in tokens
+    Returns:
+    - shape: tuple of the kinds of the tokens, the punctuation itself,
+    value for the literals and name:<name> for the names of name=value
+    options
+    - values: the values of the literals, in order
+    Raises:
+    - ShapeError: text has something else than tokens
+    - SyntaxError, ValueError: a string has a bad escape sequence
+    """
+    shape = []
+    values = []
+    for op, string, num, name, other in TOKEN.findall(text):
+        if op:
+            shape.append(op)
+            continue
+        if string:
+            if "\\" in string:
+                values.append(ast.literal_eval(string))
+            else:
+                values.append(string[1:-1])
+        elif num:
+            if "." in num or "e" in num or "E" in num:
+                values.append(float(num))
+            else:
+                values.append(int(num))
+        elif name in CONSTANTS:
+            values.append(CONSTANTS[name])
+        elif name and not keyword.iskeyword(name):
+            shape.append(f"name:{name}")
+            continue
+        else:
+            raise ShapeError(other or name)
+        shape.append("value")
+    return tuple(shape), values
+
+
+class _Parser:
+    """Parses a shape into a builder, a tree of:
+    - ("value", index): the value at index
+    - ("tuple" or "list", items)
+    - ("dict", (key, value) pairs)
+    - ("call", positional items, (name, item) pairs)
+    """
+
+    def __init__(self, shape):
+        """Initialize the parser"""
+        self.shape = shape
+        self.pos = 0
+        self.index = 0
+
+    def peek(self):
+        """returns the next token kind"""
+        if self.pos < len(self.shape):
+            return self.shape[self.pos]
+        return None
+
+    def take(self, kind=None):
+        """returns the next token kind, which must be kind if given"""
+        token = self.peek()
+        if token is None or (kind is not None and token != kind):
+            raise ShapeError(f"expected {kind} at {self.pos}")
+        self.pos += 1
+        return token
+
+    def options(self):
+        """parses the whole options, from ( to )"""
+        node = self.group(call=True)
+        if self.peek() is not None:
+            raise ShapeError("text after the options")
+        return node
+
+    def group(self, call=False):
+        """parses a parenthesized item, tuple or call"""
+        self.take("(")
+        items, keywords, comma = [], [], False
+        while self.peek() != ")":
+            token = self.peek()
+            if (call and token and token.startswith("name:")
+                    and self.shape[self.pos + 1:self.pos + 2] == ("=",)):
+                self.pos += 2
+                keywords.append((token[5:], self.item()))
+            elif keywords:
+                raise ShapeError("positional option after name=value")
+            else:
+                items.append(self.item())
+            if self.peek() == ")":
+                break
+            self.take(",")
+            comma = True
+        self.take(")")
+        if keywords:
+            names = [name for (name, _) in keywords]
+            if len(set(names)) != len(names):
+                raise ShapeError("repeated name=value option")
+            return ("call", tuple(items), tuple(keywords))
+        if len(items) == 1 and not comma:
+            return items[0]
+        return ("tuple", tuple(items))
+
+    def item(self):
+        """parses one literal"""
+        token = self.peek()
+        if token == "value":
+            self.pos += 1
+            self.index += 1
+            return ("value", self.index - 1)
+        if token == "(":
+            return self.group()
+        if token == "[":
+            return ("list", self.sequence("[", "]"))
+        if token == "{":
+            self.take("{")
+            pairs = []
+            while self.peek() != "}":
+                key = self.item()
+                self.take(":")
+                pairs.append((key, self.item()))
+                if self.peek() == "}":
+                    break
+                self.take(",")
+            self.take("}")
+            return ("dict", tuple(pairs))
+        raise ShapeError(f"unexpected {token}")
+
+    def sequence(self, start, stop):
+        """parses the items between start and stop"""
+        self.take(start)
+        items = []
+        while self.peek() != stop:
+            items.append(self.item())
+            if self.peek() == stop:
+                break
+            self.take(",")
+        self.take(stop)
+        return tuple(items)
+
+
+@lru_cache(maxsize=256)
+def compile_shape(shape):
+    """returns the builder of shape, see _Parser
+    Raises:
+    - ShapeError: shape is outside of the grammar
+    """
+    return _Parser(shape).options()
+
+
+def build(node, values):
+    """returns the value of the builder node filled with values"""
+    kind = node[0]
+    if kind == "value":
+        return values[node[1]]
+    if kind == "tuple":
+        return tuple(build(item, values) for item in node[1])
+    if kind == "list":
+        return [build(item, values) for item in node[1]]
+    if kind == "dict":
+        return {build(k, values): build(v, values) for (k, v) in node[1]}
+    args = tuple(build(item, values) for item in node[1])
+    params = {name: build(item, values) for (name, item) in node[2]}
+    return (args[0] if len(args) == 1 else args), params
+
+
+def parse_options(text):
+    """parses the options of a call, e.g ("id", {"name": "x"}) or
+    (max_guest=2, limit=10)
+    Returns:
+    - the options, as literal_eval(text) would return them, with name=value
+    options left out
+    - dictionary of the name=value options
+    Raises:
+    - SyntaxError, ValueError: text isn't a valid call
+    """
+    try:
+        shape, values = tokenize(text)
+        node = compile_shape(shape)
+        if node[0] == "call":
+            return build(node, values)
+        return build(node, values), {}
+    except (ShapeError, SyntaxError, ValueError, TypeError, IndexError):
+        pass
+    # outside of the grammar, e.g a set, ask ast
+    try:
+        return ast.literal_eval(text), {}
+    except (SyntaxError, ValueError):
+        pass
+    call = ast.parse(f"f{text}", mode="eval").body
+    # only the f we put in front can be called, e.g not (1)(2) or ("a").x()
+    if (not isinstance(call, ast.Call)
+            or not isinstance(call.func, ast.Name)
+            or any(k.arg is None for k in call.keywords)
+            or any(isinstance(a, ast.Starred) for a in call.args)):
+        raise SyntaxError("invalid options")
+    names = [k.arg for k in call.keywords]
+    if len(set(names)) != len(names):
+        raise SyntaxError("keyword argument repeated")
+    args = tuple(ast.literal_eval(a) for a in call.args)
+    params = {k.arg: ast.literal_eval(k.value) for k in call.keywords}
+    return args[0] if len(args) == 1 else args, params
@@ -6,35 +6,102 @@ A command line interpreter for the AirBnB objects.
 Type help to get all commands
 """
 
+import argparse
 import cmd
+import csv
+import sys
+import traceback
 from models import storage
 from exports import valid_classes, BaseModel
-from ast import literal_eval
+from command_parser import parse_options
+from models.engine.bulk import make_record, read_rows, row_format, write_rows
 
 
 class HBNBCommand(cmd.Cmd):
     """A representation of the command line interpreter
     Attributes:
     - prompt: A string to print as prompt
+    - errors: number of commands that failed, the exit code of a script is
+    1 when there is any
+    - import_chunk: number of objects import adds to storage at a time
     """
 
     prompt = "(hbnb) "
+    import_chunk = 1000
 
-    def preloop(self):
-        """Set interpreter-wide attributes"""
-        self.available = {"BaseModel": BaseModel}
+    def __init__(self, *args, **kwargs):
+        """Initialize the interpreter and the table of the commands of
+        _call_command"""
+        super().__init__(*args, **kwargs)
+        self.errors = 0
         self.valid_commands = {
             "all": self.do_all,
             "count": self._count,
             "show": self.do_show,
             "destroy": self.do_destroy,
             "update": self.do_update,
+            "where": self._where,
+            "sort": self._sort,
         }
 
+    def preloop(self):
+        """Set interpreter-wide attributes"""
+        self.available = {"BaseModel": BaseModel}
+
+    def precmd(self, line):
+        """Reads what other processes saved before running a command, when
+        they share the storage file"""
+        storage.refresh()
+        return line
+
     def emptyline(self):
         """Does nothing when the user enters an empty line"""
         return
 
+    def default(self, line):
+        """Prints the unknown syntax error of a line that isn't a command"""
+        self._error(f"*** Unknown syntax: {line}")
+
+    def run_batch(self, lines, checkpoint=0):
+        """Runs the commands of lines, e.g a script piped to the console,
+        with every save deferred to a single save at the end of the script
+        or at quit. The output is the same as cmdloop() would print.
+        Parameters:
+        - lines: iterable of the commands, one per line
+        - checkpoint: when not 0, also saves after every checkpoint
+        commands, so an interrupted script only loses the last ones
+        """
+        self.preloop()
+        lines = iter(lines)
+        stop = False
+        while not stop:
+            with storage.batch():
+                count = 0
+                for line in lines:
+                    print(self.prompt, end="")
+                    stop = self.run_line(line.rstrip("\r\n"))
+                    count += 1
+                    if stop or count == checkpoint:
+                        break
+                else:
+                    print(self.prompt, end="")
+                    stop = self.run_line("EOF")
+        self.postloop()
+
+    def run_line(self, line):
+        """Runs one command like cmdloop() does, an exception only failing
+        this command
+        Returns:
+        - True if the command stops the interpreter
+        """
+        try:
+            line = self.precmd(line)
+            return self.postcmd(self.onecmd(line), line)
+        except Exception:
+            self.errors += 1
+            traceback.print_exc()
+            return False
+
     def do_EOF(self, line):
         """Exits the interpreter"""
         print()  # arfs6: printing new line character
@@ -55,7 +122,7 @@ class HBNBCommand(cmd.Cmd):
         if not self._is_line_valid(class_name, "create"):
             return
         # This looks ridiculous, mb: looks fine lol
-        obj = valid_classes[class_name]()
+        obj = storage.model_class(valid_classes[class_name])()
         storage.save()
         print(obj.id)
 
@@ -74,14 +141,13 @@ class HBNBCommand(cmd.Cmd):
             args = line.split()
             class_name = args[0]
             ins_id = args[1]
-        obj_name = f"{class_name}.{ins_id}"
-        all_objs = storage.all()
-        if obj_name not in all_objs:
-            print("** no instance found **")
+        obj = storage.get(class_name, ins_id)
+        if obj is None:
+            self._error("** no instance found **")
             return
 
         # instance exist, print it!
-        print(all_objs[obj_name])
+        print(obj)
 
     def do_destroy(self, line: str, **kwargs):
         """destroy class_name object_id: destroy the object with the id
@@ -93,15 +159,14 @@ class HBNBCommand(cmd.Cmd):
             return
         if line:
             args = line.split()
-            obj_name = f"{args[0]}.{args[1]}"
+            obj = storage.get(args[0], args[1])
         else:
-            obj_name = f"{kwargs['class_name']}.{self._get_id(kwargs)}"
-        all_objs = storage.all()
-        if obj_name not in all_objs:
-            print("** no instance found **")
+            obj = storage.get(kwargs['class_name'], self._get_id(kwargs))
+        if obj is None:
+            self._error("** no instance found **")
             return
         # instance exist, destroy it!
-        del all_objs[obj_name]
+        storage.delete(obj)
         storage.save()
 
     def do_all(self, line: str, **kwargs):
@@ -110,15 +175,15 @@ class HBNBCommand(cmd.Cmd):
             return
         if kwargs:
             line = kwargs["class_name"]
-        all_objs = storage.all()
-        filter = True if line and line in valid_classes else False
-        list_objs = []
-        if filter:
-            list_objs = [str(v) for k, v in all_objs.items() if line in k]
+        if kwargs and kwargs.get("params"):
+            self._where(None, **kwargs)
+            return
+        if line and line in valid_classes:
+            all_objs = storage.all(line)
         else:
-            list_objs = [str(v) for _, v in all_objs.items()]
+            all_objs = storage.all()
         # do we print an empty list?
-        print(list_objs)
+        self._print_list(all_objs.values())
 
     def do_update(self, line: str, **kwargs):
         """update class_name object_id attribute value: Updates the object with
@@ -130,16 +195,79 @@ class HBNBCommand(cmd.Cmd):
             obj_name = f"{args[0]}.{args[1]}"
             self._set_attr(args[2], args[3], obj_name)
             return
-        all_objs = storage.all()
-        if isinstance(kwargs["options"][1], str):
-            options = kwargs["options"]
-            obj_name = f"{kwargs['class_name']}.{self._get_id(kwargs)}"
-            setattr(all_objs[obj_name], options[1], options[2])
+        instance = storage.get(kwargs['class_name'], self._get_id(kwargs))
+        options = kwargs["options"]
+        if isinstance(options[1], str):
+            self._update_attrs(instance, {options[1]: options[2]})
+        else:
+            self._update_attrs(instance, options[1])
+
+    def do_import(self, line: str):
+        """import class_name file: Creates the instances of class_name read
+        from file, NDJSON or CSV when its name ends with .csv, and saves
+        them once"""
+        args = self._get_file_args(line)
+        if not args:
+            return
+        cls, path = args
+        count = 0
+        typed = row_format(path) != "csv"
+        model = storage.model_class(cls)
+        objs = []
+        try:
+            with storage.batch():
+                for number, row in read_rows(path):
+                    try:
+                        if row is None:
+                            raise ValueError("not an object")
+                        record = make_record(cls, row, typed)
+                    except (TypeError, ValueError) as e:
+                        self._error(f"** line {number}: {e} **")
+                        continue
+                    objs.append(model.from_record(record))
+                    if len(objs) == self.import_chunk:
+                        storage.new_many(objs)
+                        count += len(objs)
+                        objs = []
+                storage.new_many(objs)
+                count += len(objs)
+                storage.save()
+        except OSError as e:
+            self._error(f"** can't read {path}: {e.strerror} **")
             return
+        except UnicodeDecodeError:
+            self._error(f"** can't read {path}: not UTF-8 text **")
+            return
+        except csv.Error as e:
+            self._error(f"** can't read {path}: {e} **")
+            return
+        print(count)
 
-        obj_name = f"{kwargs['class_name']}.{self._get_id(kwargs)}"
-        for key, value in kwargs["options"][1].items():
-            setattr(all_objs[obj_name], key, value)
+    def do_export(self, line: str):
+        """export class_name file: Writes the instances of class_name to
+        file, NDJSON or CSV when its name ends with .csv"""
+        args = self._get_file_args(line)
+        if not args:
+            return
+        cls, path = args
+        records = [obj.to_dict() for obj in storage.all(cls).values()]
+        try:
+            write_rows(path, records)
+        except OSError as e:
+            self._error(f"** can't write {path}: {e.strerror} **")
+            return
+        print(len(records))
+
+    def _get_file_args(self, line):
+        """Returns the class and the file name of import and export, prints
+        an error and returns None if they are missing"""
+        if not self._is_line_valid(line, "create"):
+            return None
+        args = line.split(" ", 1)
+        if len(args) == 1 or not args[1].strip():
+            self._error("** file name missing **")
+            return None
+        return valid_classes[args[0]], args[1].strip()
 
     def do_User(self, line):
         """User.command(options): Performs command on User with options"""
@@ -182,15 +310,106 @@ class HBNBCommand(cmd.Cmd):
             - options: not used
         """
         class_name = kwargs["class_name"]
+        print(storage.count(class_name))
 
-        # count then print
-        all_objs = storage.all()
-        count = 0
-        for obj_name in all_objs:
-            if obj_name.startswith(class_name):
-                count += 1
+    def _where(self, line, **kwargs):
+        """Not a command!
+        Prints the instances of a class whose attributes equal the given
+        values, called using the _call_command, e.g
+        Place.where(city_id="1", max_guest=2, order_by="-price_by_night",
+        limit=10, offset=20)
+        Parameters:
+        - line: Not used
+        - kwargs: dictionary with:
+            - class_name: name of class to use
+            - options: not used
+            - params: attribute values, and optionally:
+                - order_by: attribute or tuple of attributes to sort by, -
+                before a name sorts from the largest value
+                - limit: prints at most that many instances
+                - offset: skips that many instances first
+        """
+        params = dict(kwargs.get("params", {}))
+        order_by = params.pop("order_by", ())
+        if isinstance(order_by, str):
+            order_by = (order_by,)
+        query = self._page(kwargs, storage.query(kwargs["class_name"]),
+                           params.pop("limit", None),
+                           params.pop("offset", None),
+                           order_by)
+        if query is None:
+            return
+        if kwargs["options"] or not all(isinstance(k, str) for k in params):
+            self._unknown_syntax(kwargs)
+            return
+        self._print_list(query.where(**params))
 
-        print(count)
+    def _sort(self, line, **kwargs):
+        """Not a command!
+        Prints the instances of a class sorted by attributes, called using
+        the _call_command, e.g Place.sort("-price_by_night", "name",
+        limit=10, offset=20)
+        Parameters:
+        - line: Not used
+        - kwargs: dictionary with:
+            - class_name: name of class to use
+            - options: attributes to sort by, - before a name sorts from
+            the largest value
+            - params: limit and offset, see _where
+        """
+        options = kwargs["options"]
+        if isinstance(options, str):
+            options = (options,)
+        params = dict(kwargs.get("params", {}))
+        query = self._page(kwargs, storage.query(kwargs["class_name"]),
+                           params.pop("limit", None),
+                           params.pop("offset", None),
+                           options)
+        if query is None:
+            return
+        if params or not options:
+            self._unknown_syntax(kwargs)
+            return
+        self._print_list(query)
+
+    def _page(self, kwargs, query, limit, offset, order_by):
+        """Returns query sorted and paged, prints an error and returns None
+        if the arguments are invalid"""
+        for value in (limit, offset):
+            if value is not None and (type(value) is not int or value < 0):
+                self._unknown_syntax(kwargs)
+                return None
+        if (not isinstance(order_by, tuple)
+                or not all(isinstance(f, str) and f.strip("-")
+                           for f in order_by)):
+            self._unknown_syntax(kwargs)
+            return None
+        if order_by:
+            query = query.order_by(*order_by)
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
+    def _unknown_syntax(self, kwargs):
+        """Prints the unknown syntax error of a command of _call_command"""
+        self._error(f"*** Unknown syntax: {kwargs['class_name']}."
+                    f"{kwargs.get('text', '')}")
+
+    def _error(self, message):
+        """Prints the error message of a command and counts it"""
+        self.errors += 1
+        print(message)
+
+    def _print_list(self, objs):
+        """Prints the list of the string representations of objs, as
+        print([str(obj) for obj in objs]) would, one object at a time"""
+        print("[", end="")
+        for i, obj in enumerate(objs):
+            print(", " if i else "", repr(str(obj)), sep="", end="",
+                  flush=True)
+        print("]")
 
     def _call_command(self, class_name: str, line: str):
         """Calls the right command to perform the task
@@ -199,20 +418,13 @@ class HBNBCommand(cmd.Cmd):
         - line: line of text to process.
             text is in the form `.command(options)`
         """
-        # moving this from preloop, preloop might not run before onecmd()?
-        # onecmd is necessary for testing
-        self.valid_commands = {
-            "all": self.do_all,
-            "count": self._count,
-            "show": self.do_show,
-            "destroy": self.do_destroy,
-            "update": self.do_update,
-        }
+        # valid_commands is set in __init__, preloop might not run before
+        # onecmd()? onecmd is necessary for testing
         if not line or line[0] != ".":
-            print(f"*** Unknown syntax: {class_name}{line}")
+            self._error(f"*** Unknown syntax: {class_name}{line}")
             return
         elif "(" not in line or ")" not in line:
-            print(f"*** Unknown syntax: {class_name}{line}")
+            self._error(f"*** Unknown syntax: {class_name}{line}")
             return
 
         line = line[1:]  # removing the first . sign
@@ -221,18 +433,23 @@ class HBNBCommand(cmd.Cmd):
         options = parts[1] + parts[2]
         del parts  # just felt like
         if command not in self.valid_commands:
-            print(f"*** Unknown syntax: {class_name}.{line}")
+            self._error(f"*** Unknown syntax: {class_name}.{line}")
             return
         try:
             # catch invalid options
-            options: tuple = literal_eval(options)
+            options, params = parse_options(options)
         except (SyntaxError, ValueError):
             # arfs6: chat gpt suggested catching SecurityError but it doesn't
             # workAs. Python can't find it
-            print(f"*** Unknown syntax: {class_name}.{line}")
+            self._error(f"*** Unknown syntax: {class_name}.{line}")
+            return
+        if params and command not in ("all", "where", "sort"):
+            # the other commands have no name=value options
+            self._error(f"*** Unknown syntax: {class_name}.{line}")
             return
         self.valid_commands[command](None,
-                                     class_name=class_name, options=options)
+                                     class_name=class_name, options=options,
+                                     params=params, text=line)
 
     def _get_update_str(self, line: str):
         """Return the right string to use as value for the update command"""
@@ -255,33 +472,32 @@ class HBNBCommand(cmd.Cmd):
         if not line:
             if func == "all":
                 return True
-            print("** class name missing **")
+            self._error("** class name missing **")
             return False
         args = line.split(" ", 3)
         # classname
         if args[0] not in valid_classes:
-            print("** class doesn't exist **")
+            self._error("** class doesn't exist **")
             return False
         if func in ["all", "create"]:
             return True
         arg_l = len(args)
         # instance
         if arg_l == 1:
-            print("** instance id missing **")
+            self._error("** instance id missing **")
             return False
         if func in ["destroy", "show"]:
             return True
         # update checks
         args = line.split(" ", 3)
-        obj_name = f"{args[0]}.{args[1]}"
-        if obj_name not in storage.all():
-            print("** no instance found **")
+        if storage.get(args[0], args[1]) is None:
+            self._error("** no instance found **")
             return False
         if arg_l == 2:  # no attributes
-            print("** attribute name missing **")
+            self._error("** attribute name missing **")
             return False
         if arg_l == 3:
-            print("** value missing **")
+            self._error("** value missing **")
             return False
         return True  # All checks passed -- success
 
@@ -295,27 +511,26 @@ class HBNBCommand(cmd.Cmd):
         """
         ins_id = kwargs["options"]
         if not ins_id:
-            print("** instance id missing **")
+            self._error("** instance id missing **")
             return False
         # literal_eval can let other type pass and functions expect strings
         # (obj) == obj
         if isinstance(ins_id, str):
             return True
         if not isinstance(ins_id, tuple):
-            print("** no instance found **")
+            self._error("** no instance found **")
             return False
         # (obj, obj) == tuple
         ins_id = ins_id[0]
         if not isinstance(ins_id, str):
             # literal_eval can let other type pass and functions expect strings
-            print("** no instance found **")
+            self._error("** no instance found **")
             return False
 
         return True
 
     def _is_upd_args_valid(self, line, kwargs):
         """Validates the parameters of update"""
-        all_objs = storage.all()
         if not kwargs:
             if not self._is_line_valid(line, "update"):
                 return False
@@ -323,19 +538,18 @@ class HBNBCommand(cmd.Cmd):
 
         if not self._is_id_kwargs(kwargs):
             return False
-        obj_name = f"{kwargs['class_name']}.{self._get_id(kwargs)}"
-        if obj_name not in all_objs:
-            print("** no instance found **")
+        if storage.get(kwargs['class_name'], self._get_id(kwargs)) is None:
+            self._error("** no instance found **")
             return False
 
         # check for attribute name and value
         arg_l = len(kwargs["options"])
         options = kwargs["options"]
         if not isinstance(options, tuple):  # only one options.
-            print("** attribute name missing **")
+            self._error("** attribute name missing **")
             return False
         elif not isinstance(options[1], dict) and arg_l == 2:
-            print("** value missing **")
+            self._error("** value missing **")
             return False
         return True  # all checks passed -- success
 
@@ -352,11 +566,44 @@ class HBNBCommand(cmd.Cmd):
         except ValueError as e:
             # just pass value?
             value = self._get_update_str(val)
-        all_objs = storage.all()
-        instance = all_objs[obj_name]
-        setattr(instance, key, value)
-        instance.save()
+        class_name, _, ins_id = obj_name.partition(".")
+        instance = storage.get(class_name, ins_id)
+        self._update_attrs(instance, {key: value})
+
+    def _update_attrs(self, instance, attrs):
+        """Sets the attributes of instance and saves it, every form of
+        update going through here
+        Parameters:
+        - instance: the object
+        - attrs: dictionary of the attribute names and their values
+        """
+        # one save for all the attributes, none if one of them fails
+        with storage.batch():
+            for key, value in attrs.items():
+                setattr(instance, key, value)
+            instance.save()
+
+
+def main(argv=None):
+    """Runs the interpreter, in batch mode when asked to or when the
+    commands aren't typed in a terminal
+    Returns:
+    - the exit code: 1 if a command failed in batch mode, 0 otherwise
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--batch", action="store_true",
+                        help="run the commands of stdin and save once at "
+                        "the end")
+    parser.add_argument("--checkpoint", type=int, default=0, metavar="N",
+                        help="in batch mode, also save every N commands")
+    args = parser.parse_args(argv)
+    console = HBNBCommand()
+    if not args.batch and sys.stdin.isatty():
+        console.cmdloop()
+        return 0
+    console.run_batch(sys.stdin, args.checkpoint)
+    return 1 if console.errors else 0
 
 
 if __name__ == "__main__":
-    HBNBCommand().cmdloop()
+    sys.exit(main())
@@ -2,9 +2,67 @@
 # -*- coding: utf-8 -*-
 """
 storage import
+The engine is picked with the HBNB_TYPE_STORAGE environment variable:
+- file (default): FileStorage
+- journal: JournalStorage
+- sqlite: SQLiteStorage, in file.db
+- sharded: ShardedStorage, a file per class in the file.shards directory.
+HBNB_STORAGE_BUCKETS splits each class in that many files, and
+HBNB_STORAGE_CLASSES (comma separated names) only loads those classes.
+Setting HBNB_STORAGE_STREAM to 1 parses the file one object at a time on
+reload, setting HBNB_STORAGE_LAZY to 1 only makes the instances when they
+are first used.
+HBNB_STORAGE_FSYNC sets when saved files are flushed to disk: always, never
+(default) or a number of milliseconds between two flushes.
+Setting HBNB_STORAGE_COMPACT to 1 keeps the instances in their compact
+form (see models.compact), setting HBNB_STORAGE_COLUMNAR to 1 keeps them in
+the columns of a table per class (see models.columns).
+HBNB_STORAGE_PATH sets the file of the engine, its extension picks the
+format (see models.engine.serializers) unless HBNB_STORAGE_CODEC is set.
+HBNB_STORAGE_RENDER_CACHE sets the number of objects whose str() and
+to_dict() forms are cached (see models.engine.render_cache), 0 by default.
+HBNB_STORAGE_WORKERS sets the number of processes decoding a JSON file on
+reload (see models.engine.parallel), 0 by default.
+Setting HBNB_STORAGE_SHARED to 1 lets several processes use the file of
+the file engine (see FileStorage.shared), the other engines ignore it.
+Setting HBNB_STORAGE_THREADSAFE to 1 lets threads share storage, saving in
+a background thread (see FileStorage.threadsafe), SQLiteStorage ignores it.
 """
 
+from os import getenv
 from .engine.file_storage import FileStorage
+from .engine.journal_storage import JournalStorage
+from .engine.sharded_storage import ShardedStorage
+from .engine.sqlite_storage import SQLiteStorage
 
-storage = FileStorage()
+engines = {
+    "file": FileStorage,
+    "journal": JournalStorage,
+    "sqlite": SQLiteStorage,
+    "sharded": ShardedStorage,
+}
+
+storage = engines.get(getenv("HBNB_TYPE_STORAGE", "file"), FileStorage)()
+if getenv("HBNB_STORAGE_PATH"):
+    storage.fpa = getenv("HBNB_STORAGE_PATH")
+storage.codec = getenv("HBNB_STORAGE_CODEC")
+if isinstance(storage, ShardedStorage):
+    storage.buckets = int(getenv("HBNB_STORAGE_BUCKETS", "0"))
+    if getenv("HBNB_STORAGE_CLASSES"):
+        storage.classes = getenv("HBNB_STORAGE_CLASSES").split(",")
+storage.streaming = getenv("HBNB_STORAGE_STREAM") == "1"
+storage.lazy = getenv("HBNB_STORAGE_LAZY") == "1"
+storage.compact_instances = getenv("HBNB_STORAGE_COMPACT") == "1"
+storage.columnar = getenv("HBNB_STORAGE_COLUMNAR") == "1"
+storage.render_cache.size = int(getenv("HBNB_STORAGE_RENDER_CACHE", "0"))
+fsync = getenv("HBNB_STORAGE_FSYNC", "never")
+if fsync.isdigit():
+    storage.fsync, storage.fsync_interval = "interval", int(fsync)
+else:
+    storage.fsync = fsync
+storage.workers = int(getenv("HBNB_STORAGE_WORKERS", "0"))
+storage.shared = (getenv("HBNB_STORAGE_SHARED") == "1"
+                  and storage.shareable)
 storage.reload()
+storage.threadsafe = (getenv("HBNB_STORAGE_THREADSAFE") == "1"
+                      and storage.threadable)
@@ -9,14 +9,24 @@ from . import storage
 
 
 class BaseModel:
-    """Defines common attributes and methods for all other classes"""
+    """Defines common attributes and methods for all other classes
+    Attributes:
+    - foreign_keys: names of the attributes holding ids of other objects
+    """
+
+    foreign_keys = ()
 
     def __init__(self, *args, **kwargs):
         """Initialize all the attributes of the object"""
         if not kwargs:
-            self.id = str(uuid4())
-            self.created_at = datetime.now()
-            self.updated_at = datetime.now()
+            attrs = {"id": str(uuid4()), "created_at": datetime.now(),
+                     "updated_at": datetime.now()}
+            if type(self).__dictoffset__:
+                # not in storage yet, there is no change to tell it
+                self.__dict__.update(attrs)
+            else:
+                for name, value in attrs.items():
+                    setattr(self, name, value)
             storage.new(self)
             return
 
@@ -33,8 +43,40 @@ class BaseModel:
             if attr not in ignore:
                 setattr(self, attr, value)
 
+    @classmethod
+    def from_record(cls, record):
+        """Returns the instance of a dictionary made by to_dict(), as
+        cls(**record) would, without checking it again: for the records
+        written by storage itself. The attributes are set in one go, in the
+        order cls(**record) sets them.
+        """
+        obj = cls.__new__(cls)
+        state = {"created_at": None, "updated_at": None}
+        state.update(record)
+        state.pop("__class__", None)
+        state["created_at"] = datetime.fromisoformat(record["created_at"])
+        state["updated_at"] = datetime.fromisoformat(record["updated_at"])
+        obj.__dict__.update(state)
+        return obj
+
+    def __setattr__(self, name, value):
+        """Sets an attribute and tells storage the object changed"""
+        super().__setattr__(name, value)
+        storage.touch(self, name)
+
+    def __delattr__(self, name):
+        """Deletes an attribute and tells storage the object changed"""
+        super().__delattr__(name)
+        storage.touch(self, name)
+
     def __str__(self):
-        """Returns a string representation of the object"""
+        """Returns a string representation of the object, cached by
+        storage until the object changes"""
+        return storage.rendered(self, "str", BaseModel.render_str)
+
+    def render_str(self):
+        """Returns a string representation of the object, as rendered for
+        __str__"""
         return f"[{self.__class__.__name__}] ({self.id}) {self.__dict__}"
 
     def val_str_or_raise(self, name, string):
@@ -51,7 +93,13 @@ class BaseModel:
         storage.save()
 
     def to_dict(self):
-        """Returns a dictionary containing all the attributes of the object"""
+        """Returns a dictionary containing all the attributes of the object,
+        cached by storage until the object changes"""
+        return storage.rendered(self, "dict", BaseModel.render_dict)
+
+    def render_dict(self):
+        """Returns a dictionary containing all the attributes of the object,
+        as rendered for to_dict"""
         attrs = self.__dict__.copy()
         attrs['__class__'] = self.__class__.__name__
         attrs['created_at'] = self.created_at.isoformat()
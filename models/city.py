@@ -11,3 +11,6 @@ class City(BaseModel):
 
     state_id = ""
     name = ""
+
+    # ids of other objects, indexed by storage.by_ref()
+    foreign_keys = ("state_id",)
@@ -0,0 +1,545 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Includes the columnar store: Table keeps the instances of a model class as
+columns, RowView stands for one row of a table.
+- int and float attributes are kept in array.array columns
+- created_at and updated_at are kept as integer epoch microseconds
+- ids and other strings are interned, so equal ids share one string
+- values that don't fit the type of their column, and attributes that
+have no column, go to a small overflow dict of the row
+Filters and aggregates run over the columns, with NumPy when it is
+installed, instead of reading the attribute of each instance.
+"""
+
+import operator
+import sys
+import weakref
+from array import array
+from datetime import datetime
+from itertools import compress
+from types import FunctionType, MethodType
+from . import base_model
+from .base_model import BaseModel
+from .compact import declared_fields, pack_time, unpack_time
+from .engine.lazy_object import LazyObject
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+INT64 = (-1 << 63, 1 << 63)
+
+
+def pack_int(value):
+    """returns value if it fits an int64 column, else None"""
+    if type(value) is int and INT64[0] <= value < INT64[1]:
+        return value
+    return None
+
+
+def pack_float(value):
+    """returns value if it fits a float column, else None"""
+    if type(value) is float:
+        return value
+    return None
+
+
+def number(value):
+    """returns value if it can be compared with a number column, else
+    None"""
+    if type(value) in (int, float):
+        return value
+    return None
+
+
+class Column:
+    """Values of one attribute, one per row
+    Parameters:
+    - name: name of the attribute
+    - default: value of the rows that don't set the attribute
+    - typecode: array typecode of the column, None for a list of objects
+    - pack: returns the value to keep, None if it doesn't fit the column
+    - unpack: returns the value of a kept value
+    - operand: returns the value to compare the column with, None if it
+    can't be compared in the column
+    Attributes:
+    - values: the column
+    - overflow: rows whose value is in the overflow dict of the row
+    """
+
+    def __init__(self, name, default, typecode=None, pack=None, unpack=None,
+                 operand=None):
+        """Initialize an empty column"""
+        self.name = name
+        self.typecode = typecode
+        self.pack = pack
+        self.unpack = unpack
+        self.operand = operand
+        if typecode is None:
+            self.values = []
+            self.blank = default
+        else:
+            self.values = array(typecode)
+            self.blank = default if pack(default) is not None else 0
+        self.overflow = set()
+
+    @classmethod
+    def of(cls, name, default):
+        """returns the column fitting the default value of an attribute"""
+        if name in ("created_at", "updated_at"):
+            return cls(name, None, "q", pack_time, unpack_time, pack_time)
+        if type(default) is int:
+            return cls(name, default, "q", pack_int, None, number)
+        if type(default) is float:
+            return cls(name, default, "d", pack_float, None, number)
+        return cls(name, default)
+
+    def append(self):
+        """adds a row that doesn't set the attribute"""
+        self.values.append(self.blank)
+
+    def get(self, row):
+        """returns the value of row"""
+        value = self.values[row]
+        return value if self.unpack is None else self.unpack(value)
+
+    def set(self, row, value):
+        """keeps value in row, returns False if it doesn't fit"""
+        if self.typecode is None:
+            if type(value) is str:
+                value = sys.intern(value)
+        else:
+            value = self.pack(value)
+            if value is None:
+                return False
+        self.values[row] = value
+        return True
+
+    def reset(self, row):
+        """forgets the value of row"""
+        self.values[row] = self.blank
+
+    def vector(self):
+        """returns a NumPy array of the column, sharing its memory"""
+        dtype = numpy.int64 if self.typecode == "q" else numpy.float64
+        if not self.values:
+            return numpy.zeros(0, dtype=dtype)
+        return numpy.frombuffer(self.values, dtype=dtype)
+
+
+class Table:
+    """Instances of a model class kept as columns
+    Deleting the object of a row view keeps its row, so the view keeps
+    reading it until it is garbage collected. The rows of deleted objects
+    are then reused by the next objects added.
+    Parameters:
+    - cls: the model class
+    Attributes:
+    - columns: attribute name -> Column, for id, the dates and the
+    attributes declared by cls
+    - orders: row -> names of the attributes set on the row, in the order
+    they were set. The tuples are shared between the rows.
+    - extra: row -> overflow dict of the row
+    - objs: row -> RowView of the row, or the instance mirrored in the row.
+    A weak reference to the view once its object is deleted.
+    - alive: row -> 1 if the row holds an object of storage, else 0
+    - rows: id -> row of the objects of storage
+    - free: rows that can be reused
+    """
+
+    _orders = {}
+
+    def __init__(self, cls):
+        """Initialize an empty table"""
+        self.cls = cls
+        names = ["id", "created_at", "updated_at"] + declared_fields(cls)
+        self.columns = {
+            name: Column.of(name, getattr(cls, name, None))
+            for name in names}
+        self.orders = []
+        self.extra = {}
+        self.objs = []
+        self.alive = bytearray()
+        self.rows = {}
+        self.free = []
+
+    def __len__(self):
+        """returns the number of objects in the table"""
+        return len(self.rows)
+
+    def new_row(self):
+        """adds an empty row, or empties a free one, and returns it"""
+        if self.free:
+            row = self.free.pop()
+            self.clear(row)
+            self.objs[row] = None
+            return row
+        row = len(self.orders)
+        for column in self.columns.values():
+            column.append()
+        self.orders.append(())
+        self.objs.append(None)
+        self.alive.append(0)
+        return row
+
+    def load(self, obj_id, record):
+        """adds a row made from a raw dictionary, as cls(**record) would,
+        and returns its view"""
+        row = self.new_row()
+        view = RowView(self, row)
+        for name in ("created_at", "updated_at"):
+            value = BaseModel.val_str_or_raise(view, name, record[name])
+            self.write(row, name, datetime.fromisoformat(value))
+        for name, value in record.items():
+            if name not in ("__class__", "created_at", "updated_at"):
+                self.write(row, name, value)
+        self.objs[row] = view
+        self.rows[obj_id] = row
+        self.alive[row] = 1
+        return view
+
+    def put(self, obj_id, obj, name=None):
+        """puts the object of storage with id obj_id in the table
+        A RowView of the table only gets its row back, other instances are
+        copied to a row.
+        Parameters:
+        - name: the only attribute changed since obj was put, None if any
+        may have changed
+        """
+        if type(obj) is LazyObject:
+            return
+        if type(obj) is RowView and obj._table is self:
+            row = obj._row
+            old = self.rows.get(obj_id)
+            if old is not None and old != row:
+                self.remove(obj_id)
+        else:
+            row = self.rows.get(obj_id)
+            if row is None or self.objs[row] is not obj:
+                self.remove(obj_id)
+                row = self.new_row()
+                self.sync(row, obj)
+            elif name is None:
+                self.sync(row, obj)
+            else:
+                self.update(row, obj, name)
+        self.objs[row] = obj
+        self.rows[obj_id] = row
+        self.alive[row] = 1
+
+    def remove(self, obj_id):
+        """takes the object with id obj_id out of the table"""
+        row = self.rows.pop(obj_id, None)
+        if row is None:
+            return
+        self.alive[row] = 0
+        obj = self.objs[row]
+        if type(obj) is RowView and obj._table is self:
+            self.objs[row] = weakref.ref(
+                obj, lambda _, row=row: self.free.append(row))
+        else:
+            self.clear(row)
+            self.objs[row] = None
+            self.free.append(row)
+
+    def clear(self, row):
+        """forgets every value of row"""
+        for name in self.orders[row]:
+            column = self.columns.get(name)
+            if column is not None:
+                column.reset(row)
+                column.overflow.discard(row)
+        self.extra.pop(row, None)
+        self.orders[row] = ()
+
+    def sync(self, row, obj):
+        """copies the attributes of obj to row"""
+        self.clear(row)
+        for name, value in vars(obj).items():
+            self.write(row, name, value)
+
+    def update(self, row, obj, name):
+        """copies the attribute name of obj, set or deleted, to row"""
+        state = vars(obj)
+        if name in state:
+            self.write(row, name, state[name])
+        elif name in self.orders[row]:
+            self.erase(row, name)
+
+    def read(self, row, name):
+        """returns the attribute name of row, the class attribute if the
+        row doesn't set it
+        Raises:
+        - AttributeError: neither the row nor the class have it
+        """
+        extra = self.extra.get(row)
+        if extra and name in extra:
+            return extra[name]
+        column = self.columns.get(name)
+        if column is not None and name in self.orders[row]:
+            return column.get(row)
+        return getattr(self.cls, name)
+
+    def write(self, row, name, value):
+        """sets the attribute name of row"""
+        column = self.columns.get(name)
+        extra = self.extra.get(row)
+        if column is not None and column.set(row, value):
+            if extra and name in extra:
+                del extra[name]
+                column.overflow.discard(row)
+        else:
+            if extra is None:
+                extra = self.extra[row] = {}
+            extra[name] = value
+            if column is not None:
+                column.reset(row)
+                column.overflow.add(row)
+        if name not in self.orders[row]:
+            self.set_order(row, self.orders[row] + (name,))
+
+    def erase(self, row, name):
+        """deletes the attribute name of row
+        Raises:
+        - AttributeError: the row doesn't set it
+        """
+        if name not in self.orders[row]:
+            raise AttributeError(name)
+        column = self.columns.get(name)
+        if column is not None:
+            column.reset(row)
+            column.overflow.discard(row)
+        extra = self.extra.get(row)
+        if extra and name in extra:
+            del extra[name]
+        self.set_order(row, tuple(n for n in self.orders[row] if n != name))
+
+    def set_order(self, row, order):
+        """sets the order of row to the shared tuple equal to order"""
+        self.orders[row] = self._orders.setdefault(order, order)
+
+    def state(self, row):
+        """returns the attributes set on row, as __dict__ would"""
+        return {name: self.read(row, name) for name in self.orders[row]}
+
+    def select(self):
+        """returns the Selection of every object in the table"""
+        if numpy is not None:
+            return Selection(self, numpy.frombuffer(
+                self.alive, dtype=numpy.bool_).copy())
+        return Selection(self, list(map(bool, self.alive)))
+
+    def where(self, name, op, value):
+        """returns the Selection of the objects whose attribute name
+        compares to value with op, one of ==, !=, <, <=, >, >="""
+        return self.select().where(name, op, value)
+
+    def mask(self, name, op, value):
+        """returns for each row whether its attribute name compares to
+        value with op"""
+        compare = OPERATORS[op]
+        column = self.columns.get(name)
+        operand = None
+        if column is not None and column.typecode is not None:
+            operand = column.operand(value)
+        if operand is None:
+            found = [self.test(row, name, compare, value)
+                     for row in range(len(self.orders))]
+            if numpy is not None:
+                return numpy.array(found, dtype=numpy.bool_)
+            return found
+        if numpy is not None:
+            found = compare(column.vector(), operand)
+        else:
+            found = [compare(v, operand) for v in column.values]
+        for row in column.overflow:
+            found[row] = self.test(row, name, compare, value)
+        return found
+
+    def test(self, row, name, compare, value):
+        """returns whether the attribute name of row compares to value"""
+        try:
+            return bool(compare(self.read(row, name), value))
+        except (AttributeError, TypeError):
+            return False
+
+
+class Selection:
+    """Objects of a table selected by where()
+    Parameters:
+    - table: the Table
+    - mask: for each row of the table, whether it is selected
+    """
+
+    def __init__(self, table, mask):
+        """Initialize the selection"""
+        self.table = table
+        self.mask = mask
+
+    def where(self, name, op, value):
+        """returns the objects of the selection whose attribute name
+        compares to value with op, one of ==, !=, <, <=, >, >="""
+        found = self.table.mask(name, op, value)
+        if numpy is not None:
+            return Selection(self.table, self.mask & found)
+        return Selection(self.table,
+                         [a and b for a, b in zip(self.mask, found)])
+
+    def rows(self):
+        """returns the selected rows"""
+        if numpy is not None:
+            return numpy.flatnonzero(self.mask).tolist()
+        return list(compress(range(len(self.mask)), self.mask))
+
+    def __len__(self):
+        """returns the number of objects selected"""
+        if numpy is not None:
+            return int(numpy.count_nonzero(self.mask))
+        return sum(self.mask)
+
+    count = __len__
+
+    def objects(self):
+        """returns the selected objects as storage.all() would"""
+        table = self.table
+        name = table.cls.__name__
+        objs = {}
+        for row in self.rows():
+            obj = table.objs[row]
+            objs[f"{name}.{obj.id}"] = obj
+        return objs
+
+    def values(self, name):
+        """returns the attribute name of each selected object"""
+        table = self.table
+        column = table.columns.get(name)
+        if column is None or column.typecode is not None:
+            return [table.read(row, name) for row in self.rows()]
+        if column.overflow:
+            return [table.read(row, name) for row in self.rows()]
+        return list(compress(column.values, self.mask))
+
+    def numbers(self, name):
+        """returns the numbers held by the attribute name of the selected
+        objects, as a NumPy array if it can"""
+        table = self.table
+        column = table.columns.get(name)
+        if column is None or column.operand is not number:
+            values = [v for v in self.values(name) if number(v) is not None]
+            return numpy.array(values) if numpy is not None else values
+        extra = [table.read(row, name) for row in column.overflow
+                 if self.mask[row]]
+        extra = [v for v in extra if number(v) is not None]
+        if numpy is not None:
+            mask = self.mask.copy()
+            mask[list(column.overflow)] = False
+            values = column.vector()[mask]
+            if extra:
+                values = numpy.concatenate((values, numpy.array(extra)))
+            return values
+        mask = self.mask
+        if column.overflow:
+            mask = list(mask)
+            for row in column.overflow:
+                mask[row] = False
+        return list(compress(column.values, mask)) + extra
+
+    def sum(self, name):
+        """returns the sum of the attribute name of the selected objects"""
+        values = self.numbers(name)
+        if numpy is not None:
+            return values.sum().item() if len(values) else 0
+        return sum(values)
+
+    def mean(self, name):
+        """returns the average of the attribute name of the selected
+        objects, None if there is none"""
+        values = self.numbers(name)
+        if not len(values):
+            return None
+        if numpy is not None:
+            return values.mean().item()
+        return sum(values) / len(values)
+
+    def min(self, name):
+        """returns the smallest attribute name of the selected objects,
+        None if there is none"""
+        values = self.numbers(name)
+        if not len(values):
+            return None
+        if numpy is not None:
+            return values.min().item()
+        return min(values)
+
+    def max(self, name):
+        """returns the largest attribute name of the selected objects,
+        None if there is none"""
+        values = self.numbers(name)
+        if not len(values):
+            return None
+        if numpy is not None:
+            return values.max().item()
+        return max(values)
+
+
+class RowView:
+    """Instance of a model whose attributes live in a row of a Table
+    isinstance() sees the view as an instance of the model class, and
+    to_dict() and str() give what the instance would.
+    Parameters:
+    - table: the Table
+    - row: the row of the table
+    """
+
+    __slots__ = ("_table", "_row", "__weakref__")
+
+    def __init__(self, table, row):
+        """Initialize the view"""
+        object.__setattr__(self, "_table", table)
+        object.__setattr__(self, "_row", row)
+
+    @property
+    def __class__(self):
+        """the model class, for isinstance() and the storage keys"""
+        return self._table.cls
+
+    @property
+    def __dict__(self):
+        """copy of the attributes set on the row, in the order they were
+        set"""
+        return self._table.state(self._row)
+
+    def __getattr__(self, name):
+        """reads the row, then the model class"""
+        if name in RowView.__slots__:
+            raise AttributeError(name)
+        value = self._table.read(self._row, name)
+        if isinstance(value, FunctionType):
+            return MethodType(value, self)
+        return value
+
+    def __setattr__(self, name, value):
+        """Sets an attribute and tells storage the object changed"""
+        self._table.write(self._row, name, value)
+        base_model.storage.touch(self, name)
+
+    def __delattr__(self, name):
+        """Deletes an attribute and tells storage the object changed"""
+        self._table.erase(self._row, name)
+        base_model.storage.touch(self, name)
+
+    __str__ = BaseModel.__str__
+    val_str_or_raise = BaseModel.val_str_or_raise
+    save = BaseModel.save
+    to_dict = BaseModel.to_dict
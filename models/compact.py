@@ -0,0 +1,237 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Includes compact_class() which makes the compact variant of a model class.
+A compact instance keeps its attributes in __slots__ instead of a __dict__:
+- the declared attributes of the class (e.g email of User) have a slot each
+- ids and foreign keys holding a UUID are kept as its 16 bytes
+- created_at and updated_at are kept as integer epoch microseconds
+- other attributes, set by update for instance, go to a small overflow dict
+to_dict(), str() and isinstance() give the same as for the model class.
+"""
+
+from datetime import datetime, timedelta
+from types import FunctionType, MethodType
+from uuid import UUID
+from . import base_model
+from .base_model import BaseModel
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+# slots used by CompactModel itself
+_INTERNAL = ("_extra", "_order")
+
+# attribute orders shared between instances, see CompactModel._order
+_orders = {}
+
+# model class -> compact class
+_compact_classes = {}
+
+
+def pack_uuid(value):
+    """returns the 16 bytes of a UUID string, None if value isn't one"""
+    if not isinstance(value, str) or len(value) != 36:
+        return None
+    try:
+        uuid = UUID(value)
+    except ValueError:
+        return None
+    if str(uuid) != value:
+        return None
+    return uuid.bytes
+
+
+def unpack_uuid(value):
+    """returns the UUID string of 16 bytes"""
+    return str(UUID(bytes=value))
+
+
+def pack_time(value):
+    """returns the epoch microseconds of a naive datetime, None if value
+    isn't one"""
+    if type(value) is not datetime or value.tzinfo is not None:
+        return None
+    return (value - EPOCH) // MICROSECOND
+
+
+def unpack_time(value):
+    """returns the datetime of epoch microseconds"""
+    return EPOCH + timedelta(microseconds=value)
+
+
+class Packed:
+    """Descriptor of an attribute kept in a slot in a packed form
+    Values that can't be packed go to the overflow dict.
+    Parameters:
+    - name: name of the attribute
+    - slot: slot descriptor keeping the packed value
+    - pack: returns the packed value, None if it can't pack it
+    - unpack: returns the value of a packed value
+    """
+
+    def __init__(self, name, slot, pack, unpack):
+        """Initialize the descriptor"""
+        self.name = name
+        self.slot = slot
+        self.pack = pack
+        self.unpack = unpack
+
+    def __get__(self, obj, owner=None):
+        """returns the unpacked value"""
+        if obj is None:
+            return self
+        try:
+            return self.unpack(self.slot.__get__(obj, owner))
+        except AttributeError:
+            return obj.__getattr__(self.name)
+
+    def __set__(self, obj, value):
+        """packs value in the slot, or keeps it in the overflow dict"""
+        packed = self.pack(value)
+        extra = obj._extra
+        if packed is None:
+            self.__delete__(obj)
+            if extra is None:
+                extra = {}
+                object.__setattr__(obj, "_extra", extra)
+            extra[self.name] = value
+            return
+        self.slot.__set__(obj, packed)
+        if extra:
+            extra.pop(self.name, None)
+
+    def __delete__(self, obj):
+        """drops the value"""
+        try:
+            self.slot.__delete__(obj)
+        except AttributeError:
+            if obj._extra and self.name in obj._extra:
+                del obj._extra[self.name]
+
+
+class CompactModel:
+    """Base of the compact classes, see compact_class()
+    Attributes:
+    - _model: the model class, what __class__ returns
+    - _fields: names of the attributes that have a slot
+    - _extra: overflow dict of the other attributes, None while empty
+    - _order: names of the attributes set on the instance, in the order
+    they were set, as __dict__ would list them. The tuples are shared
+    between the instances.
+    """
+
+    __slots__ = _INTERNAL
+    _model = BaseModel
+    _fields = frozenset()
+
+    def __init__(self, *args, **kwargs):
+        """Initialize all the attributes of the object"""
+        object.__setattr__(self, "_extra", None)
+        object.__setattr__(self, "_order", ())
+        BaseModel.__init__(self, *args, **kwargs)
+
+    @classmethod
+    def from_record(cls, record):
+        """Returns the instance of a dictionary made by to_dict(), each
+        attribute going through its slot"""
+        return cls(**record)
+
+    @property
+    def __class__(self):
+        """the model class, for isinstance() and the storage keys"""
+        return self._model
+
+    @property
+    def __dict__(self):
+        """copy of the attributes set on the instance, in the order they
+        were set"""
+        return {name: getattr(self, name) for name in self._order}
+
+    def __getattr__(self, name):
+        """reads the overflow dict, then the model class"""
+        if name in _INTERNAL:
+            raise AttributeError(name)
+        extra = self._extra
+        if extra and name in extra:
+            return extra[name]
+        value = getattr(self._model, name)
+        if isinstance(value, FunctionType):
+            return MethodType(value, self)
+        return value
+
+    def __setattr__(self, name, value):
+        """Sets an attribute and tells storage the object changed"""
+        if name in self._fields:
+            object.__setattr__(self, name, value)
+        else:
+            if self._extra is None:
+                object.__setattr__(self, "_extra", {})
+            self._extra[name] = value
+        if name not in self._order:
+            self._set_order(self._order + (name,))
+        base_model.storage.touch(self, name)
+
+    def __delattr__(self, name):
+        """Deletes an attribute and tells storage the object changed"""
+        if name not in self._order:
+            raise AttributeError(name)
+        if name in self._fields:
+            object.__delattr__(self, name)
+        else:
+            del self._extra[name]
+        self._set_order(tuple(n for n in self._order if n != name))
+        base_model.storage.touch(self, name)
+
+    def _set_order(self, order):
+        """sets _order to the shared tuple equal to order"""
+        object.__setattr__(self, "_order", _orders.setdefault(order, order))
+
+    __str__ = BaseModel.__str__
+    val_str_or_raise = BaseModel.val_str_or_raise
+    save = BaseModel.save
+    to_dict = BaseModel.to_dict
+
+
+def declared_fields(cls):
+    """returns the names of the data attributes declared by cls and its
+    bases up to BaseModel"""
+    fields = []
+    for klass in cls.__mro__:
+        if klass is BaseModel or not issubclass(klass, BaseModel):
+            break
+        for name, value in vars(klass).items():
+            if (name.startswith("_") or name == "foreign_keys"
+                    or callable(value) or hasattr(value, "__get__")
+                    or name in fields):
+                continue
+            fields.append(name)
+    return fields
+
+
+def compact_class(cls):
+    """returns the compact variant of the model class cls, made on the
+    first call"""
+    compact = _compact_classes.get(cls)
+    if compact is not None:
+        return compact
+    fields = declared_fields(cls)
+    packed = {"id": (pack_uuid, unpack_uuid),
+              "created_at": (pack_time, unpack_time),
+              "updated_at": (pack_time, unpack_time)}
+    for name in cls.foreign_keys:
+        packed[name] = (pack_uuid, unpack_uuid)
+    slots = tuple(f"_{name}" for name in packed) + tuple(
+        name for name in fields if name not in packed)
+    compact = type(cls.__name__, (CompactModel,), {
+        "__slots__": slots,
+        "__module__": __name__,
+        "__doc__": f"Compact variant of {cls.__name__}",
+        "_model": cls,
+        "_fields": frozenset(fields) | frozenset(packed),
+    })
+    for name, (pack, unpack) in packed.items():
+        slot = getattr(compact, f"_{name}")
+        setattr(compact, name, Packed(name, slot, pack, unpack))
+    _compact_classes[cls] = compact
+    return compact
@@ -0,0 +1,176 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Includes the class AsyncStorage, a facade of a storage engine for asyncio
+programs, e.g a web server:
+    astorage = AsyncStorage(storage)
+    user = await astorage.get(User, user_id)
+    user.first_name = "Betty"
+    await astorage.save()
+    places = await astorage.query(Place).where(city_id=city_id).all()
+Reading and writing the file, and making or serializing the instances, run
+in worker threads so the event loop keeps serving other tasks.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from .concurrency import NullLock, RWLock
+from .lazy_object import resolve
+
+
+class AsyncStorage:
+    """Awaitable all(), get(), query(), save() and reload() of an engine
+    The engine's objects are still read and changed from the loop, e.g
+    with setattr, but saved with `await astorage.save()` rather than
+    obj.save() which writes the file from the loop. The saves asked for
+    while one is being written are gathered into the next write.
+    An engine without a lock is given a readers/writer lock, so the worker
+    threads and the loop can share it.
+    Parameters:
+    - storage: the engine
+    - executor: concurrent.futures executor the work runs in, a thread
+    pool of the facade's own by default
+    Attributes:
+    - writes: number of saves written
+    """
+
+    def __init__(self, storage, executor=None):
+        """Initialize the facade"""
+        self.storage = storage
+        if isinstance(storage.lock, NullLock):
+            storage.lock = RWLock()
+        self.__own_executor = executor is None
+        if executor is None:
+            executor = ThreadPoolExecutor(thread_name_prefix="storage")
+        self.executor = executor
+        self.writes = 0
+        self.__next = None
+        self.__flushing = None
+
+    async def run(self, func, *args, **kwargs):
+        """returns func(*args, **kwargs), called in the executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, partial(func, *args, **kwargs))
+
+    async def all(self, cls=None):
+        """returns a copy of storage.all(cls), see FileStorage.all"""
+        def copy():
+            """copies the objects before a writer can change them"""
+            with self.storage.lock.reading():
+                return dict(self.storage.all(cls))
+        return await self.run(copy)
+
+    async def get(self, cls, id):
+        """returns the instance of class cls with id, None if there is none
+        Parameters:
+        - cls: class or class name of the object
+        - id: id of the object
+        """
+        return await self.run(lambda: resolve(self.storage.get(cls, id)))
+
+    def query(self, cls):
+        """returns an AsyncQuery of the objects of cls, see
+        FileStorage.query"""
+        return AsyncQuery(self, self.storage.query(cls))
+
+    async def save(self):
+        """writes the objects, once the saves asked for before are written
+        Awaits made while a save is written share the next one.
+        Raises:
+        - the exception of the write the await waited for
+        """
+        future = self.__next
+        if future is None:
+            future = self.__next = asyncio.get_running_loop().create_future()
+            if self.__flushing is None:
+                self.__flushing = asyncio.ensure_future(self.flush())
+        # an await cancelled doesn't cancel the write of the others
+        await asyncio.shield(future)
+
+    async def flush(self):
+        """writes the objects until no save is asked for, see save()"""
+        try:
+            while self.__next is not None:
+                future, self.__next = self.__next, None
+                try:
+                    await self.run(self.write)
+                except Exception as e:
+                    future.set_exception(e)
+                    # retrieved by the awaits, if they weren't cancelled
+                    future.exception()
+                else:
+                    future.set_result(None)
+        finally:
+            self.__flushing = None
+
+    def write(self):
+        """saves the engine, waiting for the background save in thread
+        safe mode"""
+        self.storage.save()
+        self.storage.wait_saved()
+        self.writes += 1
+
+    async def reload(self):
+        """reads the objects from the file, see FileStorage.reload"""
+        await self.run(self.storage.reload)
+
+    async def close(self):
+        """waits for the saves asked for, then stops the facade's threads"""
+        flushing = self.__flushing
+        if flushing is not None:
+            await flushing
+        if self.__own_executor:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.executor.shutdown)
+
+
+class AsyncQuery:
+    """Query of an AsyncStorage, whose objects are read by the awaitable
+    all(), first() and count(), see models.engine.query.Query
+    Parameters:
+    - facade: the AsyncStorage
+    - query: the Query of the engine
+    """
+
+    def __init__(self, facade, query):
+        """Initialize the query"""
+        self.facade = facade
+        self.query = query
+
+    def where(self, *args, **kwargs):
+        """see Query.where"""
+        return AsyncQuery(self.facade, self.query.where(*args, **kwargs))
+
+    def order_by(self, *fields):
+        """see Query.order_by"""
+        return AsyncQuery(self.facade, self.query.order_by(*fields))
+
+    def limit(self, count):
+        """see Query.limit"""
+        return AsyncQuery(self.facade, self.query.limit(count))
+
+    def offset(self, count):
+        """see Query.offset"""
+        return AsyncQuery(self.facade, self.query.offset(count))
+
+    def only(self, *fields):
+        """see Query.only"""
+        return AsyncQuery(self.facade, self.query.only(*fields))
+
+    async def all(self):
+        """returns the list of the instances, or of the dictionaries of
+        only()"""
+        query = self.query
+        if query.fields is not None:
+            return await self.facade.run(query.all)
+        return await self.facade.run(lambda: [resolve(o) for o in query])
+
+    async def first(self):
+        """returns the first instance, None if there is none"""
+        return await self.facade.run(lambda: resolve(self.query.first()))
+
+    async def count(self):
+        """returns the number of objects, ignoring limit() and offset()"""
+        return await self.facade.run(self.query.count)
@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Reading and writing the objects of a class as rows of a file, used by the
+import and export commands of the console. The format is picked by the
+extension of the file:
+- .csv: a header line of attribute names, then one object per line. Values
+that aren't strings are written as JSON, and read back as JSON for the
+attributes the class declares with a non string default (e.g max_guest)
+- anything else: NDJSON, one to_dict() JSON object per line
+"""
+
+import csv
+import json
+from datetime import datetime
+from uuid import uuid4
+
+
+def row_format(path):
+    """returns csv or ndjson, the format of the file at path"""
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def read_rows(path):
+    """yields the (line number, row) pairs of the file at path, one row at
+    a time. A row is the dictionary of the attributes of an object, None if
+    its line can't be parsed. Empty lines are skipped.
+    Raises:
+    - OSError: the file can't be read
+    - UnicodeDecodeError: the file isn't UTF-8 text
+    - csv.Error: the CSV file is malformed, e.g a line has a NUL byte
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if row_format(path) == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                if None in row or None in row.values():
+                    # more or less cells than names in the header
+                    yield reader.line_num, None
+                    continue
+                yield reader.line_num, {k: v for (k, v) in row.items()
+                                        if v != ""}
+            return
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield number, row if isinstance(row, dict) else None
+
+
+def make_record(cls, row, typed=False):
+    """returns the to_dict() form of an instance of cls made from row
+    The id and the dates of a new instance are used when row has none.
+    Parameters:
+    - cls: model class of the object
+    - row: attributes of the object
+    - typed: False if the values of row are all strings, as read from a
+    CSV file
+    Raises:
+    - ValueError: row isn't an object of cls
+    """
+    class_name = row.get("__class__", cls.__name__)
+    if class_name != cls.__name__:
+        raise ValueError(f"{class_name} object in a {cls.__name__} file")
+    now = datetime.now().isoformat()
+    record = {"id": str(uuid4()), "created_at": now, "updated_at": now}
+    for name, value in row.items():
+        default = getattr(cls, name, "")
+        if not typed and type(default) in (int, float, list, dict):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                raise ValueError(f"{name} isn't a {type(default).__name__}")
+        record[name] = value
+    if not isinstance(record["id"], str) or not record["id"]:
+        raise ValueError("id must be a string")
+    for name in ("created_at", "updated_at"):
+        if not isinstance(record[name], str):
+            raise ValueError(f"{name} must be a string")
+        datetime.fromisoformat(record[name])
+    record["__class__"] = cls.__name__
+    return record
+
+
+def write_rows(path, records):
+    """writes the to_dict() forms records to the file at path
+    Parameters:
+    - records: list of the dictionaries, CSV files taking their columns
+    from every one of them
+    Raises:
+    - OSError: the file can't be written
+    """
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if row_format(path) != "csv":
+            for record in records:
+                f.write(json.dumps(record))
+                f.write("\n")
+            return
+        names = {}
+        for record in records:
+            names.update(dict.fromkeys(record))
+        writer = csv.DictWriter(f, list(names))
+        writer.writeheader()
+        for record in records:
+            writer.writerow({
+                k: v if isinstance(v, str) else json.dumps(v)
+                for (k, v) in record.items()})
@@ -0,0 +1,176 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Locks and threads of the thread safe mode of the engines, see
+FileStorage.threadsafe:
+- RWLock: many readers or one writer
+- NullLock: what the engines use when they aren't thread safe
+- Flusher: thread coalescing the save() requests into periodic saves
+"""
+
+import sys
+import threading
+import time
+import traceback
+from contextlib import contextmanager, nullcontext
+
+_NULL_CONTEXT = nullcontext()
+
+
+class NullLock:
+    """Lock that never blocks, for a single thread"""
+
+    def reading(self):
+        """returns a context doing nothing"""
+        return _NULL_CONTEXT
+
+    def writing(self):
+        """returns a context doing nothing"""
+        return _NULL_CONTEXT
+
+
+class RWLock:
+    """Readers/writer lock
+    Any number of threads can read at a time, a writer has the lock alone.
+    Waiting writers go before new readers so they aren't starved. Both
+    sides are reentrant and the writer can also read. A reader asking to
+    write waits for the other readers; two readers doing it at the same time
+    deadlock, so keep read sections short.
+    """
+
+    def __init__(self):
+        """Initialize an unlocked lock"""
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = {}
+        self._writer = None
+        self._writes = 0
+        self._waiting = 0
+
+    @contextmanager
+    def reading(self):
+        """holds the lock for reading in the block"""
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me and me not in self._readers:
+                while self._writer is not None or self._waiting:
+                    self._cond.wait()
+            self._readers[me] = self._readers.get(me, 0) + 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                count = self._readers.pop(me) - 1
+                if count:
+                    self._readers[me] = count
+                else:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def writing(self):
+        """holds the lock alone in the block"""
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me:
+                self._waiting += 1
+                try:
+                    while (self._writer is not None
+                           or any(t != me for t in self._readers)):
+                        self._cond.wait()
+                finally:
+                    self._waiting -= 1
+                self._writer = me
+            self._writes += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writes -= 1
+                if not self._writes:
+                    self._writer = None
+                    self._cond.notify_all()
+
+
+class Flusher:
+    """Thread calling storage.save() at most once every interval
+    milliseconds, when save() was asked for since its last call
+    Parameters:
+    - storage: the engine, its save() is called from the thread
+    - interval: milliseconds the requests are gathered for
+    Attributes:
+    - error: exception raised by the last failed save, None if there is
+    none
+    """
+
+    def __init__(self, storage, interval):
+        """Initialize and start the thread"""
+        self.storage = storage
+        self.interval = interval
+        self.error = None
+        self._cond = threading.Condition()
+        self._requested = 0
+        self._saved = 0
+        self._hurry = False
+        self._stopped = False
+        self.thread = threading.Thread(
+            target=self.run, name="storage-flusher", daemon=True)
+        self.thread.start()
+
+    def is_current(self):
+        """returns True when called from the thread"""
+        return threading.current_thread() is self.thread
+
+    def request(self):
+        """asks for a save, without waiting for it"""
+        with self._cond:
+            self._requested += 1
+            self._cond.notify_all()
+
+    def run(self):
+        """saves when asked to, until stop()"""
+        cond = self._cond
+        while True:
+            with cond:
+                while self._saved == self._requested and not self._stopped:
+                    cond.wait()
+                if self._saved == self._requested:
+                    return
+                # gather the requests made in the next interval
+                deadline = time.monotonic() + self.interval / 1000
+                while not self._hurry and not self._stopped:
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        break
+                    cond.wait(left)
+                self._hurry = False
+                target = self._requested
+            try:
+                self.storage.save()
+            except Exception as e:
+                self.error = e
+                traceback.print_exc(file=sys.stderr)
+            with cond:
+                self._saved = target
+                cond.notify_all()
+
+    def wait(self):
+        """blocks until every save asked for so far is done
+        Raises:
+        - the exception of the last failed save, once
+        """
+        with self._cond:
+            target = self._requested
+            if self._saved < target:
+                self._hurry = True
+                self._cond.notify_all()
+            while self._saved < target and self.thread.is_alive():
+                self._cond.wait()
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def stop(self):
+        """saves what was asked for then stops the thread"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self.thread.join()
@@ -5,18 +5,117 @@ Includes the class FileStorage which
 serializes instances to a JSON file and deserializes JSON file to instances.
 """
 
+import atexit
+import copy
 import json
-from typing import Dict
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterable, Tuple, Union
+from .concurrency import Flusher, NullLock, RWLock
+from .json_stream import iter_items
+from .lazy_object import LazyObject, resolve
+from .object_map import ObjectMap
+from .parallel import decode_object
+from .query import Query
+from .render_cache import RenderCache
+from .serializers import codec_for_path, get_codec
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 # types
 Type_ObjDict = Dict[str, Dict[str, str]]
+Type_Records = Union[Type_ObjDict, Iterable[Tuple[str, Dict[str, str]]]]
+
+# values an object can change in place, without setattr
+MUTABLE = frozenset((list, dict))
+
+
+@lru_cache(maxsize=None)
+def model_classes():
+    """returns exports.valid_classes, imported on the first call as the
+    models import this module"""
+    from exports import valid_classes
+    return valid_classes
+
+
+def detach(record):
+    """returns record, or a deep copy of it when it holds lists or dicts,
+    so that the cached record shares nothing with the instance"""
+    if MUTABLE.isdisjoint(map(type, record.values())):
+        return record
+    return copy.deepcopy(record)
 
 
 class FileStorage:
-    """Defines common attributes for serialization and deserialization"""
+    """Defines common attributes for serialization and deserialization
+    Attributes:
+    - streaming: reload() parses the file one object at a time instead of
+    reading it whole, so the raw JSON text is never held in memory
+    - lazy: reload() fills __objects with LazyObject proxies, the instances
+    are only made when first used
+    - fsync: when written files are flushed to disk, one of
+        - always: on every write
+        - interval: at most once every fsync_interval milliseconds, the
+        files written in between are flushed when the interval ends
+        - never: left to the operating system
+    - fsync_interval: milliseconds between two flushes in interval mode
+    - codec: name of the codec of the file (see models.engine.serializers),
+    picked by the extension of the file when None
+    - compact_instances: instances are made from the compact variant of
+    their class, see models.compact
+    - columnar: reload() keeps the objects of each class in the columns of
+    a table, see models.columns and table()
+    - render_cache: cache of the str() and to_dict() forms of the objects,
+    see rendered(). Its size is 0, turning it off, unless set.
+    - lock: readers/writer lock of the objects, see threadsafe
+    - flush_interval: milliseconds the background saves of the thread safe
+    mode gather the save() requests for
+    - shareable: the engine supports the shared mode, see shared
+    - threadable: the engine supports the thread safe mode, see threadsafe
+    - workers: number of processes decoding a JSON file on reload, see
+    models.engine.parallel. 0 or 1 decodes it in this process.
+    """
 
+    streaming = False
+    lazy = False
+    fsync = "never"
+    fsync_interval = 1000
+    codec = None
+    compact_instances = False
+    columnar = False
+    flush_interval = 100
+    shareable = True
+    threadable = True
+    workers = 0
     __file_path = "file.json"
-    __objects = {}
+    __objects = ObjectMap()
+
+    def __init__(self):
+        """Initialize the cache of serialized objects"""
+        self.__serialized: Type_ObjDict = {}
+        # keys of the cached records holding lists or dicts
+        self.__mutable = set()
+        self.__synced_at = None
+        self.__sync_mutex = threading.Lock()
+        self.__sync_paths = set()
+        self.__sync_timer = None
+        self.__batch_depth = 0
+        self.__save_pending = False
+        self.__batch_states = {}
+        self.__batch_cache = None
+        self.render_cache = RenderCache()
+        self.lock = NullLock()
+        self.__flusher = None
+        self.__stamp = None
+        self.__shared = False
+        self.__fragments = {}
+        self.__fragments_codec = None
 
     def __del__(self):
         """delete helper, useful for testing"""
@@ -34,9 +133,111 @@ class FileStorage:
             return
         self.__file_path = value
 
-    def all(self):
-        """returns the cls.__objects"""
-        return self.__objects
+    @property
+    def shared(self):
+        """True when several processes use the file, False by default, see
+        refresh(). Saves and reloads then hold an advisory lock on
+        <file>.lock, and a save first reads what other processes saved
+        since this one last read the file.
+        Only FileStorage itself supports it, see shareable.
+        """
+        return self.__shared
+
+    @shared.setter
+    def shared(self, value):
+        """starts or stops the shared mode
+        Raises:
+        - ValueError: the engine doesn't support it
+        """
+        if value and not self.shareable:
+            raise ValueError(
+                f"{type(self).__name__} can't share its file")
+        self.__shared = bool(value)
+
+    @property
+    def threadsafe(self):
+        """True when the engine can be shared by threads, False by default
+        Once set to True:
+        - the objects are read and changed under a readers/writer lock
+        - all() returns a copy of the objects, that other threads can't
+        change during an iteration
+        - a batch holds the lock alone until it ends
+        - save() returns at once, a background thread saves at most once
+        every flush_interval milliseconds, see wait_saved()
+        The file based engines support it, not SQLiteStorage.
+        """
+        return self.__flusher is not None
+
+    @threadsafe.setter
+    def threadsafe(self, value):
+        """starts or stops the thread safe mode, with no other thread using
+        the engine
+        Raises:
+        - ValueError: the engine doesn't support it
+        """
+        if bool(value) == self.threadsafe:
+            return
+        if value and not self.threadable:
+            raise ValueError(
+                f"{type(self).__name__} can't be shared by threads")
+        if value:
+            self.lock = RWLock()
+            self.__flusher = Flusher(self, self.flush_interval)
+            # saves what is left when the program ends
+            atexit.register(self.__flusher.stop)
+            return
+        flusher, self.__flusher = self.__flusher, None
+        atexit.unregister(flusher.stop)
+        flusher.stop()
+        self.lock = NullLock()
+
+    def wait_saved(self):
+        """blocks until the saves asked for so far are written, in thread
+        safe mode
+        Raises:
+        - the exception of the last failed save, once
+        """
+        if self.__flusher is not None:
+            self.__flusher.wait()
+
+    def all(self, cls=None):
+        """returns the cls.__objects
+        Parameters:
+        - cls: only return the objects of this class or class name
+        """
+        with self.lock.reading():
+            if cls is None:
+                if self.__flusher is not None:
+                    return dict(self.__objects)
+                return self.__objects
+            class_name = cls if isinstance(cls, str) else cls.__name__
+            if isinstance(self.__objects, ObjectMap):
+                return self.__objects.of_class(class_name)
+            return {k: v for (k, v) in self.__objects.items()
+                    if k.partition(".")[0] == class_name}
+
+    def get(self, cls, id):
+        """returns the object of class cls with id, None if there is none
+        Parameters:
+        - cls: class or class name of the object
+        - id: id of the object
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        with self.lock.reading():
+            return self.__objects.get(f"{class_name}.{id}")
+
+    def count(self, cls=None):
+        """returns the number of objects
+        Parameters:
+        - cls: only count the objects of this class or class name
+        """
+        with self.lock.reading():
+            if cls is None:
+                return len(self.__objects)
+            class_name = cls if isinstance(cls, str) else cls.__name__
+            if isinstance(self.__objects, ObjectMap):
+                return self.__objects.count(class_name)
+            return len(self.all(class_name))
 
     def new(self, obj):
         """sets the obj in cls.__objects"""
@@ -45,51 +246,692 @@ class FileStorage:
         if not self.validate_instance(obj):
             raise TypeError("Argument isnt a subclass of BaseModel")
         # safe instance
-        obj_data = obj.to_dict()
-        attr_name = f"{obj_data['__class__']}.{obj_data['id']}"
-        self.__objects[attr_name] = obj
+        key = f"{obj.__class__.__name__}.{obj.id}"
+        with self.lock.writing():
+            self.__objects[key] = obj
+
+    def new_many(self, objs):
+        """sets every object of objs in cls.__objects, none of them if one
+        isn't valid, see new()"""
+        objs = list(objs)
+        for obj in objs:
+            if not obj:
+                raise ValueError("Bad instance argument")
+            if not self.validate_instance(obj):
+                raise TypeError("Argument isnt a subclass of BaseModel")
+        items = [(f"{obj.__class__.__name__}.{obj.id}", obj) for obj in objs]
+        with self.lock.writing():
+            self.__objects.update(items)
+
+    def query(self, cls):
+        """returns a Query of the objects of cls, see
+        models.engine.query
+        Parameters:
+        - cls: class or class name of the objects
+        """
+        if isinstance(cls, str):
+            from exports import valid_classes
+            cls = valid_classes[cls]
+        return Query(self, cls)
+
+    def table(self, cls):
+        """returns the models.columns.Table of the objects of cls
+        In columnar mode the objects live in the table, otherwise a table is
+        made from them on each call.
+        Parameters:
+        - cls: class or class name of the objects
+        """
+        from models.columns import Table
+        if isinstance(cls, str):
+            from exports import valid_classes
+            cls = valid_classes[cls]
+        with self.lock.reading():
+            tables = getattr(self.__objects, "tables", None)
+            if tables is not None and cls.__name__ in tables:
+                return tables[cls.__name__]
+        table = Table(cls)
+        for key, obj in self.all(cls).items():
+            table.put(key.partition(".")[2], resolve(obj))
+        return table
+
+    def by_ref(self, cls, field, value):
+        """returns the objects of cls whose attribute field is value
+        Declared foreign keys (cls.foreign_keys) are looked up in the index,
+        other attributes are scanned for.
+        Parameters:
+        - cls: class or class name of the objects
+        - field: name of the attribute, e.g place_id
+        - value: id the attribute must be equal to
+        """
+        if isinstance(cls, str):
+            from exports import valid_classes
+            cls = valid_classes.get(cls)
+            if not cls:
+                return {}
+        with self.lock.reading():
+            objs = self.__objects
+            if (isinstance(objs, ObjectMap)
+                    and field in getattr(cls, "foreign_keys", ())):
+                return objs.by_ref(cls.__name__, field, value)
+        return {k: v for (k, v) in self.all(cls).items()
+                if getattr(v, field, None) == value}
+
+    def delete(self, obj=None):
+        """deletes obj from __objects if it's inside"""
+        if obj is None:
+            return
+        obj = resolve(obj)
+        attr_name = f"{obj.__class__.__name__}.{obj.id}"
+        with self.lock.writing():
+            if self.__objects.get(attr_name) is obj:
+                del self.__objects[attr_name]
+
+    def touch(self, obj, name=None):
+        """marks obj as changed since the last save
+        Parameters:
+        - name: the attribute set or deleted, None if any may have changed
+        """
+        obj = resolve(obj)
+        attr_name = f"{obj.__class__.__name__}.{getattr(obj, 'id', None)}"
+        if self.render_cache.size:
+            self.render_cache.invalidate(attr_name)
+        with self.lock.writing():
+            if not isinstance(self.__objects, ObjectMap):
+                return
+            if self.__objects.get(attr_name) is obj:
+                self.__objects.mark(attr_name, name)
+
+    def rendered(self, obj, kind, render):
+        """returns render(obj), from render_cache when obj is one of the
+        objects of storage and hasn't changed since it was rendered
+        Parameters:
+        - obj: the object
+        - kind: name of the form, e.g str
+        - render: function making the form of an object
+        """
+        cache = self.render_cache
+        if not cache.size:
+            return render(obj)
+        key = f"{obj.__class__.__name__}.{getattr(obj, 'id', None)}"
+        if self.__objects.get(key) is not obj:
+            return render(obj)
+        return cache.get(key, obj, kind, render)
+
+    def render_stats(self):
+        """returns the hits, misses, objects kept and size of render_cache,
+        see RenderCache.stats"""
+        return self.render_cache.stats()
 
     def save(self):
         """serializes __objects to the JSON file"""
-        # checks
-        # validate all instances?
-        new_objects = {
-            k: v.to_dict() for (k, v) in self.__objects.items()}
-        # open file, truncate if exist
-        with open(self.__file_path, mode="w") as f:
-            f.write(self.to_json_string(new_objects))
+        if self.deferred():
+            return
+        with self.file_lock(exclusive=True):
+            if self.shared and self.is_stale():
+                # saved by another process, keep its changes
+                self.merge_records(self.load_records())
+            self.write_objects()
+            self.__stamp = self.file_stamp()
+
+    def write_objects(self):
+        """serializes __objects to the file, see save()"""
+        with self.lock.writing():
+            self.collect_changes()
+            new_objects = self.__serialized
+            if len(new_objects) != len(self.__objects):
+                # objects added behind our back, serialize what is missing
+                for k, v in self.__objects.items():
+                    if k not in new_objects:
+                        self.cache_record(k, v.to_dict())
+                new_objects = self.__serialized = {
+                    k: new_objects[k] for k in self.__objects}
+            if isinstance(self.lock, RWLock):
+                # encoded and written once the lock is released
+                new_objects = dict(new_objects)
+        self.write_file(self.__file_path, self.encode_objects(new_objects))
+
+    def encode_objects(self, objs: Type_ObjDict) -> bytes:
+        """returns the bytes of the file of the serialized objects objs
+        Text codecs keep the JSON text of each entry with the dictionary it
+        was encoded from, so only the entries whose dictionary changed are
+        encoded again and the file is their concatenation.
+        """
+        codec = self.file_codec()
+        if not codec.text:
+            return codec.encode(objs)
+        fragments = self.__fragments
+        if self.__fragments_codec != codec.name:
+            fragments.clear()
+            self.__fragments_codec = codec.name
+        entries = []
+        for key, record in objs.items():
+            fragment = fragments.get(key)
+            if fragment is None or fragment[0] is not record:
+                # changed dictionaries are replaced, never updated
+                fragment = fragments[key] = (
+                    record, codec.encode_entry(key, record))
+            entries.append(fragment[1])
+        if len(fragments) > len(entries):
+            # drops the entries of the deleted objects
+            self.__fragments = {k: fragments[k] for k in objs}
+        return codec.encode_entries(entries)
+
+    @contextmanager
+    def batch(self):
+        """defers every save() made in the block to one save at its end
+        If the block raises, the objects created, changed or deleted in it
+        are put back as they were and nothing is saved. Nested blocks join
+        the outermost one. In thread safe mode the block holds the lock
+        alone.
+        """
+        with self.lock.writing():
+            self.__batch_depth += 1
+            if self.__batch_depth > 1:
+                try:
+                    yield self
+                finally:
+                    self.__batch_depth -= 1
+                return
+            self.begin_batch()
+            try:
+                yield self
+            except BaseException:
+                self.rollback_batch()
+                raise
+            finally:
+                self.__batch_depth = 0
+            self.commit_batch()
+
+    transaction = batch
+
+    def deferred(self):
+        """returns True, and remembers to save later, inside a batch or
+        when the background thread of the thread safe mode saves"""
+        if self.__batch_depth:
+            self.__save_pending = True
+            return True
+        flusher = self.__flusher
+        if flusher is not None and not flusher.is_current():
+            flusher.request()
+            return True
+        return False
+
+    def begin_batch(self):
+        """keeps what is needed to roll the objects back"""
+        objs = self.__objects
+        self.__save_pending = False
+        self.__batch_cache = {}
+        if not isinstance(objs, ObjectMap):
+            return
+        # changes not saved yet can't be rolled back from the cache
+        self.__batch_states = {
+            k: copy.deepcopy(dict(vars(resolve(objs[k]))))
+            for k in objs.dirty.union(self.changed_in_place())}
+        objs.begin()
+
+    def commit_batch(self):
+        """keeps the changes of the batch and saves them if asked to"""
+        if isinstance(self.__objects, ObjectMap):
+            self.__objects.commit()
+        self.__batch_states = {}
+        self.__batch_cache = None
+        pending, self.__save_pending = self.__save_pending, False
+        if pending:
+            self.save()
+
+    def rollback_batch(self):
+        """puts the objects back as they were when the batch started"""
+        self.__save_pending = False
+        # serialized forms cached by engines that write inside a batch
+        for key, data in self.__batch_cache.items():
+            if data is None:
+                self.__serialized.pop(key, None)
+                self.__mutable.discard(key)
+            else:
+                self.cache_record(key, data)
+        if isinstance(self.__objects, ObjectMap):
+            self.__objects.rollback(self.restore)
+        # the objects put back weren't changed through their attributes
+        self.render_cache.clear()
+        self.__batch_states = {}
+        self.__batch_cache = None
+
+    def restore(self, key, obj):
+        """resets the attributes of obj to their state at the last save, or
+        at the start of the batch if it was already changed"""
+        if type(obj) is LazyObject and not obj.is_loaded:
+            return
+        obj = resolve(obj)
+        state = self.__batch_states.get(key)
+        if state is None:
+            record = self.__serialized.get(key)
+            if record is None:
+                return
+            state = vars(self.make_inst(detach(record)))
+        if type(obj).__dictoffset__:
+            vars(obj).clear()
+            vars(obj).update(state)
+            return
+        # compact instances and row views have no __dict__ to fill
+        for name in vars(obj):
+            delattr(obj, name)
+        for name, value in state.items():
+            setattr(obj, name, value)
+
+    def file_codec(self):
+        """returns the codec of the file"""
+        if self.codec:
+            return get_codec(self.codec)
+        return codec_for_path(self.__file_path)
+
+    def write_file(self, path, data):
+        """replaces the content of path with data, a string or bytes
+        The data goes to a temporary file renamed over path, so readers and
+        crashes see either the old or the new content, never a truncated
+        file.
+        """
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        mode = "wb" if isinstance(data, bytes) else "w"
+        try:
+            with open(tmp_path, mode=mode) as f:
+                f.write(data)
+                synced = self.sync(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.isfile(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if synced:
+            self.sync_dir(path)
+        elif self.fsync == "interval":
+            self.defer_sync(path)
+
+    def sync(self, f):
+        """flushes the open file f to disk if the fsync policy says so
+        Returns:
+        - True: f was flushed
+        - False: f was left to the operating system
+        """
+        if self.fsync == "never":
+            return False
+        if self.fsync == "interval":
+            now = time.monotonic()
+            if (self.__synced_at is not None and
+                    (now - self.__synced_at) * 1000 < self.fsync_interval):
+                return False
+            self.__synced_at = now
+        elif self.fsync != "always":
+            raise ValueError(f"Unknown fsync policy: {self.fsync}")
+        f.flush()
+        os.fsync(f.fileno())
+        return True
+
+    def defer_sync(self, path):
+        """flushes path to disk when the current fsync interval ends, for a
+        file written but not flushed in interval mode"""
+        with self.__sync_mutex:
+            self.__sync_paths.add(path)
+            if self.__sync_timer is not None:
+                return
+            elapsed = time.monotonic() - (self.__synced_at or 0)
+            delay = max(self.fsync_interval / 1000 - elapsed, 0)
+            self.__sync_timer = threading.Timer(delay, self.sync_deferred)
+            self.__sync_timer.daemon = True
+            self.__sync_timer.start()
+            # or right away if the program ends first
+            atexit.register(self.sync_deferred)
+
+    def sync_deferred(self):
+        """flushes the files passed to defer_sync() to disk"""
+        with self.__sync_mutex:
+            paths, self.__sync_paths = self.__sync_paths, set()
+            if self.__sync_timer is not None:
+                self.__sync_timer.cancel()
+                self.__sync_timer = None
+                atexit.unregister(self.sync_deferred)
+            self.__synced_at = time.monotonic()
+        for path in sorted(paths):
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                # removed since, e.g a compacted journal
+                continue
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self.sync_dir(path)
+
+    @staticmethod
+    def sync_dir(path):
+        """flushes the directory entry of path to disk"""
+        try:
+            fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        except OSError:
+            # directories can't be opened on every platform
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def collect_changes(self):
+        """serializes the objects changed since the last call
+        Only dirty objects are serialized, the others keep the form cached
+        by the previous call or by reload(). The objects whose lists or
+        dicts were changed in place count as dirty.
+        Returns:
+        - changed: dictionary of the new serialized objects
+        - removed: list of keys deleted since the last call
+        """
+        with self.lock.writing():
+            return self._collect_changes()
+
+    def _collect_changes(self):
+        """collect_changes() without the lock"""
+        objs = self.__objects
+        cache = self.__serialized
+        if isinstance(objs, ObjectMap):
+            dirty, deleted = objs.take_changes()
+            # lists and dicts changed in place don't mark their object
+            in_place = self.changed_in_place()
+            for key in in_place:
+                self.render_cache.invalidate(key)
+            dirty = dirty.union(in_place)
+        else:
+            dirty, deleted = objs.keys(), cache.keys() - objs.keys()
+        undo = self.__batch_cache
+        changed = {}
+        for key in dirty:
+            data = objs[key].to_dict()
+            if cache.get(key) != data:
+                if undo is not None:
+                    undo.setdefault(key, cache.get(key))
+                changed[key] = self.cache_record(key, data)
+        removed = [key for key in deleted if key in cache]
+        for key in removed:
+            if undo is not None:
+                undo.setdefault(key, cache[key])
+            del cache[key]
+            self.__mutable.discard(key)
+        return changed, removed
+
+    def cache_record(self, key, record: Dict[str, str]):
+        """keeps record as the serialized form of key, a copy of it if it
+        holds lists or dicts, and returns what is kept"""
+        kept = detach(record)
+        self.__serialized[key] = kept
+        if kept is record:
+            self.__mutable.discard(key)
+        else:
+            self.__mutable.add(key)
+        return kept
+
+    def changed_in_place(self):
+        """returns the keys of the objects whose lists or dicts differ from
+        their cached record, e.g after `place.amenity_ids.append(id)`"""
+        objs, cache = self.__objects, self.__serialized
+        changed = []
+        for key in self.__mutable:
+            obj, record = objs.get(key), cache.get(key)
+            if obj is None or record is None:
+                continue
+            for name, value in record.items():
+                if type(value) not in MUTABLE:
+                    continue
+                if type(obj) is LazyObject:
+                    current = obj.peek(name)
+                else:
+                    current = getattr(obj, name, None)
+                if current != value:
+                    changed.append(key)
+                    break
+        return changed
+
+    def snapshot(self) -> Type_ObjDict:
+        """returns the serialized objects as of the last save"""
+        with self.lock.reading():
+            return dict(self.__serialized)
 
     def reload(self):
         """deserializes the JSON file to __objects"""
         # checks
         if not self.__file_path:
             return
-        # read file
+        with self.file_lock():
+            self.__stamp = self.file_stamp()
+            if self.streaming and self.file_codec().text:
+                self.load_objects(self.stream_records())
+            else:
+                self.load_objects(self.load_records())
+
+    @contextmanager
+    def file_lock(self, exclusive=False):
+        """holds the advisory lock of the file in shared mode, where fcntl
+        is available
+        Parameters:
+        - exclusive: lock for writing, shared for reading otherwise
+        """
+        if not self.shared or fcntl is None:
+            yield
+            return
+        with open(f"{self.__file_path}.lock", mode="a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def file_stamp(self):
+        """returns the inode, modification time and size of the file, None
+        if there is no file. Saving replaces the file, changing its stamp.
+        """
+        try:
+            st = os.stat(self.__file_path)
+        except (FileNotFoundError, ValueError):
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def is_stale(self):
+        """returns True if the file changed since this engine last read or
+        wrote it"""
+        return self.file_stamp() != self.__stamp
+
+    def refresh(self):
+        """reads what other processes saved since the file was last read
+        or written, in shared mode and outside of a batch. Only the objects
+        that changed on disk are remade, and the changes not saved yet are
+        kept.
+        Returns:
+        - True if the file was read
+        """
+        if not self.shared or self.__batch_depth or not self.is_stale():
+            return False
+        with self.file_lock():
+            stamp = self.file_stamp()
+            self.merge_records(self.load_records())
+            self.__stamp = stamp
+        return True
+
+    def merge_records(self, records: Type_ObjDict):
+        """applies the raw dictionaries of a newer file to __objects
+        Objects changed or deleted since the last save keep their state,
+        the others take the one of records, in place.
+        """
+        with self.lock.writing():
+            objs = self.__objects
+            if not isinstance(objs, ObjectMap):
+                return
+            cache = self.__serialized
+            keep = objs.dirty | objs.deleted
+            for key, record in records.items():
+                if key in keep or cache.get(key) == record:
+                    continue
+                self.cache_record(key, record)
+                obj = objs.get(key)
+                if obj is None or (type(obj) is LazyObject
+                                   and not obj.is_loaded):
+                    self.load_object(key, record)
+                    continue
+                self.restore(key, obj)
+                objs.load(key, obj)
+                objs.dirty.discard(key)
+                self.render_cache.invalidate(key)
+            for key in [k for k in cache if k not in records]:
+                if key not in keep:
+                    del cache[key]
+                    self.__mutable.discard(key)
+                    objs.unload(key)
+                    self.render_cache.invalidate(key)
+
+    def load_records(self) -> Type_ObjDict:
+        """reads the file and returns the raw dictionaries,
+        keyed by <class name>.<id>"""
+        codec = self.file_codec()
+        if self.streaming and codec.text:
+            return dict(self.stream_records())
         try:
-            with open(self.__file_path, mode="r") as f:
-                json_str = f.read()
-                obj: Type_ObjDict = self.from_json_string(json_str)
-                if not isinstance(obj, object):
-                    raise TypeError("File JSON must be an object")
-                self.__objects = {
-                    k: self.make_inst(v) for (k, v) in obj.items()}
+            with open(self.__file_path, mode="rb") as f:
+                data = f.read()
         except FileNotFoundError as e:
             # raise or return hmm?
-            self.__objects = {}
+            return {}
+        if not data:
+            raise TypeError("Valid string only")
+        try:
+            if self.workers > 1 and codec.text:
+                obj: Type_ObjDict = decode_object(
+                    codec.json_text(data), self.workers)
+            else:
+                obj = codec.decode(data)
+        except ValueError:
+            raise TypeError(f"Bad {codec.name} file")
+        if not isinstance(obj, dict):
+            raise TypeError("File JSON must be an object")
+        return obj
+
+    def stream_records(self):
+        """yields the (<class name>.<id>, raw dictionary) pairs of the JSON
+        file, parsing one at a time"""
+        codec = self.file_codec()
+        try:
+            f = codec.open_text(self.__file_path)
+        except FileNotFoundError:
+            return
+        with f:
+            try:
+                yield from iter_items(f)
+            except (ValueError, OSError, EOFError):
+                raise TypeError(f"Bad {codec.name} file")
+
+    def load_objects(self, records: Type_Records):
+        """replaces __objects with instances made from raw dictionaries
+        Parameters:
+        - records: dictionary or iterable of (key, raw dictionary) pairs,
+        every instance is made as soon as its pair is read
+        """
+        if isinstance(records, dict):
+            records = records.items()
+        serialized = {}
+        mutable = set()
+
+        def keep(k, v):
+            """caches the raw form of an instance"""
+            kept = serialized[k] = detach(v)
+            if kept is not v:
+                mutable.add(k)
+
+        def make_all():
+            """makes the instances, keeping their raw form"""
+            for k, v in records:
+                keep(k, v)
+                if self.lazy:
+                    yield k, self.make_lazy(k, v)
+                else:
+                    yield k, self.make_inst(v)
+
+        if self.columnar:
+            objs = ObjectMap()
+            objs.tables = self.make_tables()
+            for k, v in records:
+                keep(k, v)
+                objs.load(k, self.make_row(k, v, objs.tables))
+        else:
+            objs = ObjectMap(make_all())
+        # the new objects are made without holding the lock
+        with self.lock.writing():
+            self.__objects = objs
+            self.__serialized = serialized
+            self.__mutable = mutable
+            self.render_cache.clear()
+
+    def load_object(self, key, record: Dict[str, str]):
+        """adds the instance made from one raw dictionary to __objects
+        without recording a change, returns the instance"""
+        with self.lock.writing():
+            if getattr(self.__objects, "tables", None) is not None:
+                obj = self.make_row(key, record)
+            elif self.lazy:
+                obj = self.make_lazy(key, record)
+            else:
+                obj = self.make_inst(record)
+            self.cache_record(key, record)
+            self.__objects.load(key, obj)
+            return obj
 
     def make_inst(self, obj: Dict[str, str]):
-        """makes instance of a specific class"""
-        from exports import valid_classes
+        """makes instance of a specific class from a raw dictionary written
+        by storage, see BaseModel.from_record"""
         # verify
-        cls = valid_classes.get(obj["__class__"], None)
+        cls = model_classes().get(obj["__class__"], None)
         if not cls:
             # raise or return?
             return
-        return cls(**obj)
+        return self.model_class(cls).from_record(obj)
+
+    def model_class(self, cls):
+        """returns the class the instances of the model cls are made from"""
+        if self.compact_instances:
+            from models.compact import compact_class
+            return compact_class(cls)
+        return cls
+
+    def make_lazy(self, key, obj: Dict[str, str]):
+        """makes a LazyObject standing for an instance of a specific class"""
+        cls = model_classes().get(obj["__class__"], None)
+        if not cls:
+            return
+        return LazyObject(cls, obj, key, self)
+
+    def make_tables(self):
+        """returns a Table per class of exports.valid_classes"""
+        from exports import valid_classes
+        from models.columns import Table
+        return {name: Table(cls) for name, cls in valid_classes.items()}
+
+    def make_row(self, key, obj: Dict[str, str], tables=None):
+        """adds a row made from a raw dictionary to the table of its class
+        and returns its view
+        Parameters:
+        - tables: class name -> Table, those of __objects by default
+        """
+        if tables is None:
+            tables = self.__objects.tables
+        table = tables.get(obj["__class__"])
+        if table is None:
+            return
+        return table.load(key.partition(".")[2], obj)
+
+    def materialized(self, key, proxy, obj):
+        """puts obj in place of the LazyObject proxy it was made from"""
+        with self.lock.writing():
+            if isinstance(self.__objects, ObjectMap):
+                self.__objects.swap(key, proxy, obj)
 
     def validate_instance(self, ins):
-        from models.base_model import BaseModel
-        return issubclass(type(ins), BaseModel)
+        return isinstance(ins, model_classes()["BaseModel"])
 
     @staticmethod
     def to_json_string(dict_obj):
@@ -0,0 +1,134 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Includes the class JournalStorage which keeps a JSON snapshot of the objects
+and appends every later change to a journal file instead of rewriting the
+snapshot on each save.
+"""
+
+import json
+import os
+import threading
+from .file_storage import FileStorage, Type_ObjDict
+
+
+class JournalStorage(FileStorage):
+    """Append-only storage engine
+    The snapshot lives in `fpa` and uses the same format and codec as
+    FileStorage, so both engines can read it. Changes are appended to
+    `fpa`.journal as one JSON record per line:
+    - {"op": "set", "key": <class name>.<id>, "obj": <to_dict()>}
+    - {"op": "del", "key": <class name>.<id>}
+    Once the journal passes `compact_threshold` bytes, it is folded into the
+    snapshot by a background thread.
+    The shared mode of FileStorage isn't supported.
+    Attributes:
+    - compact_threshold: journal size in bytes that triggers compaction
+    """
+
+    compact_threshold = 4 * 1024 * 1024
+    shareable = False
+
+    def __init__(self):
+        """Initialize the compaction thread"""
+        super().__init__()
+        self.__compactor = None
+
+    @property
+    def journal_path(self):
+        """path of the journal file"""
+        return self.fpa + ".journal"
+
+    @property
+    def compacting_path(self):
+        """path of the journal while it is being folded into the snapshot"""
+        return self.fpa + ".journal.compacting"
+
+    def save(self):
+        """appends the changes made since the last save to the journal"""
+        if self.deferred():
+            return
+        changed, removed = self.collect_changes()
+        records = [
+            {"op": "set", "key": key, "obj": data}
+            for key, data in changed.items()]
+        records.extend({"op": "del", "key": key} for key in removed)
+        if records:
+            self.append(records)
+
+    def append(self, records):
+        """writes records at the end of the journal"""
+        lines = "".join(json.dumps(rec) + "\n" for rec in records)
+        with open(self.journal_path, mode="a") as f:
+            f.write(lines)
+            synced = self.sync(f)
+            size = f.tell()
+        if not synced and self.fsync == "interval":
+            self.defer_sync(self.journal_path)
+        if size >= self.compact_threshold:
+            self.compact()
+
+    def reload(self):
+        """loads the snapshot then replays the journal on top of it"""
+        self.wait_compaction()
+        if not self.fpa:
+            return
+        records = self.load_records()
+        for path in (self.compacting_path, self.journal_path):
+            self.replay(path, records)
+        self.load_objects(records)
+
+    @staticmethod
+    def replay(path, records: Type_ObjDict):
+        """applies the journal at path to records"""
+        try:
+            f = open(path, mode="r")
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    # torn write at the end of the journal, stop here
+                    break
+                if rec["op"] == "set":
+                    records[rec["key"]] = rec["obj"]
+                elif rec["op"] == "del":
+                    records.pop(rec["key"], None)
+
+    def compact(self, wait=False):
+        """folds the journal into the snapshot
+        The journal is moved aside and a new one is started right away, the
+        snapshot itself is written by a background thread.
+        Parameters:
+        - wait: block until the snapshot is written
+        """
+        self.wait_compaction()
+        if not os.path.isfile(self.journal_path):
+            return
+        if os.path.isfile(self.compacting_path):
+            # left over by a crash, keep its records in front of ours
+            with open(self.journal_path, mode="r") as src, \
+                    open(self.compacting_path, mode="a") as dst:
+                dst.write(src.read())
+            os.remove(self.journal_path)
+        else:
+            os.replace(self.journal_path, self.compacting_path)
+        snapshot = self.snapshot()
+        self.__compactor = threading.Thread(
+            target=self.write_snapshot, args=(snapshot,))
+        self.__compactor.start()
+        if wait:
+            self.wait_compaction()
+
+    def wait_compaction(self):
+        """blocks until a running compaction is done"""
+        if self.__compactor:
+            self.__compactor.join()
+            self.__compactor = None
+
+    def write_snapshot(self, snapshot: Type_ObjDict):
+        """replaces the snapshot file then drops the folded journal"""
+        self.write_file(self.fpa, self.file_codec().encode(snapshot))
+        os.remove(self.compacting_path)
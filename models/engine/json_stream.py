@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Incremental reader for files holding one big JSON object, like file.json.
+Only one entry of the object is parsed and kept in memory at a time.
+"""
+
+import json
+import re
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def iter_items(f, chunk_size=1 << 16):
+    """yields the (key, value) pairs of the JSON object in f one at a time
+    Parameters:
+    - f: text file opened for reading
+    - chunk_size: number of characters read from f at once
+    Raises:
+    - ValueError: the file isn't a valid JSON object
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def read_more():
+        """drops the parsed text and reads the next chunk"""
+        nonlocal buf, pos, eof
+        data = f.read(max(chunk_size, len(buf) - pos))
+        if not data:
+            eof = True
+        buf = buf[pos:] + data
+        pos = 0
+
+    def skip_whitespace():
+        """moves pos to the next significant character"""
+        nonlocal pos
+        while True:
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos < len(buf) or eof:
+                return
+            read_more()
+
+    def expect(chars):
+        """consumes and returns the next character, one of chars"""
+        nonlocal pos
+        skip_whitespace()
+        if pos >= len(buf):
+            raise ValueError("Unexpected end of JSON object")
+        char = buf[pos]
+        if char not in chars:
+            raise ValueError(f"Expecting one of {chars!r} at {char!r}")
+        pos += 1
+        return char
+
+    def decode():
+        """parses and returns the next JSON value"""
+        nonlocal pos
+        skip_whitespace()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                read_more()
+                continue
+            if end == len(buf) and not eof:
+                # a number could go on in the next chunk
+                read_more()
+                continue
+            pos = end
+            return value
+
+    expect("{")
+    skip_whitespace()
+    if buf[pos:pos + 1] == "}":
+        pos += 1
+    else:
+        while True:
+            key = decode()
+            if not isinstance(key, str):
+                raise ValueError("Keys of the JSON object must be strings")
+            expect(":")
+            yield key, decode()
+            if expect(",}") == "}":
+                break
+    skip_whitespace()
+    if pos < len(buf):
+        raise ValueError("Extra data after the JSON object")
@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Includes the class LazyObject, a stand-in for instances loaded in lazy mode.
+"""
+
+from datetime import datetime
+
+# attributes kept as ISO strings in the raw dictionaries
+DATES = ("created_at", "updated_at")
+
+
+class LazyObject:
+    """Stands for an instance of a model until it is first used
+    Keeps the raw dictionary read by the engine. The first attribute access,
+    attribute write or str() makes the real instance with
+    storage.make_inst() and puts it in place of the proxy in storage.
+    isinstance() sees the proxy as an instance of the model class.
+    """
+
+    __slots__ = ("_cls", "_record", "_key", "_storage", "_obj")
+
+    def __init__(self, cls, record, key, storage):
+        """Initialize the proxy
+        Parameters:
+        - cls: class of the instance
+        - record: raw dictionary of the instance
+        - key: <class name>.<id> of the instance
+        - storage: engine holding the proxy
+        """
+        object.__setattr__(self, "_cls", cls)
+        object.__setattr__(self, "_record", record)
+        object.__setattr__(self, "_key", key)
+        object.__setattr__(self, "_storage", storage)
+        object.__setattr__(self, "_obj", None)
+
+    @property
+    def __class__(self):
+        """class of the instance, for isinstance()"""
+        return self._cls
+
+    @property
+    def is_loaded(self):
+        """True once the real instance is made"""
+        return self._obj is not None
+
+    def peek(self, name, default=None):
+        """returns the value of name without making the instance, dates
+        being parsed as the instance would have them"""
+        if self._obj is not None:
+            return getattr(self._obj, name, default)
+        if name in self._record:
+            if name in DATES:
+                return datetime.fromisoformat(self._record[name])
+            return self._record[name]
+        return getattr(self._cls, name, default)
+
+    def resolve(self):
+        """returns the real instance, making it on the first call"""
+        if self._obj is None:
+            with self._storage.lock.writing():
+                # made by another thread while waiting for the lock
+                if self._obj is not None:
+                    return self._obj
+                obj = self._storage.make_inst(self._record)
+                object.__setattr__(self, "_obj", obj)
+                self._storage.materialized(self._key, self, obj)
+        return self._obj
+
+    def __getattr__(self, name):
+        """reads the attribute of the real instance"""
+        return getattr(self.resolve(), name)
+
+    def __setattr__(self, name, value):
+        """writes the attribute of the real instance"""
+        setattr(self.resolve(), name, value)
+
+    def __delattr__(self, name):
+        """deletes the attribute of the real instance"""
+        delattr(self.resolve(), name)
+
+    def __str__(self):
+        """string representation of the real instance"""
+        return str(self.resolve())
+
+
+def resolve(obj):
+    """returns the real instance behind obj, which may be a LazyObject"""
+    if type(obj) is LazyObject:
+        return obj.resolve()
+    return obj
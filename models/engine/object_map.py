@@ -0,0 +1,282 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Includes the class ObjectMap, the dictionary the storage engines keep their
+instances in.
+"""
+
+from .lazy_object import LazyObject
+
+
+def _peek(obj, name, default=None):
+    """reads an attribute without loading lazy objects"""
+    if type(obj) is LazyObject:
+        return obj.peek(name, default)
+    return getattr(obj, name, default)
+
+
+_MISSING = object()
+
+
+class ObjectMap(dict):
+    """Dictionary of <class name>.<id> -> instance that remembers which keys
+    were set or deleted since the last call to take_changes(), and indexes
+    the ids of each class and the foreign keys of the instances.
+    Filling it through the constructor does not count as a change, that is
+    how the engines load what is already on disk.
+    Attributes:
+    - dirty: keys set or marked since the last take_changes()
+    - deleted: keys deleted since the last take_changes()
+    - classes: class name -> ids of the class, in insertion order
+    - refs: (class name, foreign key) -> value -> keys referencing value
+    - ref_values: key -> foreign key -> value indexed in refs
+    - undo: key -> value before the first change since begin(), None when
+    no transaction is open
+    - tables: class name -> models.columns.Table the instances of the class
+    are kept in, None when the objects aren't kept as columns
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the map without recording any change"""
+        super().__init__(*args, **kwargs)
+        self.dirty = set()
+        self.deleted = set()
+        self.classes = {}
+        self.refs = {}
+        self.ref_values = {}
+        self.undo = None
+        self.undo_marks = None
+        self.tables = None
+        for key in self:
+            self._index(key)
+            self._index_refs(key)
+
+    def __setitem__(self, key, value):
+        """sets key and records it as dirty"""
+        self._remember(key)
+        if key not in self:
+            self._index(key)
+        super().__setitem__(key, value)
+        self._index_refs(key)
+        self._index_columns(key)
+        self.dirty.add(key)
+        self.deleted.discard(key)
+
+    def __delitem__(self, key):
+        """deletes key and records it as deleted"""
+        self._remember(key)
+        super().__delitem__(key)
+        self._unindex(key)
+        self._unindex_refs(key)
+        self._unindex_columns(key)
+        self.dirty.discard(key)
+        self.deleted.add(key)
+
+    def _index(self, key):
+        """adds key to the index of its class"""
+        class_name, _, obj_id = key.partition(".")
+        self.classes.setdefault(class_name, {})[obj_id] = None
+
+    def _unindex(self, key):
+        """removes key from the index of its class"""
+        class_name, _, obj_id = key.partition(".")
+        ids = self.classes.get(class_name)
+        if ids is None:
+            return
+        ids.pop(obj_id, None)
+        if not ids:
+            del self.classes[class_name]
+
+    def _index_refs(self, key):
+        """indexes the foreign keys of the object at key"""
+        obj = self[key]
+        fields = _peek(obj, "foreign_keys", ())
+        if not fields and key not in self.ref_values:
+            return
+        values = {}
+        for field in fields:
+            value = _peek(obj, field)
+            if value is None or value == "":
+                continue
+            try:
+                hash(value)
+            except TypeError:
+                continue
+            values[field] = value
+        if values == self.ref_values.get(key):
+            return
+        self._unindex_refs(key)
+        class_name = key.partition(".")[0]
+        for field, value in values.items():
+            index = self.refs.setdefault((class_name, field), {})
+            index.setdefault(value, {})[key] = None
+        if values:
+            self.ref_values[key] = values
+
+    def _unindex_refs(self, key):
+        """removes the foreign keys of key from the index"""
+        values = self.ref_values.pop(key, None)
+        if not values:
+            return
+        class_name = key.partition(".")[0]
+        for field, value in values.items():
+            index = self.refs[(class_name, field)]
+            del index[value][key]
+            if not index[value]:
+                del index[value]
+
+    def _index_columns(self, key, name=None):
+        """puts the object at key in the table of its class, see
+        Table.put"""
+        if self.tables is None:
+            return
+        class_name, _, obj_id = key.partition(".")
+        table = self.tables.get(class_name)
+        if table is not None:
+            table.put(obj_id, dict.__getitem__(self, key), name)
+
+    def _unindex_columns(self, key):
+        """takes key out of the table of its class"""
+        if self.tables is None:
+            return
+        class_name, _, obj_id = key.partition(".")
+        table = self.tables.get(class_name)
+        if table is not None:
+            table.remove(obj_id)
+
+    def by_ref(self, class_name, field, value):
+        """returns a dictionary of the objects of class_name whose foreign
+        key field is value"""
+        keys = self.refs.get((class_name, field), {}).get(value, ())
+        return {key: self[key] for key in keys}
+
+    def of_class(self, class_name):
+        """returns a dictionary of the objects of class_name"""
+        ids = self.classes.get(class_name, ())
+        return {
+            f"{class_name}.{obj_id}": self[f"{class_name}.{obj_id}"]
+            for obj_id in ids}
+
+    def count(self, class_name):
+        """returns the number of objects of class_name"""
+        return len(self.classes.get(class_name, ()))
+
+    def pop(self, key, *default):
+        """removes key and returns its value"""
+        if key not in self:
+            return super().pop(key, *default)
+        value = self[key]
+        del self[key]
+        return value
+
+    def popitem(self):
+        """removes the last inserted item and returns it"""
+        if self:
+            self._remember(next(reversed(self)))
+        key, value = super().popitem()
+        self._unindex(key)
+        self._unindex_refs(key)
+        self._unindex_columns(key)
+        self.dirty.discard(key)
+        self.deleted.add(key)
+        return key, value
+
+    def clear(self):
+        """deletes every key"""
+        for key in self:
+            self._remember(key)
+        self.deleted.update(self)
+        self.dirty.clear()
+        for key in self:
+            self._unindex_columns(key)
+        self.classes.clear()
+        self.refs.clear()
+        self.ref_values.clear()
+        super().clear()
+
+    def update(self, *args, **kwargs):
+        """sets every key of the arguments"""
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        """sets key to default if it is missing"""
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def mark(self, key, name=None):
+        """records an existing key as dirty and refreshes its foreign keys
+        Parameters:
+        - name: the only attribute changed, None if any may have changed
+        """
+        if key in self:
+            self._remember(key)
+            self.dirty.add(key)
+            self._index_refs(key)
+            self._index_columns(key, name)
+
+    def load(self, key, value):
+        """sets key to a value read from disk without recording a change"""
+        if key not in self:
+            self._index(key)
+        super().__setitem__(key, value)
+        self._index_refs(key)
+        self._index_columns(key)
+
+    def unload(self, key):
+        """deletes key, gone from disk, without recording a change"""
+        if key in self:
+            super().__delitem__(key)
+            self._unindex(key)
+            self._unindex_refs(key)
+            self._unindex_columns(key)
+            self.dirty.discard(key)
+
+    def swap(self, key, old, new):
+        """puts new at key in place of old without recording a change"""
+        if dict.get(self, key) is old:
+            dict.__setitem__(self, key, new)
+            self._index_columns(key)
+
+    def begin(self):
+        """starts keeping what is needed to undo the next changes"""
+        self.undo = {}
+        self.undo_marks = (set(self.dirty), set(self.deleted))
+
+    def commit(self):
+        """keeps the changes made since begin()"""
+        self.undo = None
+        self.undo_marks = None
+
+    def rollback(self, restore):
+        """puts back every key changed since begin()
+        Parameters:
+        - restore: function called with (key, obj) for each object put
+        back, it must reset the attributes obj had at begin()
+        """
+        for key, old in self.undo.items():
+            if key in self:
+                super().__delitem__(key)
+                self._unindex(key)
+                self._unindex_refs(key)
+                self._unindex_columns(key)
+            if old is not _MISSING:
+                super().__setitem__(key, old)
+                self._index(key)
+                restore(key, old)
+                self._index_refs(key)
+                self._index_columns(key)
+        self.dirty, self.deleted = self.undo_marks
+        self.commit()
+
+    def _remember(self, key):
+        """keeps the value of key before its first change in a transaction"""
+        if self.undo is not None and key not in self.undo:
+            self.undo[key] = dict.get(self, key, _MISSING)
+
+    def take_changes(self):
+        """returns the dirty and deleted keys then forgets them"""
+        dirty, deleted = self.dirty, self.deleted
+        self.dirty, self.deleted = set(), set()
+        return dirty, deleted
@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Decoding of one big JSON object, like file.json, in several processes, see
+FileStorage.workers.
+The text is cut into chunks between its top level entries, where a } is
+followed by a comma and a quote. Such a cut may also fall inside a string
+or a nested object: each chunk is decoded as an object of its own, and the
+chunks can only all be valid when every cut is between two entries, since
+JSON is parsed in only one way. Otherwise the text is decoded as a whole.
+The chunks are decoded by json.loads, wrapped in braces.
+"""
+
+import json
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+# end of an entry, up to the quote of the next key
+_CUT = re.compile(rb"\}[ \t\n\r]*,[ \t\n\r]*(?=\")")
+_BRACES = re.compile(rb"^[ \t\n\r]*\{(.*)\}[ \t\n\r]*$", re.DOTALL)
+
+
+def split_object(data: bytes, count):
+    """returns the text of the entries of the JSON object data cut in about
+    count chunks, None if it can't be cut
+    Parameters:
+    - data: JSON text of an object
+    - count: number of chunks wanted
+    """
+    match = _BRACES.match(data)
+    if match is None:
+        return None
+    start, end = match.span(1)
+    size = (end - start) // count
+    chunks = []
+    while end - start > size:
+        cut = _CUT.search(data, start + size, end)
+        if cut is None:
+            break
+        chunks.append(data[start:cut.start() + 1])
+        start = cut.end()
+    chunks.append(data[start:end])
+    return chunks
+
+
+def decode_object(data: bytes, workers):
+    """returns the JSON object in data, decoded by workers processes
+    Parameters:
+    - data: JSON text of an object
+    - workers: number of processes
+    Raises:
+    - ValueError: data isn't a valid JSON object
+    """
+    # a few chunks per process, so they all finish about together
+    chunks = split_object(data, workers * 4)
+    if chunks is None or len(chunks) < 2:
+        return json.loads(data)
+    records = {}
+    # the processes run json.loads itself: unpickling a function of this
+    # package would wait for the import of models, which may be what
+    # called reload()
+    texts = [b"{" + chunk + b"}" for chunk in chunks]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        try:
+            for part in executor.map(json.loads, texts):
+                records.update(part)
+        except ValueError:
+            # a cut inside an entry, or an invalid file
+            return json.loads(data)
+    return records
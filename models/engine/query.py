@@ -0,0 +1,224 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Includes the class Query returned by storage.query(cls), e.g the places of
+some cities with a given amenity, cheapest first:
+    storage.query(Place).where("city_id", "in", city_ids)
+                        .where("amenity_ids", "contains", amenity_id)
+                        .order_by("price_by_night").limit(10).all()
+"""
+
+import heapq
+import numbers
+import operator
+from datetime import datetime
+from itertools import islice
+from .lazy_object import LazyObject
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda value, values: value in values,
+    "contains": lambda values, value: value in values,
+}
+
+_MISSING = object()
+
+
+def sortable(value):
+    """returns the key ordering value among values of any type: numbers,
+    then strings, then dates, then anything else by type name and str()"""
+    if isinstance(value, numbers.Real):
+        return (0, value)
+    if isinstance(value, str):
+        return (1, value)
+    if isinstance(value, datetime):
+        return (2, value)
+    return (3, type(value).__name__, str(value))
+
+
+def peek(obj, name):
+    """reads an attribute without loading lazy objects, _MISSING if there
+    is none"""
+    if type(obj) is LazyObject:
+        return obj.peek(name, _MISSING)
+    return getattr(obj, name, _MISSING)
+
+
+class Query:
+    """Objects of a class filtered, ordered and paged
+    Each method returns a new query, the objects are only read by all(),
+    first(), count() or iteration.
+    The conditions are looked up in the indexes of storage when they can:
+    - field == value and field in values on a foreign key use by_ref()
+    - the other conditions of a class kept as columns use its table
+    - otherwise the objects of the class are scanned one at a time
+    Parameters:
+    - storage: engine the objects are read from
+    - cls: class of the objects
+    """
+
+    def __init__(self, storage, cls):
+        """Initialize a query of every object of cls"""
+        self.storage = storage
+        self.cls = cls
+        self.conditions = ()
+        self.ordering = ()
+        self.skip = 0
+        self.size = None
+        self.fields = None
+
+    def copy(self, **changes):
+        """returns a copy of the query with changed attributes"""
+        query = Query(self.storage, self.cls)
+        query.__dict__.update(self.__dict__)
+        query.__dict__.update(changes)
+        return query
+
+    def where(self, field=None, op="==", value=None, **equals):
+        """keeps the objects whose attribute field compares to value with
+        op, one of ==, !=, <, <=, >, >=, in (value is a collection) and
+        contains (the attribute is a collection)
+        where(name="x", max_guest=2) keeps the objects equal to each value.
+        Raises:
+        - ValueError: op is unknown
+        """
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown operator: {op}")
+        conditions = list(self.conditions)
+        if field is not None:
+            if op == "in":
+                value = tuple(value)
+            conditions.append((field, op, value))
+        conditions.extend((k, "==", v) for (k, v) in equals.items())
+        return self.copy(conditions=tuple(conditions))
+
+    def order_by(self, *fields):
+        """orders the objects by fields, a field starting with - orders
+        from the largest value. Objects missing a field come last."""
+        ordering = tuple(
+            (f[1:], True) if f.startswith("-") else (f, False)
+            for f in fields)
+        return self.copy(ordering=self.ordering + ordering)
+
+    def limit(self, count):
+        """keeps at most count objects"""
+        return self.copy(size=count)
+
+    def offset(self, count):
+        """skips the first count objects"""
+        return self.copy(skip=count)
+
+    def only(self, *fields):
+        """returns dictionaries of fields instead of the objects"""
+        return self.copy(fields=fields)
+
+    def candidates(self):
+        """returns the objects the conditions are checked on and the
+        conditions left to check"""
+        conditions = list(self.conditions)
+        foreign_keys = getattr(self.cls, "foreign_keys", ())
+        for condition in conditions:
+            field, op, value = condition
+            if field not in foreign_keys or op not in ("==", "in"):
+                continue
+            conditions.remove(condition)
+            values = (value,) if op == "==" else value
+            objs = {}
+            for value in values:
+                try:
+                    objs.update(self.storage.by_ref(self.cls, field, value))
+                except TypeError:
+                    # unhashable values are in no index
+                    continue
+            return objs.values(), conditions
+        if conditions and getattr(self.storage, "columnar", False):
+            from models.columns import OPERATORS as TABLE_OPERATORS
+            selection = self.storage.table(self.cls).select()
+            for condition in list(conditions):
+                if condition[1] in TABLE_OPERATORS:
+                    selection = selection.where(*condition)
+                    conditions.remove(condition)
+            return selection.objects().values(), conditions
+        return self.storage.all(self.cls).values(), conditions
+
+    def matches(self):
+        """yields the objects meeting every condition, one at a time"""
+        objs, conditions = self.candidates()
+        checks = [(field, OPERATORS[op], value)
+                  for (field, op, value) in conditions]
+        for obj in list(objs):
+            for field, compare, value in checks:
+                attr = peek(obj, field)
+                try:
+                    if attr is _MISSING or not compare(attr, value):
+                        break
+                except TypeError:
+                    break
+            else:
+                yield obj
+
+    def sort_key(self, obj):
+        """returns the key ordering obj"""
+        key = []
+        for field, _ in self.ordering:
+            value = peek(obj, field)
+            key.append(
+                (1, None) if value is _MISSING else (0, sortable(value)))
+        return key
+
+    def ordered(self):
+        """returns or yields the matching objects in order"""
+        objs = self.matches()
+        if not self.ordering:
+            return objs
+        descending = {desc for (_, desc) in self.ordering}
+        if self.size is not None and len(descending) == 1:
+            # only the first objects are kept, not every match
+            count = self.skip + self.size
+            if descending == {True}:
+                # objects missing a field still come last
+                return heapq.nlargest(count, objs, key=lambda o: [
+                    (-missing, value)
+                    for (missing, value) in self.sort_key(o)])
+            return heapq.nsmallest(count, objs, key=self.sort_key)
+        objs = list(objs)
+        # sorts by the last field first, sort() being stable
+        for field, desc in reversed(self.ordering):
+            present, missing = [], []
+            for obj in objs:
+                value = peek(obj, field)
+                if value is _MISSING:
+                    missing.append(obj)
+                else:
+                    present.append((sortable(value), obj))
+            present.sort(key=operator.itemgetter(0), reverse=desc)
+            objs = [obj for (_, obj) in present] + missing
+        return objs
+
+    def __iter__(self):
+        """yields the objects, or the dictionaries of fields of only()"""
+        stop = None if self.size is None else self.skip + self.size
+        objs = islice(self.ordered(), self.skip, stop)
+        if self.fields is None:
+            return iter(objs)
+        return ({field: peek(obj, field) for field in self.fields
+                 if peek(obj, field) is not _MISSING} for obj in objs)
+
+    def all(self):
+        """returns the list of the objects"""
+        return list(self)
+
+    def first(self):
+        """returns the first object, None if there is none"""
+        return next(iter(self.limit(1)), None)
+
+    def count(self):
+        """returns the number of objects, ignoring limit() and offset()"""
+        if not self.conditions:
+            return self.storage.count(self.cls)
+        return sum(1 for _ in self.matches())
@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Includes the class RenderCache, the cache of the str() and to_dict() forms
+of the objects of a storage engine, see FileStorage.rendered().
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class RenderCache:
+    """Least recently used cache of the rendered forms of objects
+    An entry is kept per storage key, with the object it was rendered from:
+    a form is only returned for that same object. Engines drop the entry of
+    a key when its object changes.
+    Forms are rendered outside of the cache's own lock, so threads can
+    share it; a form rendered while any key was dropped isn't kept.
+    Attributes:
+    - size: most objects kept, 0 turns the cache off
+    - hits: number of forms returned from the cache
+    - misses: number of forms rendered
+    - entries: key -> (object, kind of form -> form), least recently used
+    first
+    - version: number of times keys were dropped
+    """
+
+    def __init__(self, size=0):
+        """Initialize an empty cache"""
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+        self.version = 0
+        self.mutex = threading.Lock()
+
+    def get(self, key, obj, kind, render):
+        """returns the form kind of obj, render(obj) on a miss
+        Dictionaries are copied, so the caller can change them.
+        Parameters:
+        - key: <class name>.<id> of obj
+        - obj: the object
+        - kind: name of the form, e.g str
+        - render: function making the form of an object
+        """
+        entries = self.entries
+        with self.mutex:
+            entry = entries.get(key)
+            if entry is not None and entry[0] is obj:
+                value = entry[1].get(kind)
+                if value is not None:
+                    self.hits += 1
+                    entries.move_to_end(key)
+                    return dict(value) if type(value) is dict else value
+            self.misses += 1
+            version = self.version
+        value = render(obj)
+        with self.mutex:
+            if version != self.version:
+                # obj may have changed while it was rendered
+                return dict(value) if type(value) is dict else value
+            entry = entries.get(key)
+            if entry is None or entry[0] is not obj:
+                entry = entries[key] = (obj, {})
+                if len(entries) > self.size:
+                    entries.popitem(last=False)
+            entry[1][kind] = value
+            entries.move_to_end(key)
+        return dict(value) if type(value) is dict else value
+
+    def invalidate(self, key):
+        """drops the forms of key"""
+        with self.mutex:
+            self.version += 1
+            self.entries.pop(key, None)
+
+    def clear(self):
+        """drops every form"""
+        with self.mutex:
+            self.version += 1
+            self.entries.clear()
+
+    def stats(self):
+        """returns a dictionary of the hits, misses, objects kept and size
+        of the cache"""
+        return {"hits": self.hits, "misses": self.misses,
+                "entries": len(self.entries), "size": self.size}
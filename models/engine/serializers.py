@@ -0,0 +1,250 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Codecs turning the dictionary of serialized objects into bytes and back.
+A codec is named like the file extension it is picked for:
+- json: JSON as written by json.dumps, the default
+- cjson: compact JSON, without spaces after separators
+- marshal: binary marshal of the plain dictionaries
+Any of them can be followed by a compression: .gz, .bz2, .xz and, when the
+zstandard package is installed, .zst (e.g cjson.gz).
+
+Converting a file from one format to another:
+    python3 -m models.engine.serializers file.json file.marshal.gz
+"""
+
+import bz2
+import gzip
+import json
+import lzma
+import marshal
+import os
+import sys
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class Codec:
+    """Base of the codecs
+    Attributes:
+    - name: name of the codec, also its file extension
+    - text: True if the format is JSON text that can be streamed
+    """
+
+    name = ""
+    text = False
+
+    def encode(self, objs) -> bytes:
+        """returns the bytes of objs"""
+        raise NotImplementedError
+
+    def decode(self, data: bytes):
+        """returns the objects in data
+        Raises:
+        - ValueError: data isn't valid for the codec
+        """
+        raise NotImplementedError
+
+    def json_text(self, data: bytes) -> bytes:
+        """returns the JSON text in data, text codecs only"""
+        raise NotImplementedError
+
+    def encode_entry(self, key, value) -> str:
+        """returns the JSON text of the entry key: value of an object,
+        text codecs only"""
+        raise NotImplementedError
+
+    def encode_entries(self, entries) -> bytes:
+        """returns the bytes of the object made of the JSON texts entries,
+        as encode() would return them, text codecs only"""
+        raise NotImplementedError
+
+    def open_text(self, path):
+        """opens path for streaming, text codecs only"""
+        return open(path, mode="r")
+
+
+class JSONCodec(Codec):
+    """JSON as written by json.dumps"""
+
+    name = "json"
+    text = True
+    separators = None
+
+    def encode(self, objs) -> bytes:
+        """returns the bytes of objs"""
+        return json.dumps(objs, separators=self.separators).encode()
+
+    def decode(self, data: bytes):
+        """returns the objects in data"""
+        return json.loads(data)
+
+    def json_text(self, data: bytes) -> bytes:
+        """returns data, already JSON text"""
+        return data
+
+    def encode_entry(self, key, value) -> str:
+        """returns the JSON text of the entry key: value of an object"""
+        key_separator = self.separators[1] if self.separators else ": "
+        return (json.dumps(key) + key_separator
+                + json.dumps(value, separators=self.separators))
+
+    def encode_entries(self, entries) -> bytes:
+        """returns the bytes of the object made of the JSON texts
+        entries"""
+        item_separator = self.separators[0] if self.separators else ", "
+        return ("{" + item_separator.join(entries) + "}").encode()
+
+
+class CompactJSONCodec(JSONCodec):
+    """JSON without spaces after separators"""
+
+    name = "cjson"
+    separators = (",", ":")
+
+
+class MarshalCodec(Codec):
+    """marshal of the plain dictionaries, fast to load but binary"""
+
+    name = "marshal"
+
+    def encode(self, objs) -> bytes:
+        """returns the bytes of objs"""
+        return marshal.dumps(objs)
+
+    def decode(self, data: bytes):
+        """returns the objects in data"""
+        try:
+            return marshal.loads(data)
+        except (EOFError, TypeError) as e:
+            raise ValueError(f"Bad marshal data: {e}")
+
+
+class CompressedCodec(Codec):
+    """Codec whose output is compressed
+    Parameters:
+    - codec: codec compressed
+    - suffix: extension of the compression
+    - module: module with compress(), decompress() and open()
+    """
+
+    def __init__(self, codec: Codec, suffix, module):
+        """Initialize the codec"""
+        self.codec = codec
+        self.module = module
+        self.name = f"{codec.name}.{suffix}"
+        self.text = codec.text
+
+    def encode(self, objs) -> bytes:
+        """returns the compressed bytes of objs"""
+        return self.module.compress(self.codec.encode(objs))
+
+    def decode(self, data: bytes):
+        """returns the objects in the compressed data"""
+        try:
+            data = self.module.decompress(data)
+        except Exception as e:
+            raise ValueError(f"Bad {self.name} data: {e}")
+        return self.codec.decode(data)
+
+    def json_text(self, data: bytes) -> bytes:
+        """returns the JSON text in the compressed data"""
+        try:
+            data = self.module.decompress(data)
+        except Exception as e:
+            raise ValueError(f"Bad {self.name} data: {e}")
+        return self.codec.json_text(data)
+
+    def encode_entry(self, key, value) -> str:
+        """returns the JSON text of the entry key: value of an object"""
+        return self.codec.encode_entry(key, value)
+
+    def encode_entries(self, entries) -> bytes:
+        """returns the compressed bytes of the object made of the JSON
+        texts entries"""
+        return self.module.compress(self.codec.encode_entries(entries))
+
+    def open_text(self, path):
+        """opens path for streaming, decompressing on the fly"""
+        return self.module.open(path, mode="rt")
+
+
+class _Zstandard:
+    """zstandard with the interface of the gzip module"""
+
+    @staticmethod
+    def compress(data):
+        """compresses data"""
+        return zstandard.ZstdCompressor().compress(data)
+
+    @staticmethod
+    def decompress(data):
+        """decompresses data"""
+        return zstandard.ZstdDecompressor().decompress(data)
+
+    @staticmethod
+    def open(path, mode="rt"):
+        """opens a compressed file"""
+        return zstandard.open(path, mode=mode)
+
+
+codecs = {
+    codec.name: codec
+    for codec in (JSONCodec(), CompactJSONCodec(), MarshalCodec())
+}
+
+compressions = {"gz": gzip, "bz2": bz2, "xz": lzma}
+if zstandard:
+    compressions["zst"] = _Zstandard
+
+
+def get_codec(name):
+    """returns the codec called name, e.g json or cjson.gz
+    Raises:
+    - ValueError: no codec has this name
+    """
+    base, _, suffix = name.partition(".")
+    if base not in codecs or (suffix and suffix not in compressions):
+        raise ValueError(f"Unknown codec: {name}")
+    if not suffix:
+        return codecs[base]
+    return CompressedCodec(codecs[base], suffix, compressions[suffix])
+
+
+def codec_for_path(path):
+    """returns the codec picked by the extension of path, JSON by default"""
+    parts = os.path.basename(path).split(".")[1:]
+    for count in (2, 1):
+        if len(parts) < count:
+            continue
+        try:
+            return get_codec(".".join(parts[-count:]))
+        except ValueError:
+            pass
+    return codecs["json"]
+
+
+def convert(src, dst, src_codec=None, dst_codec=None):
+    """rewrites the storage file src as dst in another format
+    Parameters:
+    - src, dst: paths of the files
+    - src_codec, dst_codec: names of the codecs, picked by the extension of
+    the paths by default
+    """
+    src_codec = get_codec(src_codec) if src_codec else codec_for_path(src)
+    dst_codec = get_codec(dst_codec) if dst_codec else codec_for_path(dst)
+    with open(src, mode="rb") as f:
+        objs = src_codec.decode(f.read())
+    with open(dst, mode="wb") as f:
+        f.write(dst_codec.encode(objs))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(f"Usage: {sys.argv[0]} <source> <destination>",
+              file=sys.stderr)
+        sys.exit(2)
+    convert(sys.argv[1], sys.argv[2])
@@ -0,0 +1,196 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Includes the class ShardedStorage which keeps the objects in a directory,
+one file per class (a shard), so a save only rewrites the shards of the
+classes that changed.
+A single storage file is split into a shard directory with:
+    python3 -m models.engine.sharded_storage file.json file.shards [buckets]
+"""
+
+import json
+import os
+import sys
+import zlib
+from .file_storage import FileStorage, Type_ObjDict
+
+
+class ShardedStorage(FileStorage):
+    """Storage engine writing one file per class
+    `fpa` is a directory holding <class name>.<codec> files, or
+    <class name>.<bucket>.<codec> files when the objects of a class are
+    split in buckets by a hash of their id. The codec is picked by the
+    extension of the directory like the file of FileStorage, JSON by
+    default, and each shard has the format of that file.
+    The directory's layout.json records the number of buckets it was
+    written with, which wins over the attribute. The shared mode of
+    FileStorage isn't supported.
+    Attributes:
+    - buckets: number of files per class, 0 or 1 for one file
+    - classes: names of the classes reload() reads, every class when None.
+    The objects of the other classes aren't in storage but are kept on
+    disk.
+    """
+
+    buckets = 0
+    classes = None
+    shareable = False
+
+    def __init__(self):
+        """Initialize the shards"""
+        super().__init__()
+        self.fpa = "file.shards"
+        self.__shards = {}
+
+    @property
+    def layout_path(self):
+        """path of the file recording the number of buckets"""
+        return os.path.join(self.fpa, "layout.json")
+
+    def shard_name(self, key):
+        """returns the name of the shard of key, <class name>.<id>"""
+        class_name, _, obj_id = key.partition(".")
+        if self.buckets <= 1:
+            return class_name
+        bucket = zlib.crc32(obj_id.encode()) % self.buckets
+        return f"{class_name}.{bucket}"
+
+    def shard_path(self, name):
+        """returns the path of the shard called name"""
+        return os.path.join(self.fpa, f"{name}.{self.file_codec().name}")
+
+    def shard_names(self, classes=None):
+        """returns the names of the shards in the directory
+        Parameters:
+        - classes: only those of these class names
+        """
+        suffix = f".{self.file_codec().name}"
+        try:
+            files = os.listdir(self.fpa)
+        except FileNotFoundError:
+            return []
+        names = [f[:-len(suffix)] for f in files
+                 if f.endswith(suffix) and f != "layout.json"]
+        if classes is not None:
+            names = [n for n in names if n.partition(".")[0] in classes]
+        return sorted(names)
+
+    def read_shard(self, name) -> Type_ObjDict:
+        """returns the raw dictionaries of the shard called name, empty if
+        it has no file"""
+        codec = self.file_codec()
+        try:
+            with open(self.shard_path(name), mode="rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return {}
+        try:
+            records = codec.decode(data)
+        except ValueError:
+            raise TypeError(f"Bad {codec.name} file: {name}")
+        if not isinstance(records, dict):
+            raise TypeError(f"File JSON must be an object: {name}")
+        return records
+
+    def write_shard(self, name, records: Type_ObjDict):
+        """replaces the file of the shard called name, removing it when
+        records is empty"""
+        path = self.shard_path(name)
+        if records:
+            self.write_file(path, self.file_codec().encode(records))
+        elif os.path.isfile(path):
+            os.remove(path)
+
+    def read_layout(self):
+        """sets buckets from layout.json, if the directory has one"""
+        try:
+            with open(self.layout_path, mode="r") as f:
+                self.buckets = json.load(f)["buckets"]
+        except FileNotFoundError:
+            pass
+
+    def write_layout(self):
+        """creates the directory and its layout.json if they are missing"""
+        if os.path.isfile(self.layout_path):
+            return
+        os.makedirs(self.fpa, exist_ok=True)
+        self.write_file(self.layout_path, json.dumps(
+            {"buckets": self.buckets}))
+
+    def save(self):
+        """rewrites the shards of the objects changed since the last save"""
+        if self.deferred():
+            return
+        changed, removed = self.collect_changes()
+        if not changed and not removed:
+            return
+        self.write_layout()
+        shards = self.__shards
+        dirty = set()
+        for key, data in changed.items():
+            name = self.shard_name(key)
+            if name not in shards:
+                # of a class not read by reload(), keep what is on disk
+                shards[name] = self.read_shard(name)
+            shards[name][key] = data
+            dirty.add(name)
+        for key in removed:
+            name = self.shard_name(key)
+            if name not in shards:
+                shards[name] = self.read_shard(name)
+            shards[name].pop(key, None)
+            dirty.add(name)
+        for name in sorted(dirty):
+            self.write_shard(name, shards[name])
+
+    def reload(self, classes=None):
+        """reads the shards of the directory into __objects
+        Parameters:
+        - classes: names of the classes to read, the classes attribute by
+        default
+        """
+        if classes is None:
+            classes = self.classes
+        self.read_layout()
+        shards = {name: self.read_shard(name)
+                  for name in self.shard_names(classes)}
+        records = {}
+        for shard in shards.values():
+            records.update(shard)
+        self.__shards = shards
+        self.load_objects(records)
+
+
+def migrate(src, dst, buckets=0):
+    """splits the storage file src into the shard directory dst
+    Parameters:
+    - src: path of the file, its format picked by its extension
+    - dst: path of the directory, its extension picks the format of the
+    shards
+    - buckets: number of files per class
+    Raises:
+    - ValueError: dst already has shards
+    """
+    source = FileStorage()
+    source.fpa = src
+    records = source.load_records()
+    storage = ShardedStorage()
+    storage.fpa = dst
+    storage.buckets = buckets
+    if storage.shard_names() or os.path.isfile(storage.layout_path):
+        raise ValueError(f"{dst} already has shards")
+    storage.write_layout()
+    shards = {}
+    for key, record in records.items():
+        shards.setdefault(storage.shard_name(key), {})[key] = record
+    for name, shard in shards.items():
+        storage.write_shard(name, shard)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4):
+        print(f"Usage: {sys.argv[0]} <file> <directory> [buckets]",
+              file=sys.stderr)
+        sys.exit(2)
+    migrate(sys.argv[1], sys.argv[2],
+            int(sys.argv[3]) if len(sys.argv) == 4 else 0)
@@ -0,0 +1,220 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Includes the class SQLiteStorage which keeps the instances in a SQLite
+database, one table per class.
+"""
+
+import json
+import sqlite3
+from .file_storage import FileStorage
+
+
+class SQLiteStorage(FileStorage):
+    """SQLite storage engine
+    Each class of exports.valid_classes has a table named after it with the
+    columns:
+    - id: primary key
+    - one indexed column per foreign key of the class
+    - data: JSON of to_dict()
+    Only the instances that are asked for are read from the database, and
+    save() only writes the rows of the instances created, changed or deleted
+    since the last save. Changes are written to the open transaction before
+    any query, so queries see them; save() commits the transaction.
+    `fpa` is the path of the database. The shared mode of FileStorage
+    isn't supported, SQLite locks the database itself, nor is the thread
+    safe mode: the objects aren't kept in an ObjectMap, and the connection
+    isn't meant for several threads.
+    """
+
+    shareable = False
+    threadable = False
+
+    def __init__(self):
+        """Initialize the connection"""
+        super().__init__()
+        self.fpa = "file.db"
+        self.__db = None
+        self.__db_path = None
+        self.__classes = {}
+
+    def db(self):
+        """returns the connection to the database at fpa, creating the
+        tables on the first call"""
+        if self.__db is not None and self.__db_path == self.fpa:
+            return self.__db
+        self.close()
+        from exports import valid_classes
+        # transactions are opened by hand, see begin()
+        self.__db = sqlite3.connect(
+            self.fpa, isolation_level=None, check_same_thread=False)
+        self.__db_path = self.fpa
+        self.__classes = dict(valid_classes)
+        synchronous = {"always": "FULL", "interval": "NORMAL"}
+        self.__db.execute(
+            f"PRAGMA synchronous = {synchronous.get(self.fsync, 'OFF')}")
+        for name, cls in self.__classes.items():
+            columns = "".join(f', "{fk}"' for fk in cls.foreign_keys)
+            self.__db.execute(
+                f'CREATE TABLE IF NOT EXISTS "{name}" '
+                f'(id TEXT PRIMARY KEY{columns}, data TEXT NOT NULL)')
+            for fk in cls.foreign_keys:
+                self.__db.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{name}_{fk}" '
+                    f'ON "{name}" ("{fk}")')
+        return self.__db
+
+    def close(self):
+        """closes the connection, dropping what wasn't saved"""
+        if self.__db is not None:
+            self.__db.close()
+            self.__db = None
+            self.__db_path = None
+
+    def begin(self):
+        """opens a transaction if none is open"""
+        db = self.db()
+        if not db.in_transaction:
+            db.execute("BEGIN")
+        return db
+
+    def all(self, cls=None):
+        """returns the objects, reading the missing ones from the database
+        Parameters:
+        - cls: only return the objects of this class or class name
+        """
+        if cls is None:
+            class_names = list(self.classes())
+        else:
+            class_names = [cls if isinstance(cls, str) else cls.__name__]
+        self.flush()
+        objs = super().all()
+        for class_name in class_names:
+            if class_name not in self.classes():
+                continue
+            rows = self.db().execute(f'SELECT id, data FROM "{class_name}"')
+            for obj_id, data in rows:
+                key = f"{class_name}.{obj_id}"
+                if key not in objs:
+                    self.load_object(key, json.loads(data))
+        return super().all(cls)
+
+    def get(self, cls, id):
+        """returns the object of class cls with id, None if there is none
+        Only that row is read from the database.
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        obj = super().get(class_name, id)
+        key = f"{class_name}.{id}"
+        if obj is not None or key in super().all().deleted:
+            return obj
+        if class_name not in self.classes():
+            return None
+        row = self.db().execute(
+            f'SELECT data FROM "{class_name}" WHERE id = ?',
+            (id,)).fetchone()
+        if row is None:
+            return None
+        return self.load_object(key, json.loads(row[0]))
+
+    def count(self, cls=None):
+        """returns the number of objects, counted by the database
+        Parameters:
+        - cls: only count the objects of this class or class name
+        """
+        if cls is None:
+            class_names = list(self.classes())
+        else:
+            class_names = [cls if isinstance(cls, str) else cls.__name__]
+        self.flush()
+        return sum(
+            self.db().execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]
+            for name in class_names if name in self.classes())
+
+    def by_ref(self, cls, field, value):
+        """returns the objects of cls whose attribute field is value
+        Foreign keys are looked up in their indexed column.
+        """
+        if isinstance(cls, str):
+            cls = self.classes().get(cls)
+            if not cls:
+                return {}
+        if field not in cls.foreign_keys:
+            return super().by_ref(cls, field, value)
+        self.flush()
+        class_name = cls.__name__
+        objs = super().all()
+        rows = self.db().execute(
+            f'SELECT id, data FROM "{class_name}" WHERE "{field}" = ?',
+            (value,))
+        found = {}
+        for obj_id, data in rows:
+            key = f"{class_name}.{obj_id}"
+            if key not in objs:
+                self.load_object(key, json.loads(data))
+            found[key] = objs[key]
+        return found
+
+    def classes(self):
+        """returns the classes that have a table"""
+        self.db()
+        return self.__classes
+
+    def flush(self):
+        """writes the changes made since the last flush to the open
+        transaction, without committing them"""
+        changed, removed = self.collect_changes()
+        if not changed and not removed:
+            return
+        db = self.begin()
+        for key, data in changed.items():
+            class_name, _, obj_id = key.partition(".")
+            fks = self.classes()[class_name].foreign_keys
+            columns = "".join(f', "{fk}"' for fk in fks)
+            marks = ", ?" * len(fks)
+            db.execute(
+                f'INSERT OR REPLACE INTO "{class_name}" '
+                f'(id{columns}, data) VALUES (?{marks}, ?)',
+                (obj_id, *(self.column(data.get(fk)) for fk in fks),
+                 json.dumps(data)))
+        for key in removed:
+            class_name, _, obj_id = key.partition(".")
+            db.execute(
+                f'DELETE FROM "{class_name}" WHERE id = ?', (obj_id,))
+
+    @staticmethod
+    def column(value):
+        """returns value if SQLite can store it in a column, else None"""
+        if isinstance(value, (str, int, float)):
+            return value
+        return None
+
+    def save(self):
+        """writes the changed rows and commits them"""
+        if self.deferred():
+            return
+        self.flush()
+        if self.db().in_transaction:
+            self.db().execute("COMMIT")
+
+    def reload(self):
+        """drops what wasn't saved, objects are read again when asked for"""
+        if self.db().in_transaction:
+            self.db().execute("ROLLBACK")
+        self.load_objects({})
+
+    def begin_batch(self):
+        """keeps what is needed to roll the objects and rows back"""
+        super().begin_batch()
+        self.begin().execute("SAVEPOINT batch")
+
+    def commit_batch(self):
+        """keeps the changes of the batch and saves them if asked to"""
+        self.db().execute("RELEASE batch")
+        super().commit_batch()
+
+    def rollback_batch(self):
+        """puts the objects and rows back as they were"""
+        self.db().execute("ROLLBACK TO batch")
+        self.db().execute("RELEASE batch")
+        super().rollback_batch()
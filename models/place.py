@@ -20,3 +20,6 @@ class Place(BaseModel):
     latitude = 0.0
     longitude = 0.0
     amenity_ids = []
+
+    # ids of other objects, indexed by storage.by_ref()
+    foreign_keys = ("city_id", "user_id")
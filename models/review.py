@@ -12,3 +12,6 @@ class Review(BaseModel):
     place_id = ""
     user_id = ""
     text = ""
+
+    # ids of other objects, indexed by storage.by_ref()
+    foreign_keys = ("place_id", "user_id")
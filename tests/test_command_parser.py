@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Test case for the parser of the console's dot commands.
+"""
+import ast
+import unittest
+from unittest.mock import patch
+import command_parser
+from command_parser import compile_shape, parse_options, tokenize
+
+
+def reference(text):
+    """parses text with ast, as the console used to, without calls of
+    anything but f or repeated names"""
+    try:
+        return ast.literal_eval(text), {}
+    except (SyntaxError, ValueError):
+        pass
+    call = ast.parse(f"f{text}", mode="eval").body
+    if (not isinstance(call, ast.Call)
+            or not isinstance(call.func, ast.Name)
+            or any(k.arg is None for k in call.keywords)
+            or any(isinstance(a, ast.Starred) for a in call.args)):
+        raise SyntaxError("invalid options")
+    names = [k.arg for k in call.keywords]
+    if len(set(names)) != len(names):
+        raise SyntaxError("keyword argument repeated")
+    args = tuple(ast.literal_eval(a) for a in call.args)
+    params = {k.arg: ast.literal_eval(k.value) for k in call.keywords}
+    return args[0] if len(args) == 1 else args, params
+
+
+class TestCommandParser(unittest.TestCase):
+    """Test case for parse_options"""
+
+    valid = [
+        '()', '("id")', '(\'id\')', '("id",)', '("id", "name", "Betty")',
+        '("id", "age", 89)', '("id", "price", -1.5)', '("id", 1e3)',
+        '(.5, 5., 00, 0, +7)', '("id", {"first_name": "John", "age": 89})',
+        '("id", {})', '({1: [1, 2, (3,)], "a": {"b": None}},)',
+        '(True, False, None)', '("a\\"b", \'c\\\'d\', "\\u00e9\\n")',
+        '("é", "(x)", "a,b")', '  (  "id" ,  "x"  )  ', '((1, 2))',
+        '([])', '([1, 2,],)', '(max_guest=2)', '(name="x", limit=10)',
+        '("-price", "name", limit=3, offset=0)', '(a=[1, {"b": 2}])',
+        '("a", "b")', '({"a": 1, "a": 2})', '(1, 2, 3,)',
+        '(x=(1,))', '({1, 2})', '("a" "b")', '(- 5)', '(1_000)',
+        '(0x1f)', '(1j)', '(b"x")', '(café=1)',
+    ]
+
+    invalid = [
+        '(', ')', '(id)', '("id"', '("id"))', '(1, 2) x', '(007)',
+        '(1 2)', '(a=1, 2)', '(**a)', '(*a)', '(f(1))',
+        '(class=1)', '(True=1)', '(a.b=1)', '("\\xZZ")', '({1:})',
+        '(1..2)', '(\'a\nb\')', '([1, 2)', '({"a": 1,, })', '(x)',
+        '(1 = 2)', '(1 if 1 else 2)', '(lambda: 1)', '(a == 1)',
+        '(1)(2)', '("a").x(1)', '(a=1, a=2)', '(a=1)(b=2)',
+    ]
+
+    def test_same_as_ast(self):
+        """valid options give what ast gives"""
+        for text in self.valid:
+            self.assertEqual(parse_options(text), reference(text), msg=text)
+            options = parse_options(text)[0]
+            self.assertIs(type(options), type(reference(text)[0]),
+                          msg=text)
+
+    def test_same_errors(self):
+        """invalid options raise what ast raises"""
+        for text in self.invalid:
+            with self.assertRaises((SyntaxError, ValueError), msg=text):
+                reference(text)
+            with self.assertRaises((SyntaxError, ValueError), msg=text):
+                parse_options(text)
+
+    def test_unhashable_key(self):
+        """unhashable dict keys raise TypeError like literal_eval"""
+        with self.assertRaises(TypeError):
+            parse_options('({[1]: 2},)')
+
+    def test_shapes(self):
+        """lines differing by their values share a builder"""
+        shape, values = tokenize('("id", "age", 89, 1.5, None)')
+        self.assertEqual(shape, ("(", "value", ",", "value", ",", "value",
+                                 ",", "value", ",", "value", ")"))
+        self.assertEqual(values, ["id", "age", 89, 1.5, None])
+        self.assertEqual(tokenize('("x", "y", 1, 2e3, True)')[0], shape)
+        compile_shape.cache_clear()
+        parse_options('("a", "b", 1)')
+        parse_options('("c", "d", 2.5)')
+        info = compile_shape.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_fast_path(self):
+        """options in the grammar don't go through ast"""
+        with patch.object(command_parser.ast, "literal_eval",
+                          side_effect=AssertionError("ast used")):
+            self.assertEqual(parse_options('("id", {"a": [1, 2.5]})'),
+                             (("id", {"a": [1, 2.5]}), {}))
@@ -6,6 +6,7 @@ Test case for the Console.
 import os
 import unittest
 import io
+import json
 from unittest.mock import patch
 from console import HBNBCommand
 from models import storage
@@ -453,3 +454,271 @@ class TestConsole(unittest.TestCase):
             HBNBCommand().onecmd("Review.show()")
             self.assertEqual("** instance id missing **\n", f.getvalue())
             f.close()
+
+    def test_all_only_class(self):
+        """`all User` doesn't list other classes"""
+        with patch('sys.stdout', new=io.StringIO()) as f:
+            HBNBCommand().onecmd("create BaseModel")
+            HBNBCommand().onecmd("create User")
+            user_id = f.getvalue().split()[1]
+        with patch('sys.stdout', new=io.StringIO()) as f:
+            HBNBCommand().onecmd("User.all()")
+            output = f.getvalue()
+        self.assertIn(user_id, output)
+        self.assertEqual(output.count("[User]"), 1)
+        self.assertNotIn("[BaseModel]", output)
+        with patch('sys.stdout', new=io.StringIO()) as f:
+            HBNBCommand().onecmd("User.count()")
+            HBNBCommand().onecmd(f"destroy User {user_id}")
+            HBNBCommand().onecmd("User.count()")
+            self.assertEqual("1\n0\n", f.getvalue())
+
+    def test_update_foreign_key(self):
+        """`update` keeps the foreign key index in sync"""
+        with patch('sys.stdout', new=io.StringIO()) as f:
+            HBNBCommand().onecmd("create City")
+            city_id = f.getvalue().strip()
+        HBNBCommand().onecmd(f"update City {city_id} state_id first")
+        self.assertEqual(
+            list(storage.by_ref("City", "state_id", "first")),
+            [f"City.{city_id}"])
+        HBNBCommand().onecmd(
+            f'City.update("{city_id}", {{"state_id": "second"}})')
+        self.assertEqual(storage.by_ref("City", "state_id", "first"), {})
+        self.assertEqual(
+            list(storage.by_ref("City", "state_id", "second")),
+            [f"City.{city_id}"])
+
+    def test_update_forms_save(self):
+        """every form of `update` sets the attributes and saves once"""
+        with patch('sys.stdout', new=io.StringIO()) as f:
+            HBNBCommand().onecmd("create User")
+            user_id = f.getvalue().strip()
+        for command, attrs in (
+                (f"update User {user_id} first_name Betty",
+                 {"first_name": "Betty"}),
+                (f'User.update("{user_id}", "last_name", "Holberton")',
+                 {"last_name": "Holberton"}),
+                (f'User.update("{user_id}", {{"email": "a@b.c", '
+                 f'"age": 30}})', {"email": "a@b.c", "age": 30})):
+            with patch.object(storage, "write_file",
+                              wraps=storage.write_file) as write:
+                HBNBCommand().onecmd(command)
+            self.assertEqual(write.call_count, 1, msg=command)
+            with open(storage.fpa) as f:
+                saved = json.load(f)[f"User.{user_id}"]
+            for name, value in attrs.items():
+                self.assertEqual(saved[name], value, msg=command)
+
+    def create_places(self):
+        """creates places priced 0, 10, ... 40, returns their ids"""
+        ids = []
+        for i in range(5):
+            with patch('sys.stdout', new=io.StringIO()) as f:
+                HBNBCommand().onecmd("create Place")
+                ids.append(f.getvalue().strip())
+            HBNBCommand().onecmd(
+                f"update Place {ids[-1]} price_by_night {i * 10}")
+            HBNBCommand().onecmd(
+                f"update Place {ids[-1]} max_guest {i % 2}")
+        return ids
+
+    def output(self, command):
+        """returns the output of command"""
+        with patch('sys.stdout', new=io.StringIO()) as f:
+            HBNBCommand().onecmd(command)
+            return f.getvalue()
+
+    def test_all_streamed(self):
+        """`all` prints what printing the list would"""
+        self.create_places()
+        objs = storage.all("Place").values()
+        self.assertEqual(self.output("Place.all()"),
+                         f"{[str(v) for v in objs]}\n")
+        self.assertEqual(self.output("all"),
+                         f"{[str(v) for v in storage.all().values()]}\n")
+
+    def test_all_paged(self):
+        """`<class>.all(limit=, offset=, order_by=)` pages the instances"""
+        ids = self.create_places()
+        output = self.output('Place.all(order_by="-price_by_night", '
+                             'limit=2, offset=1)')
+        expected = [str(storage.get("Place", i)) for i in ids[3:1:-1]]
+        self.assertEqual(output, f"{expected}\n")
+        self.assertEqual(self.output("Place.all(limit=0)"), "[]\n")
+
+    def test_where(self):
+        """`<class>.where(name=value)` prints the matching instances"""
+        ids = self.create_places()
+        output = self.output('Place.where(max_guest=1, '
+                             'order_by="price_by_night")')
+        expected = [str(storage.get("Place", ids[1])),
+                    str(storage.get("Place", ids[3]))]
+        self.assertEqual(output, f"{expected}\n")
+        output = self.output(f'Place.where(id="{ids[4]}")')
+        self.assertEqual(output, f"{[str(storage.get('Place', ids[4]))]}\n")
+        self.assertEqual(self.output('User.where(max_guest=1)'), "[]\n")
+
+    def test_sort(self):
+        """`<class>.sort(names)` prints the instances in order"""
+        ids = self.create_places()
+        output = self.output('Place.sort("max_guest", "-price_by_night", '
+                             'limit=3)')
+        expected = [str(storage.get("Place", i)) for i in ids[4::-2]]
+        self.assertEqual(output, f"{expected}\n")
+
+    def test_sort_mixed_types(self):
+        """instances whose values have different types still sort"""
+        ids = self.create_places()
+        HBNBCommand().onecmd(f"update Place {ids[2]} name 5")
+        first = str(storage.get("Place", ids[2]))
+        self.assertEqual(self.output('Place.sort("name", limit=1)'),
+                         f"{[first]}\n")
+        self.assertEqual(self.output('Place.all(order_by="name", limit=1)'),
+                         f"{[first]}\n")
+        self.assertEqual(len(eval(self.output('Place.sort("-name")'))), 5)
+
+    def test_where_sort_invalid(self):
+        """bad options are an unknown syntax"""
+        for command in ('Place.all(limit=-1)', 'Place.all(offset="a")',
+                        'Place.sort()', 'Place.sort(1)',
+                        'Place.where("a", max_guest=1)',
+                        'Place.where(order_by=3)', 'Place.where(**a)',
+                        'Place.sort("name", size=2)'):
+            self.assertEqual(
+                self.output(command),
+                f"*** Unknown syntax: {command}\n", msg=command)
+
+    def test_options_other_commands(self):
+        """name=value options of the other commands are an unknown syntax"""
+        user_id = self.output("create User").strip()
+        for command in ('User.show(id="1")', 'User.count(a=1)',
+                        f'User.update("{user_id}", name="x")',
+                        f'User.destroy("{user_id}", a=1)'):
+            self.assertEqual(
+                self.output(command),
+                f"*** Unknown syntax: {command}\n", msg=command)
+        self.assertNotIn("name", storage.get("User", user_id).to_dict())
+
+    def test_options_not_one_call(self):
+        """options chaining calls are an unknown syntax"""
+        for command in ('User.show(1)(2)', 'User.show("a").x(1)',
+                        'User.all(limit=1, limit=2)'):
+            self.assertEqual(
+                self.output(command),
+                f"*** Unknown syntax: {command}\n", msg=command)
+
+    def run_batch(self, lines, checkpoint=0):
+        """runs lines in batch mode, returns the console, its output and
+        the number of files written"""
+        console = HBNBCommand()
+        with patch('sys.stdout', new=io.StringIO()) as f, \
+                patch.object(storage, "write_file",
+                             wraps=storage.write_file) as write:
+            console.run_batch(lines, checkpoint)
+        return console, f.getvalue(), write.call_count
+
+    def test_batch(self):
+        """a script saves once, at its end"""
+        console, output, writes = self.run_batch(
+            ["create User\n"] * 3 + ["create Nope\n", "User.count()\n"])
+        self.assertEqual(writes, 1)
+        self.assertEqual(console.errors, 1)
+        self.assertEqual(storage.count("User"), 3)
+        lines = output.split("(hbnb) ")
+        self.assertEqual(len(lines), 7)
+        self.assertRegex(lines[1], self.id_regex)
+        self.assertEqual(lines[4:], ["** class doesn't exist **\n", "3\n",
+                                     "\n"])
+        storage.reload()
+        self.assertEqual(storage.count("User"), 3)
+
+    def test_batch_quit(self):
+        """quit saves and stops the script"""
+        console, output, writes = self.run_batch(
+            ["create User", "quit", "create User"])
+        self.assertEqual(writes, 1)
+        self.assertEqual(console.errors, 0)
+        self.assertEqual(storage.count("User"), 1)
+
+    def test_batch_checkpoint(self):
+        """checkpoint saves every n commands"""
+        console, output, writes = self.run_batch(["create User"] * 5, 2)
+        self.assertEqual(writes, 3)
+        console, output, writes = self.run_batch(["show User 1"] * 2, 2)
+        self.assertEqual(writes, 0)
+        self.assertEqual(console.errors, 2)
+
+    def test_batch_exit_code(self):
+        """main() returns 1 when a command of a script failed"""
+        from console import main
+        for script, code in (("create User\n", 0), ("show User\n", 1),
+                             ("Nope\n", 1), ("User.all(\n", 1)):
+            for argv in ([], ["--batch"]):
+                with patch('sys.stdin', new=io.StringIO(script)), \
+                        patch('sys.stdout', new=io.StringIO()):
+                    self.assertEqual(main(argv), code, msg=script)
+
+    def test_export_import(self):
+        """export writes the instances of a class, import reads them back
+        with a single save"""
+        self.create_places()
+        self.output("create User")
+        places = {k: v.to_dict() for (k, v) in storage.all("Place").items()}
+        for path in ("test_console_bulk.csv", "test_console_bulk.ndjson"):
+            try:
+                self.assertEqual(self.output(f"export Place {path}"), "5\n")
+                for key in list(storage.all("Place")):
+                    storage.delete(storage.all()[key])
+                with patch.object(storage, "write_file",
+                                  wraps=storage.write_file) as write:
+                    self.assertEqual(self.output(f"import Place {path}"),
+                                     "5\n")
+                self.assertEqual(write.call_count, 1)
+                self.assertEqual(
+                    {k: v.to_dict()
+                     for (k, v) in storage.all("Place").items()}, places)
+                # the csv header is line 1
+                first = 2 if path.endswith(".csv") else 1
+                self.assertEqual(
+                    self.output(f"import User {path}"),
+                    "".join(f"** line {i}: Place object in a User file **\n"
+                            for i in range(first, first + 5)) + "0\n")
+            finally:
+                if os.path.exists(path):
+                    os.remove(path)
+        self.assertEqual(storage.count("User"), 1)
+
+    def test_import_export_invalid(self):
+        """missing arguments and files print an error"""
+        for command, error in (
+                ("import", "** class name missing **"),
+                ("export Nope a.csv", "** class doesn't exist **"),
+                ("import User", "** file name missing **"),
+                ("export User ", "** file name missing **"),
+                ("import User test_no_file.csv",
+                 "** can't read test_no_file.csv: No such file or "
+                 "directory **"),
+                ("export User no_dir/a.csv",
+                 "** can't write no_dir/a.csv: No such file or "
+                 "directory **")):
+            self.assertEqual(self.output(command), error + "\n")
+
+    def test_import_unreadable(self):
+        """files that aren't UTF-8 or valid CSV print an error and import
+        nothing"""
+        path = "test_console_bad.csv"
+        self.output("create User")
+        count = storage.count()
+        try:
+            for content, error in (
+                    (b'{"name": "\xff"}\n', "not UTF-8 text"),
+                    (b'name\n"' + b"a" * 200000 + b'"\n',
+                     "field larger than field limit (131072)")):
+                with open(path, "wb") as f:
+                    f.write(content)
+                self.assertEqual(self.output(f"import User {path}"),
+                                 f"** can't read {path}: {error} **\n")
+                self.assertEqual(storage.count(), count)
+        finally:
+            os.remove(path)
@@ -105,3 +105,19 @@ class TestBaseModelMethods(unittest.TestCase):
         self.assertNotEqual(temp, self.b_obj1.updated_at)
         self.assertLess(temp, self.b_obj1.updated_at)
         self.assertNotEqual(self.b_obj1.updated_at, self.b_obj1.created_at)
+
+    def test_from_record(self):
+        """from_record makes what the constructor makes from to_dict()"""
+        from models.place import Place
+        self.b_obj1.name = "My first base class"
+        self.b_obj1.ids = [1, 2]
+        for cls, record in ((BaseModel, self.b_obj1.to_dict()),
+                            (Place, Place(**self.b_obj1.to_dict()
+                                          ).to_dict())):
+            obj = cls.from_record(record)
+            expected = cls(**record)
+            self.assertIs(type(obj), cls)
+            self.assertEqual(list(vars(obj).items()),
+                             list(vars(expected).items()))
+            self.assertEqual(str(obj), str(expected))
+            self.assertEqual(obj.to_dict(), record)
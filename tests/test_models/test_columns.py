@@ -0,0 +1,192 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""Testing the columnar store"""
+
+import gc
+import os
+import unittest
+from unittest.mock import patch
+from models import columns
+from models.base_model import BaseModel
+from models.columns import RowView, Table
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.user import User
+
+
+class TestColumns(unittest.TestCase):
+    """Test the tables and row views"""
+
+    def setUp(self):
+        """saves places then reloads them in columnar mode"""
+        self.storage = FileStorage()
+        self.storage.fpa = "test_columns.json"
+        self.storage.load_objects({})
+        self.patch = patch("models.base_model.storage", self.storage)
+        self.patch.start()
+        self.places = []
+        for i in range(20):
+            place = Place()
+            place.name = f"place {i}"
+            place.price_by_night = i * 10
+            place.max_guest = i % 4
+            self.places.append(place)
+        self.odd = self.places[-1]
+        self.odd.price_by_night = "free"
+        self.odd.latitude = 1.5
+        User().save()
+        self.storage.columnar = True
+        self.storage.reload()
+        self.table = self.storage.table(Place)
+
+    def tearDown(self):
+        """removes the file"""
+        self.patch.stop()
+        if os.path.exists("test_columns.json"):
+            os.remove("test_columns.json")
+
+    def view(self, place):
+        """returns the view storage holds for place"""
+        return self.storage.get(Place, place.id)
+
+    def test_row_views(self):
+        """reloaded objects are row views giving the same output"""
+        for place in self.places:
+            view = self.view(place)
+            self.assertIs(type(view), RowView)
+            self.assertIsInstance(view, Place)
+            self.assertIsInstance(view, BaseModel)
+            same = Place(**place.to_dict())
+            self.assertEqual(view.to_dict(), same.to_dict())
+            self.assertEqual(str(view), str(same))
+        self.assertEqual(self.view(self.odd).number_rooms, 0)
+        self.assertEqual(len(self.table), 20)
+        self.assertEqual(len(self.storage.table("User")), 1)
+
+    def test_columns(self):
+        """values are kept in typed columns, misfits in the overflow"""
+        price = self.table.columns["price_by_night"]
+        self.assertEqual(price.values.typecode, "q")
+        self.assertEqual(self.table.columns["created_at"].values.typecode,
+                         "q")
+        self.assertEqual(self.table.columns["latitude"].values.typecode,
+                         "d")
+        row = self.view(self.odd)._row
+        self.assertEqual(price.overflow, {row})
+        self.assertEqual(self.table.extra[row], {"price_by_night": "free"})
+
+    def test_where(self):
+        """filters run over the columns"""
+        selection = self.table.where("max_guest", "==", 1)
+        self.assertEqual(len(selection), 5)
+        self.assertEqual(
+            set(selection.objects()),
+            {f"Place.{p.id}" for p in self.places if p.max_guest == 1})
+        selection = selection.where("price_by_night", ">", 100)
+        self.assertEqual(sorted(selection.values("price_by_night")),
+                         [130, 170])
+        self.assertEqual(len(self.table.where("price_by_night", "<", 5)), 1)
+        self.assertEqual(
+            len(self.table.where("price_by_night", "==", "free")), 1)
+        self.assertEqual(len(self.table.where("name", "==", "place 3")), 1)
+        self.assertEqual(len(self.table.where("pool", "==", True)), 0)
+
+    def test_aggregates(self):
+        """aggregates skip the values that aren't numbers"""
+        selection = self.table.select()
+        self.assertEqual(selection.sum("price_by_night"), sum(range(19)) * 10)
+        self.assertEqual(selection.mean("price_by_night"), 90)
+        self.assertEqual(selection.min("price_by_night"), 0)
+        self.assertEqual(selection.max("price_by_night"), 180)
+        self.assertEqual(selection.sum("latitude"), 1.5)
+        empty = self.table.where("max_guest", ">", 10)
+        self.assertEqual(empty.sum("price_by_night"), 0)
+        self.assertIsNone(empty.mean("price_by_night"))
+
+    def test_writes(self):
+        """setting, creating and deleting objects updates the table"""
+        view = self.view(self.places[0])
+        view.price_by_night = 1000
+        self.assertIn(f"Place.{view.id}", self.storage.all().dirty)
+        self.assertEqual(self.table.select().max("price_by_night"), 1000)
+        place = Place()
+        place.price_by_night = 5000
+        self.assertEqual(
+            self.table.where("price_by_night", ">", 1000).objects(),
+            {f"Place.{place.id}": place})
+        self.storage.delete(place)
+        self.storage.delete(view)
+        self.assertEqual(len(self.table), 19)
+        self.assertEqual(self.table.select().max("price_by_night"), 180)
+        del view.price_by_night
+        self.assertEqual(view.price_by_night, 0)
+
+    def test_rows_reused(self):
+        """the rows of deleted objects are reused once no view reads them"""
+        rows = len(self.table.orders)
+        held = self.view(self.places[0])
+        self.storage.delete(held)
+        self.storage.delete(self.view(self.places[1]))
+        self.storage.delete(self.view(self.places[2]))
+        gc.collect()
+        self.assertEqual(len(self.table.free), 2)
+        for i in range(3):
+            place = Place()
+            place.name = f"new {i}"
+        self.assertEqual(len(self.table.orders), rows + 1)
+        self.assertEqual(held.name, "place 0")
+        self.assertEqual(len(self.table), 20)
+        self.assertEqual(len(self.table.where("name", "==", "new 1")), 1)
+        self.assertEqual(self.table.where("name", "==", "new 1").values(
+            "price_by_night"), [0])
+
+    def test_write_changed_attribute(self):
+        """setting an attribute of a mirrored instance only writes it"""
+        place = Place()
+        place.name = "mirrored"
+        with patch.object(Table, "sync", autospec=True) as sync:
+            place.max_guest = 9
+            place.city_id = "city"
+            del place.name
+        sync.assert_not_called()
+        row = self.table.rows[place.id]
+        self.assertEqual(self.table.state(row), vars(place))
+        self.assertEqual(len(self.table.where("max_guest", "==", 9)), 1)
+
+    def test_save_reload(self):
+        """changes made through views are saved"""
+        view = self.view(self.places[1])
+        view.name = "renamed"
+        view.pool = True
+        view.save()
+        self.storage.reload()
+        view = self.view(self.places[1])
+        self.assertEqual(view.name, "renamed")
+        self.assertTrue(view.pool)
+
+    def test_rollback(self):
+        """a failed batch puts the rows back"""
+        view = self.view(self.places[2])
+        with self.assertRaises(KeyError):
+            with self.storage.batch():
+                view.price_by_night = 999
+                Place().price_by_night = 999
+                raise KeyError
+        self.assertEqual(view.price_by_night, 20)
+        self.assertEqual(len(self.table.where("price_by_night", "==", 999)),
+                         0)
+        self.assertEqual(len(self.table), 20)
+
+    def test_table_of_objects(self):
+        """out of columnar mode, tables are made from the objects"""
+        self.storage.columnar = False
+        self.storage.reload()
+        table = self.storage.table(Place)
+        self.assertIsNot(table, self.storage.table(Place))
+        self.assertEqual(len(table.where("max_guest", "==", 1)), 5)
+
+    def test_without_numpy(self):
+        """filters and aggregates work without NumPy"""
+        with patch.object(columns, "numpy", None):
+            self.test_where()
+            self.test_aggregates()
@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""Testing the compact classes"""
+
+import os
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+from models.amenity import Amenity
+from models.base_model import BaseModel
+from models.city import City
+from models.compact import compact_class, pack_time, unpack_time
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+
+
+class TestCompact(unittest.TestCase):
+    """Test the compact classes"""
+
+    def setUp(self):
+        """creates the engine"""
+        self.storage = FileStorage()
+        self.storage.fpa = "test_compact.json"
+        self.storage.load_objects({})
+        self.patch = patch("models.base_model.storage", self.storage)
+        self.patch.start()
+
+    def tearDown(self):
+        """removes the file"""
+        self.patch.stop()
+        if os.path.exists("test_compact.json"):
+            os.remove("test_compact.json")
+
+    def pair(self, cls):
+        """returns an instance of cls and its compact copy"""
+        obj = cls()
+        obj.name = "Bétty"
+        obj.number = 3
+        compact = compact_class(cls)(**obj.to_dict())
+        return obj, compact
+
+    def test_same_output(self):
+        """to_dict() and str() are the same as the model class"""
+        for cls in (BaseModel, User, Place, City, State, Amenity, Review):
+            obj, compact = self.pair(cls)
+            same = cls(**obj.to_dict())
+            self.assertEqual(compact.to_dict(), same.to_dict())
+            self.assertEqual(str(compact), str(same))
+
+    def test_new_instance(self):
+        """a new compact instance is stored like a model instance"""
+        user = compact_class(User)()
+        self.assertIs(self.storage.get(User, user.id), user)
+        self.assertEqual(list(user.to_dict()),
+                         ["id", "created_at", "updated_at", "__class__"])
+
+    def test_class(self):
+        """compact instances pass for instances of their model class"""
+        review = compact_class(Review)()
+        self.assertIsInstance(review, Review)
+        self.assertIsInstance(review, BaseModel)
+        self.assertEqual(review.__class__.__name__, "Review")
+        self.assertIs(compact_class(Review), type(review))
+
+    def test_no_dict(self):
+        """attributes live in slots, UUIDs and dates are packed"""
+        review = compact_class(Review)()
+        review.place_id = Place().id
+        review.text = "nice"
+        self.assertFalse(hasattr(type(review), "__weakref__"))
+        self.assertIsNone(review._extra)
+        self.assertIsInstance(review._id, bytes)
+        self.assertEqual(len(review._place_id), 16)
+        self.assertIsInstance(review._created_at, int)
+        self.assertEqual(review.text, "nice")
+
+    def test_defaults(self):
+        """unset attributes read the model class"""
+        place = compact_class(Place)()
+        self.assertEqual(place.number_rooms, 0)
+        self.assertEqual(place.city_id, "")
+        self.assertEqual(place.amenity_ids, [])
+        self.assertEqual(place.foreign_keys, ("city_id", "user_id"))
+
+    def test_overflow(self):
+        """ad-hoc attributes and unpackable values go to the overflow"""
+        state = compact_class(State)()
+        state.code = "CA"
+        state.id = "1"
+        self.assertEqual(state._extra, {"code": "CA", "id": "1"})
+        self.assertEqual(state.id, "1")
+        self.assertEqual(state.code, "CA")
+        del state.code
+        self.assertNotIn("code", state.to_dict())
+        with self.assertRaises(AttributeError):
+            state.code
+
+    def test_shared_order(self):
+        """instances set alike share the tuple of their attribute names"""
+        one, two = compact_class(City)(), compact_class(City)()
+        self.assertIs(one._order, two._order)
+
+    def test_times(self):
+        """times are packed to the microsecond, aware ones are kept"""
+        now = datetime.now()
+        self.assertEqual(unpack_time(pack_time(now)), now)
+        self.assertIsNone(pack_time(datetime.now(timezone.utc)))
+        self.assertIsNone(pack_time("2020-01-01"))
+
+    def test_touch(self):
+        """setting an attribute marks the instance as changed"""
+        user = compact_class(User)()
+        self.storage.save()
+        user.email = "a@b.c"
+        self.assertEqual(self.storage.all().dirty,
+                         {f"User.{user.id}"})
+
+    def test_storage(self):
+        """storage in compact mode reloads compact instances"""
+        user = User()
+        user.email = "a@b.c"
+        user.save()
+        self.storage.compact_instances = True
+        self.storage.reload()
+        loaded = self.storage.get(User, user.id)
+        self.assertIs(type(loaded), compact_class(User))
+        self.assertEqual(str(loaded), str(User(**user.to_dict())))
+        self.assertIs(type(self.storage.model_class(User)()),
+                      compact_class(User))
@@ -0,0 +1,228 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+""" Test the asyncio facade of the engines """
+import asyncio
+import io
+import threading
+import time
+import unittest
+from collections.abc import Mapping
+from unittest.mock import patch
+from models.engine.async_storage import AsyncStorage
+from models.engine.concurrency import RWLock
+from models.engine.file_storage import FileStorage
+from models.engine.lazy_object import LazyObject
+from models.user import User
+
+PATH = "test_async.json"
+DELAY = 0.1
+
+
+class SlowFS:
+    """Files kept in memory, every read and write taking DELAY seconds
+    Attributes:
+    - files: path -> content
+    - writes: number of files written
+    - threads: names of the threads that used the files
+    """
+
+    def __init__(self):
+        """Initialize an empty file system"""
+        self.files = {}
+        self.writes = 0
+        self.threads = set()
+
+    def open(self, path, mode="r", **kwargs):
+        """opens a file for reading"""
+        self.wait()
+        if path not in self.files:
+            raise FileNotFoundError(path)
+        return io.BytesIO(self.files[path])
+
+    def write_file(self, path, data):
+        """replaces the content of path, see FileStorage.write_file"""
+        self.wait()
+        self.files[path] = data if isinstance(data, bytes) else data.encode()
+        self.writes += 1
+
+    def wait(self):
+        """takes DELAY seconds, like a slow disk"""
+        self.threads.add(threading.current_thread().name)
+        time.sleep(DELAY)
+
+
+class TestAsyncStorage(unittest.TestCase):
+    """ AsyncStorage test cases """
+
+    def setUp(self):
+        """creates an engine on a slow file system"""
+        self.fs = SlowFS()
+        self.storage = FileStorage()
+        self.storage.fpa = PATH
+        self.storage.load_objects({})
+        self.patches = [
+            patch("models.base_model.storage", self.storage),
+            patch("models.engine.file_storage.open", self.fs.open,
+                  create=True),
+            patch.object(self.storage, "write_file", self.fs.write_file)]
+        for p in self.patches:
+            p.start()
+        self.astorage = AsyncStorage(self.storage)
+
+    def tearDown(self):
+        """stops the patches"""
+        for p in self.patches:
+            p.stop()
+
+    def run_loop(self, coroutine):
+        """runs coroutine in a new loop, then closes the facade"""
+        async def main():
+            try:
+                return await coroutine
+            finally:
+                await self.astorage.close()
+        return asyncio.run(main())
+
+    async def ticking(self, coroutine):
+        """returns the result of coroutine and the number of times the
+        loop ran another task in the meantime"""
+        ticks = 0
+        task = asyncio.ensure_future(coroutine)
+        while not task.done():
+            ticks += 1
+            await asyncio.sleep(DELAY / 10)
+        return task.result(), ticks
+
+    def test_lock(self):
+        """the engine gets a readers/writer lock"""
+        self.assertIsInstance(self.storage.lock, RWLock)
+
+    def test_save_off_loop(self):
+        """the loop runs other tasks while the file is written"""
+        User()
+        _, ticks = self.run_loop(self.ticking(self.astorage.save()))
+        self.assertGreater(ticks, 3)
+        self.assertEqual(self.fs.writes, 1)
+        self.assertNotIn("MainThread", self.fs.threads)
+        self.assertIn(PATH, self.fs.files)
+
+    def test_save_coalesced(self):
+        """saves awaited together make at most two writes, the last one
+        with every change"""
+        async def main():
+            users = []
+            saves = []
+            for _ in range(10):
+                users.append(User())
+                saves.append(asyncio.ensure_future(self.astorage.save()))
+                await asyncio.sleep(0)
+            await asyncio.gather(*saves)
+            return users
+
+        users = self.run_loop(main())
+        self.assertLessEqual(self.fs.writes, 2)
+        self.assertEqual(self.astorage.writes, self.fs.writes)
+        storage = FileStorage()
+        storage.fpa = PATH
+        with patch("models.base_model.storage", storage):
+            storage.reload()
+        self.assertEqual(set(storage.all()),
+                         {f"User.{u.id}" for u in users})
+
+    def test_save_after_write(self):
+        """a save asked for during a write waits for the next write"""
+        async def main():
+            first = asyncio.ensure_future(self.astorage.save())
+            await asyncio.sleep(DELAY / 2)
+            user = User()
+            await self.astorage.save()
+            self.assertTrue(first.done())
+            return user
+
+        user = self.run_loop(main())
+        self.assertEqual(self.fs.writes, 2)
+        self.assertIn(user.id.encode(), self.fs.files[PATH])
+
+    def test_save_error(self):
+        """every await of a failed write gets its exception"""
+        def fail(path, data):
+            self.fs.wait()
+            raise OSError("disk full")
+
+        async def main():
+            results = await asyncio.gather(
+                self.astorage.save(), self.astorage.save(),
+                return_exceptions=True)
+            await self.astorage.save()
+            return results
+
+        with patch.object(self.storage, "write_file", fail):
+            with self.assertRaises(OSError):
+                self.run_loop(main())
+
+        async def both():
+            return await asyncio.gather(
+                self.astorage.save(), self.astorage.save(),
+                return_exceptions=True)
+
+        self.astorage = AsyncStorage(self.storage)
+        with patch.object(self.storage, "write_file", fail):
+            results = self.run_loop(both())
+        self.assertEqual([type(r) for r in results], [OSError, OSError])
+
+    def test_reload_get_query(self):
+        """reload, get, all and query read off the loop"""
+        users = [User() for _ in range(3)]
+        for user, name in zip(users, ("b", "a", "c")):
+            user.first_name = name
+        self.storage.save()
+        self.storage.lazy = True
+
+        async def main():
+            _, ticks = await self.ticking(self.astorage.reload())
+            self.assertGreater(ticks, 3)
+            user = await self.astorage.get(User, users[0].id)
+            self.assertIs(type(user), User)
+            self.assertEqual(user.first_name, "b")
+            self.assertIsNone(await self.astorage.get("User", "nope"))
+            self.assertEqual(len(await self.astorage.all(User)), 3)
+            query = self.astorage.query("User").order_by("first_name")
+            found = await query.all()
+            self.assertEqual([u.first_name for u in found], ["a", "b", "c"])
+            self.assertNotIn(LazyObject, [type(u) for u in found])
+            self.assertEqual(
+                await query.only("first_name").limit(1).all(),
+                [{"first_name": "a"}])
+            self.assertEqual(
+                (await query.where(first_name="c").first()).id,
+                users[2].id)
+            self.assertEqual(await query.where("first_name", ">", "a")
+                             .offset(1).count(), 2)
+
+        self.run_loop(main())
+
+    def test_all_copied_locked(self):
+        """all() copies the objects while holding the read lock"""
+        lock = self.storage.lock
+        users = {f"User.{i}": User() for i in range(3)}
+
+        class Objects(Mapping):
+            """objects checking the lock is held when read"""
+
+            def __getitem__(self, key):
+                """returns the object of key"""
+                assert threading.get_ident() in lock._readers
+                return users[key]
+
+            def __iter__(self):
+                """iterates over the keys"""
+                assert threading.get_ident() in lock._readers
+                return iter(users)
+
+            def __len__(self):
+                """returns the number of objects"""
+                return len(users)
+
+        with patch.object(self.storage, "all", return_value=Objects()):
+            self.assertEqual(self.run_loop(self.astorage.all()), users)
+
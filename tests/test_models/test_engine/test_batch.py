@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+""" Test batched saves of the storage engines """
+import unittest
+import json
+import os
+from unittest.mock import patch
+from console import HBNBCommand
+from models import storage
+from models.base_model import BaseModel
+from models.engine.journal_storage import JournalStorage
+from models.review import Review
+from models.user import User
+
+
+class TestBatch(unittest.TestCase):
+    """ storage.batch() test cases """
+
+    def setUp(self):
+        """ setup """
+        self.storage = storage
+        self.storage.fpa = "test_batch_db.json"
+        self.storage.reload()
+        self.user = User()
+        self.user.first_name = "Betty"
+        self.review = Review()
+        self.review.place_id = "first"
+        self.storage.save()
+
+    def tearDown(self):
+        """ teardown """
+        if (os.path.isfile(self.storage.fpa)):
+            os.remove(self.storage.fpa)
+
+    def saved(self):
+        """returns the content of the file"""
+        with open(self.storage.fpa) as f:
+            return json.load(f)
+
+    def test_one_save(self):
+        """saves in the block are written once at its end"""
+        with patch.object(self.storage, "write_file",
+                          wraps=self.storage.write_file) as write_file:
+            with self.storage.batch():
+                for name in ("a", "b", "c"):
+                    self.user.first_name = name
+                    self.user.save()
+                with self.storage.transaction():
+                    self.storage.save()
+                write_file.assert_not_called()
+            write_file.assert_called_once()
+        key = f"User.{self.user.id}"
+        self.assertEqual(self.saved()[key]["first_name"], "c")
+
+    def test_no_save(self):
+        """nothing is written if the block doesn't save"""
+        with patch.object(self.storage, "write_file") as write_file:
+            with self.storage.batch():
+                self.user.first_name = "unsaved"
+            write_file.assert_not_called()
+
+    def test_rollback(self):
+        """changes made in a failing block are undone"""
+        gone_key = f"Review.{self.review.id}"
+        with self.assertRaises(KeyError):
+            with self.storage.batch():
+                self.user.first_name = "Holberton"
+                self.user.last_name = "School"
+                self.user.save()
+                new = BaseModel()
+                self.storage.delete(self.review)
+                raise KeyError("boom")
+        self.assertEqual(self.user.first_name, "Betty")
+        self.assertNotIn("last_name", vars(self.user))
+        self.assertNotIn(f"BaseModel.{new.id}", self.storage.all())
+        self.assertIs(self.storage.all()[gone_key], self.review)
+        self.assertEqual(
+            self.storage.by_ref(Review, "place_id", "first"),
+            {gone_key: self.review})
+        with patch.object(self.storage, "write_file") as write_file:
+            self.storage.save()
+            write_file.assert_called_once()
+            self.assertEqual(
+                json.loads(write_file.call_args[0][1]), self.saved())
+
+    def test_rollback_unsaved(self):
+        """changes made before the block are kept by a rollback"""
+        self.review.place_id = "second"
+        with self.assertRaises(ValueError):
+            with self.storage.batch():
+                self.review.place_id = "third"
+                raise ValueError()
+        self.assertEqual(self.review.place_id, "second")
+        self.assertEqual(
+            list(self.storage.by_ref(Review, "place_id", "second")),
+            [f"Review.{self.review.id}"])
+        self.storage.save()
+        self.assertEqual(
+            self.saved()[f"Review.{self.review.id}"]["place_id"], "second")
+
+    def test_journal_batch(self):
+        """JournalStorage appends once per batch"""
+        engine = JournalStorage()
+        engine.fpa = "test_batch_journal.json"
+        engine.reload()
+        try:
+            with patch("models.base_model.storage", engine):
+                with engine.batch():
+                    for _ in range(3):
+                        BaseModel().save()
+            with open(engine.journal_path) as f:
+                self.assertEqual(len(f.readlines()), 3)
+            with patch.object(engine, "append") as append:
+                with patch("models.base_model.storage", engine):
+                    with engine.batch():
+                        BaseModel().save()
+                        BaseModel().save()
+                append.assert_called_once()
+        finally:
+            os.remove(engine.journal_path)
+
+    def test_console_dict_update(self):
+        """updating from a dictionary saves once"""
+        with patch.object(self.storage, "write_file",
+                          wraps=self.storage.write_file) as write_file:
+            HBNBCommand().onecmd(
+                f'User.update("{self.user.id}", '
+                '{"first_name": "John", "age": 89})')
+            write_file.assert_called_once()
+        saved = self.saved()[f"User.{self.user.id}"]
+        self.assertEqual(saved["first_name"], "John")
+        self.assertEqual(saved["age"], 89)
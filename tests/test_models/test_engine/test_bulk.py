@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+""" Test the rows read and written by import and export """
+import os
+import unittest
+from models.engine.bulk import make_record, read_rows, row_format, write_rows
+from models.place import Place
+
+
+class TestBulk(unittest.TestCase):
+    """ bulk rows test cases """
+
+    records = [
+        {"id": "1", "created_at": "2023-02-12T12:25:43.990292",
+         "updated_at": "2023-02-12T12:25:43.990314", "__class__": "Place",
+         "name": "a, \"b\"", "max_guest": 2, "amenity_ids": ["x", "y"]},
+        {"id": "2", "created_at": "2023-02-12T12:25:43.990292",
+         "updated_at": "2023-02-12T12:25:43.990314", "__class__": "Place",
+         "note": "n"},
+    ]
+
+    def tearDown(self):
+        """removes the files"""
+        for path in ("test_bulk.csv", "test_bulk.ndjson"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def round_trip(self, path):
+        """writes the records to path and reads them back"""
+        write_rows(path, self.records)
+        typed = row_format(path) != "csv"
+        return [make_record(Place, row, typed)
+                for (_, row) in read_rows(path)]
+
+    def test_round_trip(self):
+        """both formats read back what they write"""
+        self.assertEqual(self.round_trip("test_bulk.ndjson"), self.records)
+        self.assertEqual(self.round_trip("test_bulk.csv"), self.records)
+
+    def test_format(self):
+        """the format is picked by the extension"""
+        self.assertEqual(row_format("a/b.CSV"), "csv")
+        self.assertEqual(row_format("b.jsonl"), "ndjson")
+        self.assertEqual(row_format("b.csv.json"), "ndjson")
+
+    def test_bad_lines(self):
+        """lines that aren't objects are read as None"""
+        with open("test_bulk.ndjson", "w") as f:
+            f.write('{"id": "1"}\n\n[1]\n{"id": \n')
+        self.assertEqual(list(read_rows("test_bulk.ndjson")),
+                         [(1, {"id": "1"}), (3, None), (4, None)])
+        with open("test_bulk.csv", "w") as f:
+            f.write('id,name\n1,a\n2\n3,b,c\n4,\n')
+        self.assertEqual(list(read_rows("test_bulk.csv")),
+                         [(2, {"id": "1", "name": "a"}), (3, None),
+                          (4, None), (5, {"id": "4"})])
+
+    def test_make_record(self):
+        """rows are checked and completed"""
+        record = make_record(Place, {"name": "a"})
+        self.assertEqual(record["__class__"], "Place")
+        self.assertEqual(len(record["id"]), 36)
+        self.assertEqual(record["created_at"], record["updated_at"])
+        self.assertEqual(make_record(Place, {"max_guest": "3"})["max_guest"],
+                         3)
+        self.assertEqual(
+            make_record(Place, {"max_guest": "3"}, True)["max_guest"], "3")
+        for row in ({"__class__": "User"}, {"max_guest": "x"},
+                    {"id": 1}, {"id": ""}, {"created_at": "x"},
+                    {"updated_at": None}):
+            with self.assertRaises(ValueError, msg=row):
+                make_record(Place, row)
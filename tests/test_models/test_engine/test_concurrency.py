@@ -0,0 +1,241 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+""" Test the thread safe mode of the engines """
+import os
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from models.engine.concurrency import RWLock
+from models.engine.file_storage import FileStorage
+from models.engine.journal_storage import JournalStorage
+from models.engine.sqlite_storage import SQLiteStorage
+from models.user import User
+
+
+class TestRWLock(unittest.TestCase):
+    """ RWLock test cases """
+
+    def run_thread(self, target):
+        """starts target in a thread, returns the thread"""
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        return thread
+
+    def test_readers_share(self):
+        """readers hold the lock at the same time, writers wait"""
+        lock = RWLock()
+        inside = threading.Barrier(2, timeout=5)
+        wrote = threading.Event()
+
+        def read():
+            with lock.reading():
+                inside.wait()
+
+        def write():
+            with lock.writing():
+                wrote.set()
+
+        with lock.reading():
+            reader = self.run_thread(read)
+            inside.wait()
+            writer = self.run_thread(write)
+            self.assertFalse(wrote.wait(0.05))
+        reader.join()
+        self.assertTrue(wrote.wait(5))
+        writer.join()
+
+    def test_writer_alone(self):
+        """a writer excludes the readers, and may read itself"""
+        lock = RWLock()
+        read = threading.Event()
+
+        def reader():
+            with lock.reading():
+                read.set()
+
+        with lock.writing():
+            with lock.writing(), lock.reading():
+                pass
+            thread = self.run_thread(reader)
+            self.assertFalse(read.wait(0.05))
+        self.assertTrue(read.wait(5))
+        thread.join()
+
+    def test_reentrant_reader(self):
+        """a reader reads again while a writer waits"""
+        lock = RWLock()
+        with lock.reading():
+            thread = self.run_thread(lambda: lock.writing().__enter__())
+            time.sleep(0.02)
+            with lock.reading():
+                pass
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+
+class TestNotThreadable(unittest.TestCase):
+    """ engines without the thread safe mode """
+
+    def test_sqlite(self):
+        """SQLiteStorage refuses the thread safe mode"""
+        storage = SQLiteStorage()
+        storage.threadsafe = False
+        with self.assertRaises(ValueError):
+            storage.threadsafe = True
+        self.assertFalse(storage.threadsafe)
+
+
+class TestThreadSafeStorage(unittest.TestCase):
+    """ thread safe engine test cases """
+
+    engine = FileStorage
+    path = "test_threads.json"
+
+    def setUp(self):
+        """creates the engine"""
+        self.storage = self.engine()
+        self.storage.fpa = self.path
+        self.storage.flush_interval = 20
+        self.storage.load_objects({})
+        self.patch = patch("models.base_model.storage", self.storage)
+        self.patch.start()
+        self.storage.threadsafe = True
+
+    def tearDown(self):
+        """stops the engine and removes its files"""
+        self.storage.threadsafe = False
+        self.patch.stop()
+        for path in (self.path, self.path + ".journal"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def reloaded(self):
+        """returns the keys found in the files"""
+        storage = self.engine()
+        storage.fpa = self.path
+        with patch("models.base_model.storage", storage):
+            storage.reload()
+        return set(storage.all())
+
+    def test_save_in_background(self):
+        """save() doesn't wait for the disk, saves are gathered"""
+        write_file = self.storage.write_file
+
+        def slow_write(path, data):
+            time.sleep(0.5)
+            write_file(path, data)
+
+        with patch.object(self.storage, "write_file",
+                          side_effect=slow_write) as write:
+            start = time.monotonic()
+            users = [User() for _ in range(50)]
+            for user in users:
+                user.save()
+            self.assertLess(time.monotonic() - start, 0.5)
+            self.storage.wait_saved()
+        self.assertLessEqual(write.call_count, 2)
+        self.assertEqual(self.reloaded(),
+                         {f"User.{user.id}" for user in users})
+
+    def test_threads(self):
+        """threads create, change, delete and list objects together"""
+        errors = []
+
+        def work():
+            try:
+                for _ in range(100):
+                    user = User()
+                    user.name = "Betty"
+                    user.save()
+                    for obj in self.storage.all().values():
+                        str(obj)
+                    self.storage.delete(User())
+                    self.storage.save()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.storage.wait_saved()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.storage.count(), 400)
+        self.assertEqual(self.reloaded(), set(self.storage.all()))
+
+    def test_all_snapshot(self):
+        """all() can be iterated while objects are added"""
+        User()
+        objs = self.storage.all()
+        for _ in objs:
+            User()
+        self.assertEqual(len(objs), 1)
+        self.assertEqual(self.storage.count(), 2)
+
+    def test_batch(self):
+        """a batch is saved once, by the background thread"""
+        with patch.object(self.storage, "write_file",
+                          wraps=self.storage.write_file) as write:
+            with self.storage.batch():
+                for _ in range(3):
+                    User().save()
+            self.storage.wait_saved()
+        self.assertEqual(write.call_count, 1)
+        self.assertEqual(len(self.reloaded()), 3)
+
+    def test_error(self):
+        """the error of a background save is raised by wait_saved()"""
+        with patch.object(self.storage, "write_file",
+                          side_effect=OSError("disk full")), \
+                patch("traceback.print_exc"):
+            User().save()
+            with self.assertRaises(OSError):
+                self.storage.wait_saved()
+        self.storage.wait_saved()
+
+    def test_off(self):
+        """leaving the mode saves what was asked for"""
+        user = User()
+        user.save()
+        self.storage.threadsafe = False
+        self.assertEqual(self.reloaded(), {f"User.{user.id}"})
+        self.assertIs(self.storage.all(), self.storage.all())
+
+
+class TestThreadSafeJournalStorage(TestThreadSafeStorage):
+    """ thread safe journal engine test cases """
+
+    engine = JournalStorage
+
+    def test_save_in_background(self):
+        """save() doesn't wait for the disk"""
+        with patch.object(self.storage, "append",
+                          wraps=self.storage.append) as append:
+            users = [User() for _ in range(50)]
+            for user in users:
+                user.save()
+            self.storage.wait_saved()
+        self.assertLessEqual(append.call_count, 2)
+        self.assertEqual(self.reloaded(),
+                         {f"User.{user.id}" for user in users})
+
+    def test_batch(self):
+        """a batch is saved once, by the background thread"""
+        with patch.object(self.storage, "append",
+                          wraps=self.storage.append) as append:
+            with self.storage.batch():
+                for _ in range(3):
+                    User().save()
+            self.storage.wait_saved()
+        self.assertEqual(append.call_count, 1)
+
+    def test_error(self):
+        """the error of a background save is raised by wait_saved()"""
+        with patch.object(self.storage, "append",
+                          side_effect=OSError("disk full")), \
+                patch("traceback.print_exc"):
+            User().save()
+            with self.assertRaises(OSError):
+                self.storage.wait_saved()
@@ -4,8 +4,13 @@
 import unittest
 import json
 import os
+import time
+from unittest.mock import patch
 from models.engine.file_storage import FileStorage
 from models.base_model import BaseModel
+from models.user import User
+from models.place import Place
+from models.review import Review
 from models import storage
 
 
@@ -100,6 +105,31 @@ class TestEngine(unittest.TestCase):
         self.assertEqual(
             cm.exception.args[0], "Argument isnt a subclass of BaseModel")
 
+    def test_new_no_serialization(self):
+        """creating an object doesn't serialize it"""
+        with patch.object(User, "to_dict", side_effect=AssertionError):
+            user = User()
+            self.storage.new(user)
+            self.storage.new_many([user, Place()])
+        self.assertIs(self.storage.get(User, user.id), user)
+        self.assertEqual(user.to_dict()["__class__"], "User")
+
+    def test_new_many(self):
+        """new_many adds every object, none if one is invalid"""
+        count = self.storage.count()
+        dates = {"created_at": "2023-02-12T12:25:43.990292",
+                 "updated_at": "2023-02-12T12:25:43.990292"}
+        users = [User(id=f"many-{i}", **dates) for i in range(3)]
+        self.storage.new_many(iter(users))
+        for user in users:
+            self.assertIs(self.storage.get(User, user.id), user)
+        self.assertEqual(self.storage.count(), count + 3)
+        extra = User(id="many-extra", **dates)
+        for bad, error in (("bad", TypeError), (None, ValueError)):
+            with self.assertRaises(error):
+                self.storage.new_many([extra, bad])
+            self.assertIsNone(self.storage.get(User, extra.id))
+
     def test_save(self):
         """test save method"""
         new_ins = BaseModel()
@@ -120,3 +150,232 @@ class TestEngine(unittest.TestCase):
             os.remove(self.storage.fpa)
         self.storage.reload()
         self.assertEqual(self.storage.all(), {})
+
+    def test_save_only_serializes_dirty(self):
+        """save calls to_dict only on changed objects"""
+        other = BaseModel()
+        self.storage.save()
+        with patch.object(BaseModel, "to_dict",
+                          side_effect=BaseModel.to_dict,
+                          autospec=True) as to_dict:
+            self.storage.save()
+            self.assertEqual(to_dict.call_count, 0)
+            other.name = "dirty"
+            self.storage.save()
+            self.assertEqual(to_dict.call_count, 1)
+            to_dict.assert_called_with(other)
+        with open(self.storage.fpa) as f:
+            saved = json.load(f)
+        self.assertEqual(saved[f"BaseModel.{other.id}"]["name"], "dirty")
+
+    def test_save_only_encodes_dirty(self):
+        """save encodes the JSON of changed objects only, and writes what
+        json.dumps would"""
+        from models.engine.serializers import JSONCodec
+        others = [BaseModel() for _ in range(3)]
+        self.storage.save()
+        with patch.object(JSONCodec, "encode_entry",
+                          side_effect=JSONCodec.encode_entry,
+                          autospec=True) as encode:
+            self.storage.save()
+            self.assertEqual(encode.call_count, 0)
+            others[0].name = "dirty"
+            self.storage.delete(others[1])
+            self.storage.save()
+            self.assertEqual(encode.call_count, 1)
+        with open(self.storage.fpa) as f:
+            text = f.read()
+        self.assertEqual(text, json.dumps(self.storage.snapshot()))
+        self.assertNotIn(others[1].id, text)
+        self.storage.codec = "cjson"
+        try:
+            others[2].name = "compact"
+            self.storage.save()
+            with open(self.storage.fpa) as f:
+                self.assertEqual(f.read(), json.dumps(
+                    self.storage.snapshot(), separators=(",", ":")))
+        finally:
+            self.storage.codec = None
+
+    def test_save_changed_in_place(self):
+        """lists changed in place are saved, and the cached records don't
+        share them with the instances"""
+        place = Place()
+        place.amenity_ids = []
+        self.storage.save()
+        place.amenity_ids.append("x")
+        self.storage.save()
+        key = f"Place.{place.id}"
+        with open(self.storage.fpa) as f:
+            self.assertEqual(json.load(f)[key]["amenity_ids"], ["x"])
+        self.storage.reload()
+        place = self.storage.all()[key]
+        place.amenity_ids.append("y")
+        self.assertEqual(self.storage.snapshot()[key]["amenity_ids"], ["x"])
+        with self.assertRaises(ValueError), self.storage.batch():
+            place.amenity_ids = ["z"]
+            raise ValueError
+        self.assertEqual(place.amenity_ids, ["x", "y"])
+        self.storage.save()
+        with open(self.storage.fpa) as f:
+            self.assertEqual(json.load(f)[key]["amenity_ids"], ["x", "y"])
+
+    def test_save_after_reload(self):
+        """reloaded objects are saved from their cached form"""
+        self.storage.reload()
+        key = f"BaseModel.{self.instance.id}"
+        with patch.object(BaseModel, "to_dict") as to_dict:
+            self.storage.save()
+            to_dict.assert_not_called()
+        with open(self.storage.fpa) as f:
+            saved = json.load(f)
+        self.assertEqual(saved[key]["number"], 99)
+
+    def test_save_tracks_delete(self):
+        """deleted objects are dropped from the file"""
+        key = f"BaseModel.{self.instance.id}"
+        del self.storage.all()[key]
+        self.storage.save()
+        with open(self.storage.fpa) as f:
+            self.assertNotIn(key, json.load(f))
+
+    def test_all_class(self):
+        """all(cls) only returns the objects of cls"""
+        user = User()
+        key = f"User.{user.id}"
+        self.assertEqual(self.storage.all(User), {key: user})
+        self.assertEqual(self.storage.all("User"), {key: user})
+        self.assertNotIn(key, self.storage.all(BaseModel))
+        self.assertEqual(self.storage.all("Review"), {})
+
+    def test_count(self):
+        """count(cls) counts the objects of cls"""
+        total = self.storage.count()
+        users = self.storage.count(User)
+        User()
+        self.assertEqual(self.storage.count(), total + 1)
+        self.assertEqual(self.storage.count("User"), users + 1)
+        self.assertEqual(self.storage.count(BaseModel), 1)
+
+    def test_delete(self):
+        """delete removes the object and its index entry"""
+        self.storage.delete(self.instance)
+        self.storage.delete(None)
+        self.assertEqual(self.storage.count(BaseModel), 0)
+        self.assertNotIn(
+            f"BaseModel.{self.instance.id}", self.storage.all())
+        self.storage.save()
+        self.storage.reload()
+        self.assertEqual(self.storage.all(BaseModel), {})
+
+    def test_by_ref(self):
+        """by_ref finds objects through their foreign keys"""
+        place, other = Place(), Place()
+        reviews = [Review() for _ in range(3)]
+        for review in reviews:
+            review.place_id = place.id
+        reviews[2].place_id = other.id
+        self.assertEqual(
+            self.storage.by_ref(Review, "place_id", place.id),
+            {f"Review.{r.id}": r for r in reviews[:2]})
+        self.assertEqual(
+            list(self.storage.by_ref("Review", "place_id", other.id)),
+            [f"Review.{reviews[2].id}"])
+        self.storage.delete(reviews[0])
+        self.assertEqual(
+            list(self.storage.by_ref(Review, "place_id", place.id)),
+            [f"Review.{reviews[1].id}"])
+        self.assertEqual(self.storage.by_ref("Nope", "place_id", ""), {})
+
+    def test_by_ref_after_reload(self):
+        """reload rebuilds the foreign key index"""
+        review = Review()
+        review.user_id = "someone"
+        self.storage.save()
+        self.storage.reload()
+        self.assertEqual(
+            list(self.storage.by_ref(Review, "user_id", "someone")),
+            [f"Review.{review.id}"])
+
+    def test_by_ref_not_indexed(self):
+        """attributes that are not foreign keys are scanned for"""
+        self.assertEqual(
+            self.storage.by_ref(BaseModel, "name", "new"),
+            {f"BaseModel.{self.instance.id}": self.instance})
+
+    def test_streaming_reload(self):
+        """streaming reload builds the same objects"""
+        review = Review()
+        review.place_id = "somewhere"
+        self.storage.save()
+        expected = {k: v.to_dict() for (k, v) in self.storage.all().items()}
+        self.storage.streaming = True
+        try:
+            self.storage.reload()
+        finally:
+            self.storage.streaming = False
+        self.assertEqual(
+            {k: v.to_dict() for (k, v) in self.storage.all().items()},
+            expected)
+        self.assertEqual(
+            list(self.storage.by_ref(Review, "place_id", "somewhere")),
+            [f"Review.{review.id}"])
+
+    def test_streaming_reload_bad_file(self):
+        """streaming reload of a bad file raises TypeError"""
+        with open(self.storage.fpa, "w") as f:
+            f.write('{"BaseModel.1": ')
+        self.storage.streaming = True
+        try:
+            with self.assertRaises(TypeError):
+                self.storage.reload()
+        finally:
+            self.storage.streaming = False
+
+    def test_save_is_atomic(self):
+        """a failed save leaves the previous file in place"""
+        with open(self.storage.fpa) as f:
+            before = f.read()
+        self.instance.name = "lost"
+        with patch("os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self.storage.save()
+        with open(self.storage.fpa) as f:
+            self.assertEqual(f.read(), before)
+        leftovers = [name for name in os.listdir(".")
+                     if name.startswith(self.storage.fpa + ".")]
+        self.assertEqual(leftovers, [])
+
+    def test_fsync_policy(self):
+        """files are flushed to disk according to the fsync policy"""
+        with patch("os.fsync") as fsync:
+            self.storage.save()
+            fsync.assert_not_called()
+            self.storage.fsync = "always"
+            self.storage.save()
+            self.storage.save()
+            # the file and its directory
+            self.assertEqual(fsync.call_count, 4)
+            fsync.reset_mock()
+            self.storage.fsync = "interval"
+            self.storage.fsync_interval = 60 * 60 * 1000
+            self.storage.save()
+            self.storage.save()
+            self.assertEqual(fsync.call_count, 2)
+            # the second save is flushed when the interval ends
+            self.storage.sync_deferred()
+            self.assertEqual(fsync.call_count, 4)
+            fsync.reset_mock()
+            self.storage.fsync_interval = 50
+            time.sleep(0.06)
+            for _ in range(3):
+                self.storage.save()
+            self.assertEqual(fsync.call_count, 2)
+            time.sleep(0.3)
+            self.assertEqual(fsync.call_count, 4)
+            self.storage.fsync = "sometimes"
+            with self.assertRaises(ValueError):
+                self.storage.save()
+        del self.storage.fsync
+        del self.storage.fsync_interval
+        self.assertEqual(self.storage.fsync, "never")
@@ -0,0 +1,190 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+""" Test JournalStorage engine """
+import unittest
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from unittest.mock import patch
+from models.engine.journal_storage import JournalStorage
+from models.engine.file_storage import FileStorage
+from models.base_model import BaseModel
+from models.user import User
+
+
+class TestJournalStorage(unittest.TestCase):
+    """ JournalStorage test cases """
+
+    def setUp(self):
+        """ setup """
+        self.storage = JournalStorage()
+        self.storage.fpa = "test_journal_db.json"
+        self.clean()
+        self.storage.reload()
+        # new instances and attribute writes report to this engine
+        self.patcher = patch("models.base_model.storage", self.storage)
+        self.patcher.start()
+
+    def tearDown(self):
+        """ teardown """
+        self.patcher.stop()
+        self.storage.wait_compaction()
+        self.clean()
+
+    def clean(self):
+        """removes the files of the engine"""
+        for path in (self.storage.fpa, self.storage.journal_path,
+                     self.storage.compacting_path):
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def journal(self):
+        """returns the records of the journal"""
+        with open(self.storage.journal_path) as f:
+            return [json.loads(line) for line in f]
+
+    def fresh(self):
+        """returns a new engine reloaded from the same files"""
+        other = JournalStorage()
+        other.fpa = self.storage.fpa
+        other.reload()
+        return other
+
+    def test_is_file_storage(self):
+        """JournalStorage keeps the FileStorage contract"""
+        self.assertIsInstance(self.storage, FileStorage)
+        self.assertEqual(self.storage.all(), {})
+
+    def test_save_appends(self):
+        """each save appends only the changed objects"""
+        User()
+        self.storage.save()
+        second = User()
+        self.storage.save()
+        records = self.journal()
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[1]["op"], "set")
+        self.assertEqual(records[1]["key"], f"User.{second.id}")
+        self.assertFalse(os.path.isfile(self.storage.fpa))
+        self.storage.save()
+        self.assertEqual(len(self.journal()), 2)
+
+    def test_update_and_delete(self):
+        """updates and deletes are journaled and replayed"""
+        obj = BaseModel()
+        self.storage.save()
+        obj.name = "updated"
+        self.storage.save()
+        gone = BaseModel()
+        self.storage.save()
+        del self.storage.all()[f"BaseModel.{gone.id}"]
+        self.storage.save()
+        self.assertEqual(
+            [rec["op"] for rec in self.journal()],
+            ["set", "set", "set", "del"])
+        objs = self.fresh().all()
+        self.assertEqual(list(objs), [f"BaseModel.{obj.id}"])
+        self.assertEqual(objs[f"BaseModel.{obj.id}"].name, "updated")
+
+    def test_torn_journal(self):
+        """a half written last record is ignored"""
+        obj = BaseModel()
+        self.storage.save()
+        with open(self.storage.journal_path, "a") as f:
+            f.write('{"op": "set", "key": "BaseMo')
+        self.assertEqual(list(self.fresh().all()), [f"BaseModel.{obj.id}"])
+
+    def test_compact(self):
+        """the journal is folded into the snapshot past the threshold"""
+        self.storage.compact_threshold = 1
+        objs = [User() for _ in range(3)]
+        self.storage.save()
+        self.storage.wait_compaction()
+        self.assertFalse(os.path.isfile(self.storage.journal_path))
+        self.assertFalse(os.path.isfile(self.storage.compacting_path))
+        with open(self.storage.fpa) as f:
+            snapshot = json.load(f)
+        self.assertEqual(
+            sorted(snapshot), sorted(f"User.{obj.id}" for obj in objs))
+        # the snapshot is a FileStorage file
+        other = FileStorage()
+        other.fpa = self.storage.fpa
+        other.reload()
+        self.assertEqual(sorted(other.all()), sorted(snapshot))
+
+    def test_model_class(self):
+        """instances aren't compact unless asked for"""
+        self.assertIs(self.storage.model_class(User), User)
+
+    def test_compact_from_models(self):
+        """the engine picked by models still compacts its journal"""
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.dirname(os.path.abspath(__file__)))))
+        script = (
+            "from models import storage\n"
+            "from models.user import User\n"
+            "storage.compact_threshold = 200\n"
+            "for _ in range(5):\n"
+            "    User().save()\n"
+            "storage.wait_compaction()\n"
+            "print(type(storage.get(User, User().id)).__name__)\n")
+        env = dict(os.environ, HBNB_TYPE_STORAGE="journal",
+                   PYTHONPATH=root)
+        env.pop("HBNB_STORAGE_COMPACT", None)
+        with tempfile.TemporaryDirectory() as tmp:
+            result = subprocess.run(
+                [sys.executable, "-c", script], cwd=tmp, env=env,
+                capture_output=True, text=True)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertEqual(result.stdout, "User\n")
+            with open(os.path.join(tmp, "file.json")) as f:
+                self.assertEqual(len(json.load(f)), 5)
+
+    def test_reload_after_compaction(self):
+        """snapshot and journal tail are both replayed"""
+        obj = BaseModel()
+        self.storage.save()
+        self.storage.compact(wait=True)
+        obj.name = "tail"
+        self.storage.save()
+        self.assertEqual(len(self.journal()), 1)
+        objs = self.fresh().all()
+        self.assertEqual(objs[f"BaseModel.{obj.id}"].name, "tail")
+
+    def test_leftover_compacting_journal(self):
+        """a journal left by an interrupted compaction is replayed"""
+        obj = BaseModel()
+        self.storage.save()
+        os.replace(self.storage.journal_path, self.storage.compacting_path)
+        other = self.fresh()
+        self.assertIn(f"BaseModel.{obj.id}", other.all())
+        other_obj = other.all()[f"BaseModel.{obj.id}"]
+        other_obj.name = "later"
+        other.touch(other_obj)
+        other.save()
+        other.compact(wait=True)
+        objs = self.fresh().all()
+        self.assertEqual(objs[f"BaseModel.{obj.id}"].name, "later")
+
+    def test_fsync_policy(self):
+        """appends follow the fsync policy"""
+        self.storage.fsync = "always"
+        with patch("os.fsync") as fsync:
+            BaseModel()
+            self.storage.save()
+            self.assertEqual(fsync.call_count, 1)
+            self.storage.compact(wait=True)
+            self.assertEqual(fsync.call_count, 3)
+            fsync.reset_mock()
+            self.storage.fsync = "interval"
+            self.storage.fsync_interval = 60 * 60 * 1000
+            BaseModel()
+            self.storage.save()
+            BaseModel()
+            self.storage.save()
+            self.assertEqual(fsync.call_count, 1)
+            # the second append is flushed when the interval ends
+            self.storage.sync_deferred()
+            self.assertEqual(fsync.call_count, 3)
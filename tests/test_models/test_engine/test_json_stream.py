@@ -0,0 +1,49 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+""" Test the incremental JSON reader """
+import io
+import json
+import unittest
+from models.engine.json_stream import iter_items
+
+
+class TestIterItems(unittest.TestCase):
+    """ iter_items test cases """
+
+    def items(self, text, chunk_size=1 << 16):
+        """returns the items read from text"""
+        return list(iter_items(io.StringIO(text), chunk_size))
+
+    def test_same_as_json(self):
+        """every chunk size gives what json.loads gives"""
+        data = {
+            "User.1": {"id": "1", "name": "Bétty \"B\"", "n": 12345},
+            "Place.2": {"ids": [1, 2.5, None, True], "nested": {"a": {}}},
+            "Empty.3": {},
+            "Num.4": -1.5e10,
+        }
+        for text in (json.dumps(data), json.dumps(data, indent=4)):
+            for chunk_size in (1, 2, 3, 7, 64, 1 << 16):
+                self.assertEqual(
+                    self.items(text, chunk_size), list(data.items()))
+
+    def test_empty_object(self):
+        """an empty object has no items"""
+        self.assertEqual(self.items("{}"), [])
+        self.assertEqual(self.items(" \n{ \n } \n", 1), [])
+
+    def test_lazy(self):
+        """items are yielded before the end of the file is read"""
+        f = io.StringIO('{"a": 1, "b": 2, "c": ')
+        items = iter_items(f, 4)
+        self.assertEqual(next(items), ("a", 1))
+        self.assertEqual(next(items), ("b", 2))
+        with self.assertRaises(ValueError):
+            next(items)
+
+    def test_bad_json(self):
+        """invalid files raise ValueError"""
+        for text in ("", "[]", '{"a": 1', '{"a" 1}', '{1: 2}',
+                     '{"a": 1,}', '{"a": 1} x', '{"a": tru}'):
+            with self.assertRaises(ValueError, msg=text):
+                self.items(text, 2)
@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+""" Test lazy loading of FileStorage """
+import unittest
+import io
+import os
+from unittest.mock import patch
+from console import HBNBCommand
+from models import storage
+from models.base_model import BaseModel
+from models.engine.lazy_object import LazyObject
+from models.review import Review
+from models.user import User
+
+
+class TestLazyObject(unittest.TestCase):
+    """ LazyObject test cases """
+
+    def setUp(self):
+        """ setup """
+        self.storage = storage
+        self.storage.fpa = "test_lazy_db.json"
+        self.storage.reload()
+        self.user = User()
+        self.user.first_name = "Betty"
+        self.review = Review()
+        self.review.place_id = "somewhere"
+        self.storage.save()
+        self.storage.lazy = True
+        self.storage.reload()
+
+    def tearDown(self):
+        """ teardown """
+        self.storage.lazy = False
+        if (os.path.isfile(self.storage.fpa)):
+            os.remove(self.storage.fpa)
+
+    def test_reload_is_lazy(self):
+        """reload makes proxies, not instances"""
+        with patch.object(BaseModel, "__init__") as init:
+            self.storage.reload()
+            init.assert_not_called()
+        for proxy in self.storage.all().values():
+            self.assertIs(type(proxy), LazyObject)
+            self.assertFalse(proxy.is_loaded)
+        user = self.storage.all()[f"User.{self.user.id}"]
+        self.assertIsInstance(user, User)
+        self.assertEqual(user.peek("first_name"), "Betty")
+        self.assertFalse(user.is_loaded)
+
+    def test_first_access(self):
+        """the first access makes the instance and replaces the proxy"""
+        key = f"User.{self.user.id}"
+        proxy = self.storage.all()[key]
+        self.assertEqual(proxy.first_name, "Betty")
+        self.assertTrue(proxy.is_loaded)
+        user = self.storage.all()[key]
+        self.assertIs(type(user), User)
+        self.assertIs(proxy.resolve(), user)
+        self.assertEqual(str(proxy), str(user))
+        self.assertEqual(user.to_dict(), self.user.to_dict())
+        other = self.storage.all()[f"Review.{self.review.id}"]
+        self.assertIs(type(other), LazyObject)
+
+    def test_indexes(self):
+        """indexes are built without loading the proxies"""
+        self.assertEqual(self.storage.count(Review), 1)
+        found = self.storage.by_ref(Review, "place_id", "somewhere")
+        self.assertEqual(list(found), [f"Review.{self.review.id}"])
+        self.assertFalse(found[f"Review.{self.review.id}"].is_loaded)
+
+    def test_save_and_delete(self):
+        """proxies are saved as is, writes and deletes go through them"""
+        key = f"User.{self.user.id}"
+        self.storage.save()
+        self.assertFalse(self.storage.all()[key].is_loaded)
+        self.storage.all()[key].last_name = "Holberton"
+        self.storage.save()
+        self.storage.delete(self.storage.all()[f"Review.{self.review.id}"])
+        self.storage.save()
+        self.storage.reload()
+        self.assertEqual(list(self.storage.all()), [key])
+        self.assertEqual(self.storage.all()[key].last_name, "Holberton")
+
+    def test_console(self):
+        """console commands work on proxies"""
+        with patch('sys.stdout', new=io.StringIO()) as f:
+            HBNBCommand().onecmd(f"show User {self.user.id}")
+            self.assertIn("'first_name': 'Betty'", f.getvalue())
+        proxy = self.storage.all()[f"Review.{self.review.id}"]
+        HBNBCommand().onecmd(f"update Review {self.review.id} text nice")
+        self.assertEqual(proxy.text, "nice")
+        with patch('sys.stdout', new=io.StringIO()) as f:
+            HBNBCommand().onecmd(f"destroy Review {self.review.id}")
+            HBNBCommand().onecmd("Review.count()")
+            self.assertEqual("0\n", f.getvalue())
@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+""" Test ObjectMap """
+import unittest
+from models.engine.object_map import ObjectMap
+
+
+class Ref:
+    """object with a foreign key"""
+    foreign_keys = ("parent_id",)
+
+    def __init__(self, parent_id):
+        """sets the foreign key"""
+        self.parent_id = parent_id
+
+
+class TestObjectMap(unittest.TestCase):
+    """ ObjectMap test cases """
+
+    def test_loaded_is_clean(self):
+        """filling through the constructor is not a change"""
+        objs = ObjectMap({"User.1": 1, "User.2": 2})
+        self.assertEqual(objs, {"User.1": 1, "User.2": 2})
+        self.assertEqual(objs.take_changes(), (set(), set()))
+
+    def test_set_and_delete(self):
+        """sets and deletes are recorded"""
+        objs = ObjectMap({"User.1": 1})
+        objs["User.2"] = 2
+        del objs["User.1"]
+        self.assertEqual(objs.take_changes(), ({"User.2"}, {"User.1"}))
+        self.assertEqual(objs.take_changes(), (set(), set()))
+
+    def test_delete_then_set(self):
+        """the last operation on a key wins"""
+        objs = ObjectMap({"User.1": 1})
+        del objs["User.1"]
+        objs["User.1"] = 3
+        objs["User.2"] = 2
+        objs.pop("User.2")
+        self.assertEqual(objs.take_changes(), ({"User.1"}, {"User.2"}))
+
+    def test_mark(self):
+        """only existing keys can be marked"""
+        objs = ObjectMap({"User.1": 1})
+        objs.mark("User.1")
+        objs.mark("User.2")
+        self.assertEqual(objs.dirty, {"User.1"})
+
+    def test_bulk_operations(self):
+        """update, setdefault, popitem and clear are recorded"""
+        objs = ObjectMap()
+        objs.update({"User.1": 1}, **{"User.2": 2})
+        objs.setdefault("User.3", 3)
+        self.assertEqual(objs.dirty, {"User.1", "User.2", "User.3"})
+        self.assertEqual(objs.popitem(), ("User.3", 3))
+        objs.clear()
+        self.assertEqual(objs, {})
+        self.assertEqual(
+            objs.take_changes(), (set(), {"User.1", "User.2", "User.3"}))
+
+    def test_class_index(self):
+        """ids are indexed per class, in insertion order"""
+        objs = ObjectMap({"User.1": 1, "Place.1": 2})
+        objs["User.2"] = 3
+        objs["User.0"] = 4
+        self.assertEqual(list(objs.classes["User"]), ["1", "2", "0"])
+        self.assertEqual(
+            objs.of_class("User"), {"User.1": 1, "User.2": 3, "User.0": 4})
+        self.assertEqual(objs.count("Place"), 1)
+        del objs["User.2"]
+        objs.pop("Place.1")
+        self.assertEqual(objs.count("User"), 2)
+        self.assertEqual(objs.of_class("Place"), {})
+        self.assertNotIn("Place", objs.classes)
+        objs.clear()
+        self.assertEqual(objs.classes, {})
+
+    def test_ref_index(self):
+        """foreign keys are indexed and follow marks"""
+        first, second = Ref("a"), Ref("a")
+        objs = ObjectMap({"Ref.1": first})
+        objs["Ref.2"] = second
+        objs["Ref.3"] = Ref("")
+        self.assertEqual(
+            objs.by_ref("Ref", "parent_id", "a"),
+            {"Ref.1": first, "Ref.2": second})
+        second.parent_id = "b"
+        objs.mark("Ref.2")
+        self.assertEqual(
+            objs.by_ref("Ref", "parent_id", "a"), {"Ref.1": first})
+        self.assertEqual(
+            objs.by_ref("Ref", "parent_id", "b"), {"Ref.2": second})
+        del objs["Ref.1"]
+        objs["Ref.2"] = Ref("c")
+        self.assertEqual(objs.by_ref("Ref", "parent_id", "a"), {})
+        self.assertEqual(objs.by_ref("Ref", "parent_id", "b"), {})
+        self.assertEqual(
+            objs.refs, {("Ref", "parent_id"): {"c": {"Ref.2": None}}})
+
+    def test_ref_unhashable(self):
+        """unhashable foreign keys are not indexed"""
+        objs = ObjectMap({"Ref.1": Ref(["a"])})
+        self.assertEqual(objs.refs, {})
+        self.assertEqual(objs.ref_values, {})
@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+""" Test the decoding of JSON objects in several processes """
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+from models.engine.file_storage import FileStorage
+from models.engine.parallel import decode_object, split_object
+from models.user import User
+
+RECORDS = {
+    f"User.{i}": {"id": str(i), "__class__": "User",
+                  "created_at": "2023-02-12T12:25:43.990292",
+                  "updated_at": "2023-02-12T12:27:03.177860",
+                  "first_name": f"user {i}"}
+    for i in range(20)}
+# values looking like the end of an entry
+RECORDS["User.3"]["first_name"] = 'x}, "User.99": {"id": "99"}, "'
+RECORDS["User.5"]["tags"] = {"a": {"b": 1}, "User.98": {"id": "98"}}
+RECORDS["User.7"]["last_name"] = "}, \"\\\"}"
+
+
+class TestParallel(unittest.TestCase):
+    """ decode_object test cases """
+
+    def test_split(self):
+        """the chunks are the text of the entries, cut after a }"""
+        data = json.dumps(RECORDS).encode()
+        chunks = split_object(data, 8)
+        self.assertGreater(len(chunks), 4)
+        self.assertEqual(b", ".join(chunks), data[1:-1])
+        for chunk in chunks[:-1]:
+            self.assertTrue(chunk.endswith(b"}"))
+        self.assertIsNone(split_object(b"[1, 2]", 2))
+        self.assertEqual(split_object(b" {} ", 2), [b""])
+
+    def test_decode(self):
+        """the object decoded is the one json.loads returns, whatever the
+        separators and the cuts inside strings and nested objects"""
+        for separators in ((", ", ": "), (",", ":")):
+            data = json.dumps(RECORDS, separators=separators).encode()
+            for workers in (2, 3, 5):
+                decoded = decode_object(data, workers)
+                self.assertEqual(decoded, RECORDS)
+                self.assertEqual(list(decoded), list(RECORDS))
+        self.assertEqual(decode_object(b"{}", 2), {})
+        with self.assertRaises(ValueError):
+            decode_object(b'{"a": {}, "b": {"c": 1}, "d"}', 2)
+        with self.assertRaises(ValueError):
+            decode_object(b'{"a": {}, "b": {"c": 1}', 2)
+
+
+class TestParallelReload(unittest.TestCase):
+    """ FileStorage.workers test cases """
+
+    def tearDown(self):
+        """removes the files"""
+        for path in ("test_parallel.json", "test_parallel.json.gz"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def reloaded(self, path, workers):
+        """returns an engine of path reloaded by workers processes"""
+        storage = FileStorage()
+        storage.fpa = path
+        storage.workers = workers
+        with patch("models.base_model.storage", storage):
+            storage.reload()
+        return storage
+
+    def test_reload(self):
+        """the engine reloads the same objects with and without workers"""
+        for path in ("test_parallel.json", "test_parallel.json.gz"):
+            storage = FileStorage()
+            storage.fpa = path
+            storage.write_file(path, storage.file_codec().encode(RECORDS))
+            serial = self.reloaded(path, 0)
+            parallel = self.reloaded(path, 3)
+            self.assertEqual(list(parallel.all()), list(serial.all()))
+            self.assertEqual(
+                {k: v.to_dict() for (k, v) in parallel.all().items()},
+                RECORDS)
+            self.assertIsInstance(parallel.get(User, "3"), User)
+
+    def test_import_models(self):
+        """the engine of models reloads in workers while models is being
+        imported"""
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.dirname(os.path.abspath(__file__)))))
+        env = dict(os.environ, HBNB_STORAGE_WORKERS="2", PYTHONPATH=root)
+        env.pop("HBNB_TYPE_STORAGE", None)
+        env.pop("HBNB_STORAGE_PATH", None)
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "file.json"), "w") as f:
+                json.dump(RECORDS, f)
+            result = subprocess.run(
+                [sys.executable, "-c",
+                 "from models import storage; print(storage.count())"],
+                cwd=tmp, env=env, capture_output=True, text=True,
+                timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout, f"{len(RECORDS)}\n")
+
+    def test_bad_file(self):
+        """a bad file raises the error of a serial reload"""
+        with open("test_parallel.json", "w") as f:
+            f.write('{"User.1": {"id": "1"}, "User.2": [}')
+        with self.assertRaises(TypeError):
+            self.reloaded("test_parallel.json", 2)
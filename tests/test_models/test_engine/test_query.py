@@ -0,0 +1,180 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+""" Test storage.query() """
+import os
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+from models.city import City
+from models.engine.file_storage import FileStorage
+from models.engine.sqlite_storage import SQLiteStorage
+from models.place import Place
+
+
+class TestQuery(unittest.TestCase):
+    """ query test cases """
+
+    engine = FileStorage
+    path = "test_query.json"
+
+    def setUp(self):
+        """creates places in two cities"""
+        self.storage = self.engine()
+        self.storage.fpa = self.path
+        self.storage.reload()
+        self.patch = patch("models.base_model.storage", self.storage)
+        self.patch.start()
+        self.cities = [City(), City()]
+        self.places = []
+        for i in range(10):
+            place = Place()
+            place.city_id = self.cities[i % 2].id
+            place.price_by_night = i * 10
+            place.max_guest = i % 3
+            place.created_at = datetime(2023, 1, 20 - i)
+            if i % 4 == 0:
+                place.amenity_ids = ["wifi"]
+            self.places.append(place)
+        self.storage.save()
+
+    def tearDown(self):
+        """removes the file"""
+        self.patch.stop()
+        if hasattr(self.storage, "close"):
+            self.storage.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def query(self):
+        """returns a query of the places"""
+        return self.storage.query(Place)
+
+    def prices(self, query):
+        """returns the prices of the places of query"""
+        return [p.price_by_night for p in query]
+
+    def test_all(self):
+        """without conditions every object is returned"""
+        self.assertEqual(len(self.query().all()), 10)
+        self.assertEqual(self.query().count(), 10)
+        self.assertEqual(len(self.storage.query("City").all()), 2)
+
+    def test_where(self):
+        """conditions are combined"""
+        query = self.query().where("price_by_night", ">=", 50)
+        self.assertEqual(sorted(self.prices(query)), [50, 60, 70, 80, 90])
+        query = query.where(max_guest=0)
+        self.assertEqual(sorted(self.prices(query)), [60, 90])
+        self.assertEqual(query.count(), 2)
+        query = self.query().where("amenity_ids", "contains", "wifi")
+        self.assertEqual(sorted(self.prices(query)), [0, 40, 80])
+        query = self.query().where("max_guest", "in", [1, 2])
+        self.assertEqual(query.count(), 6)
+        self.assertEqual(self.query().where("pool", "==", True).count(), 0)
+        with self.assertRaises(ValueError):
+            self.query().where("max_guest", "~", 1)
+
+    def test_foreign_keys(self):
+        """foreign keys are looked up in the index"""
+        first, second = (c.id for c in self.cities)
+        query = self.query().where(city_id=first)
+        with patch.object(self.storage, "all",
+                          side_effect=AssertionError("scanned")):
+            self.assertEqual(sorted(self.prices(query)), [0, 20, 40, 60, 80])
+        query = self.query().where("city_id", "in", [first, second])
+        self.assertEqual(query.count(), 10)
+        query = query.where("price_by_night", "<", 30)
+        self.assertEqual(sorted(self.prices(query)), [0, 10, 20])
+
+    def test_order_limit_offset(self):
+        """objects are ordered then paged"""
+        query = self.query().order_by("-price_by_night")
+        self.assertEqual(self.prices(query.limit(3)), [90, 80, 70])
+        self.assertEqual(self.prices(query.offset(8)), [10, 0])
+        self.assertEqual(self.prices(query.limit(2).offset(1)), [80, 70])
+        query = self.query().order_by("max_guest", "-price_by_night")
+        self.assertEqual(self.prices(query.limit(4)), [90, 60, 30, 0])
+        self.assertEqual(self.prices(query)[:4], [90, 60, 30, 0])
+        self.assertEqual(self.query().order_by("price_by_night")
+                         .first().price_by_night, 0)
+        self.assertIsNone(self.query().where(max_guest=5).first())
+
+    def test_missing_last(self):
+        """objects missing an ordering field come last"""
+        self.places[3].rating = 1
+        self.places[5].rating = 2
+        for query in (self.query().order_by("rating"),
+                      self.query().order_by("-rating")):
+            ratings = [getattr(p, "rating", None) for p in query.limit(3)]
+            self.assertEqual(ratings[2], None)
+            self.assertEqual(sorted(ratings[:2]), [1, 2])
+        query = self.query().order_by("-rating", "price_by_night")
+        self.assertEqual(self.prices(query)[:3], [50, 30, 0])
+
+    def test_mixed_types(self):
+        """values of different types are ordered by type, then value"""
+        self.places[1].rating = "high"
+        self.places[2].rating = 3
+        self.places[4].rating = [1]
+        self.places[6].rating = 1.5
+        query = self.query().order_by("rating")
+        ratings = [getattr(p, "rating", None) for p in query]
+        self.assertEqual(ratings[:5], [1.5, 3, "high", [1], None])
+        ratings = [p.rating for p in query.limit(2)]
+        self.assertEqual(ratings, [1.5, 3])
+        ratings = [p.rating for p in self.query().order_by("-rating")
+                   .limit(3)]
+        self.assertEqual(ratings, [[1], "high", 3])
+        query = self.query().order_by("-rating", "price_by_night")
+        self.assertEqual(self.prices(query)[:5], [40, 10, 20, 60, 0])
+
+    def test_dates(self):
+        """dates are ordered and compared as dates"""
+        query = self.query().order_by("created_at")
+        self.assertEqual(self.prices(query), list(range(90, -1, -10)))
+        self.assertEqual(self.prices(query.limit(2)), [90, 80])
+        query = self.query().where("created_at", ">=", datetime(2023, 1, 18))
+        self.assertEqual(sorted(self.prices(query)), [0, 10, 20])
+
+    def test_only(self):
+        """only() returns dictionaries of the fields"""
+        query = self.query().where(price_by_night=10).only("id", "max_guest")
+        self.assertEqual(query.all(),
+                         [{"id": self.places[1].id, "max_guest": 1}])
+
+    def test_immutable(self):
+        """methods return new queries"""
+        query = self.query()
+        query.where(max_guest=0).limit(1)
+        self.assertEqual(query.count(), 10)
+
+
+class TestSQLiteQuery(TestQuery):
+    """ query test cases on SQLiteStorage """
+
+    engine = SQLiteStorage
+    path = "test_query.db"
+
+
+class TestLazyQuery(TestQuery):
+    """ query test cases on lazily reloaded objects, half of them made """
+
+    def setUp(self):
+        """reloads the places in lazy mode and makes every other one"""
+        super().setUp()
+        self.storage.lazy = True
+        self.storage.reload()
+        self.places = [self.storage.get(Place, p.id) for p in self.places]
+        for place in self.places[::2]:
+            str(place)
+
+
+class TestColumnarQuery(TestQuery):
+    """ query test cases on tables """
+
+    def setUp(self):
+        """reloads the places in columnar mode"""
+        super().setUp()
+        self.storage.columnar = True
+        self.storage.reload()
+        self.places = [self.storage.get(Place, p.id) for p in self.places]
@@ -0,0 +1,133 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+""" Test the cache of the rendered forms of the objects """
+import unittest
+from unittest.mock import patch
+from models.base_model import BaseModel
+from models.compact import compact_class
+from models.engine.file_storage import FileStorage
+from models.engine.render_cache import RenderCache
+from models.user import User
+
+
+class TestRenderCache(unittest.TestCase):
+    """ RenderCache test cases """
+
+    def test_lru(self):
+        """the least recently used objects are dropped first"""
+        cache = RenderCache(2)
+        objs = [object() for _ in range(3)]
+        for i, obj in enumerate(objs):
+            self.assertEqual(cache.get(i, obj, "str", lambda o: "a"), "a")
+        self.assertEqual(list(cache.entries), [1, 2])
+        cache.get(1, objs[1], "str", None)
+        cache.get(0, objs[0], "str", lambda o: "b")
+        self.assertEqual(list(cache.entries), [1, 0])
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 4,
+                                         "entries": 2, "size": 2})
+
+    def test_other_object(self):
+        """a form is only returned for the object it was rendered from"""
+        cache = RenderCache(2)
+        cache.get("a", 1, "str", str)
+        self.assertEqual(cache.get("a", 2, "str", str), "2")
+        self.assertEqual(cache.get("a", 2, "repr", repr), "2")
+        self.assertEqual(cache.get("a", 2, "str", None), "2")
+        cache.invalidate("a")
+        self.assertEqual(cache.get("a", 2, "str", lambda o: "3"), "3")
+
+    def test_dict_copies(self):
+        """dictionaries are copied on the way out"""
+        cache = RenderCache(2)
+        first = cache.get("a", 1, "dict", lambda o: {"a": 1})
+        first["b"] = 2
+        self.assertEqual(cache.get("a", 1, "dict", None), {"a": 1})
+
+
+class TestStorageRenderCache(unittest.TestCase):
+    """ render cache of the engine test cases """
+
+    def setUp(self):
+        """creates the engine"""
+        self.storage = FileStorage()
+        self.storage.render_cache.size = 10
+        self.patch = patch("models.base_model.storage", self.storage)
+        self.patch.start()
+        self.storage.load_objects({})
+
+    def tearDown(self):
+        """stops using the engine"""
+        self.patch.stop()
+
+    def test_cached(self):
+        """str() and to_dict() are rendered once until the object changes"""
+        for cls in (User, compact_class(User)):
+            user = cls()
+            with patch.object(BaseModel, "render_str",
+                              wraps=BaseModel.render_str) as render:
+                text = str(user)
+                self.assertEqual(str(user), text)
+                self.assertEqual(render.call_count, 1)
+                user.name = "Betty"
+                self.assertIn("Betty", str(user))
+                self.assertEqual(str(user), str(user))
+                self.assertEqual(render.call_count, 2)
+                del user.name
+                self.assertEqual(str(user), text)
+                self.assertEqual(render.call_count, 3)
+            data = user.to_dict()
+            data["name"] = "x"
+            self.assertNotIn("name", user.to_dict())
+
+    def test_stats(self):
+        """the counters are read through storage"""
+        user = User()
+        str(user)
+        str(user)
+        user.to_dict()
+        stats = self.storage.render_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]),
+                         (1, 2, 1))
+
+    def test_not_stored(self):
+        """objects that aren't in storage aren't cached"""
+        user = User(**User().to_dict())
+        stats = self.storage.render_stats()
+        str(user)
+        str(user)
+        self.assertEqual(self.storage.render_stats(), stats)
+
+    def test_off(self):
+        """a size of 0 turns the cache off"""
+        self.storage.render_cache.size = 0
+        user = User()
+        str(user)
+        str(user)
+        self.assertEqual(self.storage.render_stats()["misses"], 0)
+
+    def test_bounded(self):
+        """the cache keeps at most size objects"""
+        users = [User() for _ in range(15)]
+        for user in users:
+            str(user)
+        self.assertEqual(self.storage.render_stats()["entries"], 10)
+        self.assertEqual(str(users[-1]), BaseModel.render_str(users[-1]))
+
+    def test_rollback_and_reload(self):
+        """forms of objects put back or reloaded are dropped"""
+        user = User()
+        self.storage.fpa = "test_render_cache.json"
+        try:
+            user.save()
+            str(user)
+            with self.assertRaises(KeyError):
+                with self.storage.batch():
+                    user.name = "Betty"
+                    str(user)
+                    raise KeyError
+            self.assertNotIn("Betty", str(user))
+            self.storage.reload()
+            self.assertEqual(self.storage.render_stats()["entries"], 0)
+        finally:
+            import os
+            os.remove("test_render_cache.json")
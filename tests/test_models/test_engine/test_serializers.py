@@ -0,0 +1,148 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+""" Test the serialization codecs """
+import gzip
+import json
+import os
+import unittest
+from unittest.mock import patch
+from models.base_model import BaseModel
+from models.engine import serializers
+from models.engine.file_storage import FileStorage
+from models.engine.serializers import codec_for_path, convert, get_codec
+
+
+class TestCodecs(unittest.TestCase):
+    """ codec test cases """
+
+    data = {
+        "User.1": {"id": "1", "name": "Bétty", "n": 12, "f": 1.5},
+        "Place.2": {"ids": [1, 2], "none": None, "ok": True},
+    }
+
+    def names(self):
+        """returns the names of every codec"""
+        for base in serializers.codecs:
+            yield base
+            for suffix in serializers.compressions:
+                yield f"{base}.{suffix}"
+
+    def test_round_trip(self):
+        """every codec decodes what it encodes"""
+        for name in self.names():
+            codec = get_codec(name)
+            self.assertEqual(codec.name, name)
+            data = codec.encode(self.data)
+            self.assertIsInstance(data, bytes)
+            self.assertEqual(codec.decode(data), self.data, msg=name)
+
+    def test_json_output(self):
+        """json writes what json.dumps writes, cjson has no spaces"""
+        self.assertEqual(get_codec("json").encode(self.data),
+                         json.dumps(self.data).encode())
+        self.assertNotIn(b", ", get_codec("cjson").encode(self.data))
+
+    def test_bad_data(self):
+        """invalid data raises ValueError"""
+        for name in self.names():
+            with self.assertRaises(ValueError, msg=name):
+                get_codec(name).decode(b"\x00not valid")
+
+    def test_unknown(self):
+        """unknown names raise ValueError"""
+        for name in ("yaml", "json.rar", "gz", ""):
+            with self.assertRaises(ValueError):
+                get_codec(name)
+
+    def test_codec_for_path(self):
+        """the codec is picked by the extension"""
+        self.assertEqual(codec_for_path("file.json").name, "json")
+        self.assertEqual(codec_for_path("a/file.cjson").name, "cjson")
+        self.assertEqual(codec_for_path("file.marshal.gz").name,
+                         "marshal.gz")
+        self.assertEqual(codec_for_path("my.file.cjson.xz").name,
+                         "cjson.xz")
+        self.assertEqual(codec_for_path("file").name, "json")
+        self.assertEqual(codec_for_path("file.db").name, "json")
+        self.assertEqual(codec_for_path("file.gz").name, "json")
+
+    def test_convert(self):
+        """convert rewrites a file in another format"""
+        with open("test_codec.json", "w") as f:
+            json.dump(self.data, f)
+        try:
+            convert("test_codec.json", "test_codec.cjson.gz")
+            with gzip.open("test_codec.cjson.gz") as f:
+                self.assertEqual(json.load(f), self.data)
+            convert("test_codec.cjson.gz", "test_codec.out",
+                    dst_codec="marshal")
+            self.assertEqual(
+                get_codec("marshal").decode(
+                    open("test_codec.out", "rb").read()), self.data)
+        finally:
+            for path in ("test_codec.json", "test_codec.cjson.gz",
+                         "test_codec.out"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+class TestFileStorageCodecs(unittest.TestCase):
+    """ FileStorage with the codecs test cases """
+
+    def setUp(self):
+        """creates the engine"""
+        self.storage = FileStorage()
+        self.patch = patch("models.base_model.storage", self.storage)
+        self.patch.start()
+        self.paths = []
+
+    def tearDown(self):
+        """removes the files"""
+        self.patch.stop()
+        for path in self.paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def round_trip(self, path, codec=None, streaming=False):
+        """saves an object in path and reloads it"""
+        self.paths.append(path)
+        self.storage.fpa = path
+        self.storage.codec = codec
+        self.storage.load_objects({})
+        obj = BaseModel()
+        obj.name = "Bétty"
+        obj.save()
+        self.storage.load_objects({})
+        self.storage.streaming = streaming
+        self.storage.reload()
+        self.storage.streaming = False
+        loaded = self.storage.get(BaseModel, obj.id)
+        self.assertEqual(loaded.to_dict(), obj.to_dict())
+        return obj
+
+    def test_extensions(self):
+        """the file is written and read in the format of its extension"""
+        self.round_trip("test_db.marshal")
+        self.round_trip("test_db.cjson.gz")
+        with gzip.open("test_db.cjson.gz") as f:
+            self.assertEqual(len(json.load(f)), 1)
+
+    def test_codec_attribute(self):
+        """the codec attribute wins over the extension"""
+        self.round_trip("test_db.data", codec="marshal.bz2")
+        with self.assertRaises(ValueError):
+            get_codec("json").decode(open("test_db.data", "rb").read())
+
+    def test_streaming(self):
+        """compressed JSON is streamed, binary formats are read whole"""
+        self.round_trip("test_db.json.xz", streaming=True)
+        self.round_trip("test_db.marshal", streaming=True)
+
+    def test_bad_file(self):
+        """a file that doesn't match its format raises TypeError"""
+        self.paths.append("test_db.marshal.gz")
+        with open("test_db.marshal.gz", "w") as f:
+            f.write("{}")
+        self.storage.fpa = "test_db.marshal.gz"
+        with self.assertRaises(TypeError):
+            self.storage.reload()
@@ -0,0 +1,170 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+""" Test ShardedStorage engine """
+import os
+import shutil
+import unittest
+from unittest.mock import patch
+from models.engine.file_storage import FileStorage
+from models.engine.sharded_storage import ShardedStorage, migrate
+from models.amenity import Amenity
+from models.place import Place
+from models.user import User
+
+PATH = "test_sharded.shards"
+
+
+class TestShardedStorage(unittest.TestCase):
+    """ ShardedStorage test cases """
+
+    buckets = 0
+
+    def setUp(self):
+        """ setup """
+        self.clean()
+        self.storage = self.engine()
+        self.storage.reload()
+        self.patcher = patch("models.base_model.storage", self.storage)
+        self.patcher.start()
+
+    def tearDown(self):
+        """ teardown """
+        self.patcher.stop()
+        self.clean()
+
+    def clean(self):
+        """removes the files of the engine"""
+        shutil.rmtree(PATH, ignore_errors=True)
+        if os.path.exists("test_sharded.json"):
+            os.remove("test_sharded.json")
+
+    def engine(self, buckets=None):
+        """returns an engine of PATH, not loaded"""
+        storage = ShardedStorage()
+        storage.fpa = PATH
+        storage.buckets = self.buckets if buckets is None else buckets
+        return storage
+
+    def fresh(self, classes=None):
+        """returns a new engine reloaded from the same directory"""
+        other = self.engine()
+        with patch("models.base_model.storage", other):
+            other.reload(classes)
+        return other
+
+    def mtimes(self):
+        """returns the modification time of each shard file"""
+        return {f: os.stat(os.path.join(PATH, f)).st_mtime_ns
+                for f in os.listdir(PATH)}
+
+    def test_is_file_storage(self):
+        """ShardedStorage keeps the FileStorage contract"""
+        self.assertIsInstance(self.storage, FileStorage)
+        self.assertEqual(self.storage.all(), {})
+
+    def test_not_shared(self):
+        """the directory can't be shared by processes"""
+        with self.assertRaises(ValueError):
+            self.storage.shared = True
+        self.assertFalse(self.storage.refresh())
+
+    def test_file_per_class(self):
+        """each class has its own files"""
+        users = [User() for _ in range(10)]
+        Amenity()
+        self.storage.save()
+        files = set(os.listdir(PATH)) - {"layout.json"}
+        if self.buckets:
+            self.assertTrue(all(f.split(".")[0] in ("User", "Amenity")
+                                for f in files))
+            self.assertGreater(len(files), 2)
+        else:
+            self.assertEqual(files, {"User.json", "Amenity.json"})
+        self.assertEqual(set(self.fresh().all()),
+                         set(self.storage.all()))
+        self.assertEqual(self.fresh().get(User, users[3].id).id,
+                         users[3].id)
+
+    def test_only_dirty_shards(self):
+        """a save rewrites the shards of the changed objects only"""
+        User()
+        amenity = Amenity()
+        self.storage.save()
+        before = self.mtimes()
+        amenity.name = "Wifi"
+        with patch.object(self.storage, "write_file",
+                          wraps=self.storage.write_file) as write:
+            self.storage.save()
+            self.storage.save()
+        self.assertEqual(write.call_count, 1)
+        self.assertIn("Amenity", os.path.basename(write.call_args[0][0]))
+        after = self.mtimes()
+        for name, mtime in before.items():
+            if name.startswith("User"):
+                self.assertEqual(after[name], mtime)
+
+    def test_delete(self):
+        """deleted objects leave their shard, empty shards are removed"""
+        amenity = Amenity()
+        user = User()
+        self.storage.save()
+        self.storage.delete(amenity)
+        self.storage.save()
+        self.assertFalse(any(f.startswith("Amenity")
+                             for f in os.listdir(PATH)))
+        self.assertEqual(list(self.fresh().all()), [f"User.{user.id}"])
+
+    def test_selective_reload(self):
+        """reload() reads the classes asked for and keeps the others on
+        disk"""
+        user = User()
+        place = Place()
+        Amenity()
+        self.storage.save()
+        other = self.fresh(["User", "Place"])
+        self.assertEqual(set(other.all()),
+                         {f"User.{user.id}", f"Place.{place.id}"})
+        other.classes = ["Amenity"]
+        with patch("models.base_model.storage", other):
+            other.reload()
+            self.assertEqual(other.count(), 1)
+            self.assertEqual(other.count(Amenity), 1)
+            # a new user is added to the users on disk
+            new_user = User()
+            other.save()
+        self.assertEqual(set(self.fresh().all(User)),
+                         {f"User.{user.id}", f"User.{new_user.id}"})
+        self.assertEqual(self.fresh().count(), 4)
+
+    def test_layout(self):
+        """the directory keeps the number of buckets it was written with"""
+        users = [User() for _ in range(10)]
+        self.storage.save()
+        other = self.engine(buckets=self.buckets + 3)
+        with patch("models.base_model.storage", other):
+            other.reload()
+        self.assertEqual(other.buckets, self.buckets)
+        self.assertEqual(set(other.all()),
+                         {f"User.{u.id}" for u in users})
+
+    def test_migrate(self):
+        """migrate() splits a storage file into shards"""
+        source = FileStorage()
+        source.fpa = "test_sharded.json"
+        source.load_objects({})
+        with patch("models.base_model.storage", source):
+            objs = [User(), User(), Place(), Amenity()]
+            source.save()
+        migrate("test_sharded.json", PATH, self.buckets)
+        other = self.fresh()
+        self.assertEqual(
+            {k: v.to_dict() for (k, v) in other.all().items()},
+            {f"{type(o).__name__}.{o.id}": o.to_dict() for o in objs})
+        with self.assertRaises(ValueError):
+            migrate("test_sharded.json", PATH)
+
+
+class TestBucketedStorage(TestShardedStorage):
+    """ ShardedStorage test cases with buckets """
+
+    buckets = 4
@@ -0,0 +1,134 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+""" Test the file shared by several processes """
+import multiprocessing
+import os
+import unittest
+from unittest.mock import patch
+from models.engine import file_storage
+from models.engine.file_storage import FileStorage
+from models.engine.journal_storage import JournalStorage
+from models.engine.sqlite_storage import SQLiteStorage
+from models.user import User
+
+PATH = "test_shared.json"
+
+
+def make_engine():
+    """returns a shared engine of PATH, reloaded"""
+    storage = FileStorage()
+    storage.fpa = PATH
+    storage.shared = True
+    with patch("models.base_model.storage", storage):
+        storage.reload()
+    return storage
+
+
+def create_users(count):
+    """process creating and saving count users one at a time"""
+    storage = make_engine()
+    with patch("models.base_model.storage", storage):
+        for _ in range(count):
+            User().save()
+
+
+class TestSharedStorage(unittest.TestCase):
+    """ shared engine test cases """
+
+    def setUp(self):
+        """creates a file with a user and two engines reading it"""
+        self.first = make_engine()
+        with self.using(self.first):
+            self.user = User()
+            self.user.save()
+        self.second = make_engine()
+
+    def tearDown(self):
+        """removes the files"""
+        for path in (PATH, PATH + ".lock"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def using(self, storage):
+        """makes the models use storage in the block"""
+        return patch("models.base_model.storage", storage)
+
+    def test_stale(self):
+        """an engine knows when another one saved"""
+        self.assertFalse(self.first.is_stale())
+        self.assertFalse(self.second.is_stale())
+        with self.using(self.second):
+            User().save()
+        self.assertTrue(self.first.is_stale())
+        self.assertFalse(self.second.is_stale())
+
+    def test_save_keeps_other_changes(self):
+        """a stale engine saves on top of what the other one saved"""
+        with self.using(self.first):
+            first = User()
+            first.save()
+        with self.using(self.second):
+            second = User()
+            second.save()
+        self.assertIsNotNone(self.second.get(User, first.id))
+        self.assertEqual(set(make_engine().all()),
+                         {f"User.{u.id}" for u in (self.user, first, second)})
+
+    def test_refresh(self):
+        """refresh remakes the changed objects in place and keeps the
+        changes not saved yet"""
+        with self.using(self.first):
+            other = User()
+            other.save()
+        with self.using(self.second):
+            user = self.second.get(User, self.user.id)
+            user.name = "Betty"
+            user.save()
+        with self.using(self.first):
+            self.assertTrue(self.first.refresh())
+            self.assertFalse(self.first.refresh())
+            self.assertEqual(self.user.name, "Betty")
+            self.assertIs(self.first.get(User, self.user.id), self.user)
+            # changed here, deleted there: the change wins
+            other.name = "local"
+        with self.using(self.second):
+            self.second.refresh()
+            self.second.delete(self.second.get(User, other.id))
+            self.second.delete(self.second.get(User, self.user.id))
+            self.second.save()
+        with self.using(self.first):
+            self.first.refresh()
+            self.assertIsNone(self.first.get(User, self.user.id))
+            self.assertIs(self.first.get(User, other.id), other)
+            self.first.save()
+        self.assertEqual(make_engine().get(User, other.id).name, "local")
+
+    def test_not_shared(self):
+        """refresh does nothing unless the engine is shared"""
+        self.first.shared = False
+        with self.using(self.second):
+            User().save()
+        self.assertFalse(self.first.refresh())
+
+    def test_other_engines(self):
+        """engines with their own files refuse the shared mode"""
+        for engine in (JournalStorage, SQLiteStorage):
+            storage = engine()
+            storage.shared = False
+            with self.assertRaises(ValueError):
+                storage.shared = True
+            self.assertFalse(storage.shared)
+            self.assertFalse(storage.refresh())
+
+    @unittest.skipIf(file_storage.fcntl is None, "no fcntl")
+    def test_processes(self):
+        """processes saving at the same time lose none of the objects"""
+        context = multiprocessing.get_context("fork")
+        processes = [context.Process(target=create_users, args=(20,))
+                     for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+        self.assertEqual(make_engine().count(User), 81)
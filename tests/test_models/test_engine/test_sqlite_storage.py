@@ -0,0 +1,183 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+""" Test SQLiteStorage engine """
+import unittest
+import io
+import os
+import sqlite3
+from unittest.mock import patch
+from console import HBNBCommand
+from models.engine.sqlite_storage import SQLiteStorage
+from models.engine.file_storage import FileStorage
+from models.base_model import BaseModel
+from models.city import City
+from models.review import Review
+from models.user import User
+
+
+class TestSQLiteStorage(unittest.TestCase):
+    """ SQLiteStorage test cases """
+
+    def setUp(self):
+        """ setup """
+        self.storage = SQLiteStorage()
+        self.storage.fpa = "test_sqlite.db"
+        if os.path.isfile(self.storage.fpa):
+            os.remove(self.storage.fpa)
+        self.storage.reload()
+        # new instances and attribute writes report to this engine
+        self.patchers = [
+            patch("models.base_model.storage", self.storage),
+            patch("console.storage", self.storage),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self):
+        """ teardown """
+        for patcher in self.patchers:
+            patcher.stop()
+        self.storage.close()
+        if os.path.isfile(self.storage.fpa):
+            os.remove(self.storage.fpa)
+
+    def fresh(self):
+        """returns a new engine on the same database"""
+        other = SQLiteStorage()
+        other.fpa = self.storage.fpa
+        other.reload()
+        self.addCleanup(other.close)
+        return other
+
+    def rows(self, table):
+        """returns the committed rows of table"""
+        with sqlite3.connect(self.storage.fpa) as db:
+            return db.execute(f'SELECT * FROM "{table}"').fetchall()
+
+    def test_contract(self):
+        """SQLiteStorage keeps the FileStorage contract"""
+        self.assertIsInstance(self.storage, FileStorage)
+        self.assertEqual(self.storage.all(), {})
+        user = User()
+        self.assertEqual(self.storage.all(), {f"User.{user.id}": user})
+
+    def test_save_and_reload(self):
+        """saved objects are read back"""
+        user = User()
+        user.email = "betty@holberton.io"
+        self.assertEqual(self.rows("User"), [])
+        self.storage.save()
+        self.assertEqual(len(self.rows("User")), 1)
+        loaded = self.fresh().all()
+        self.assertEqual(list(loaded), [f"User.{user.id}"])
+        self.assertEqual(
+            loaded[f"User.{user.id}"].to_dict(), user.to_dict())
+
+    def test_unsaved_changes_dropped(self):
+        """reload drops what wasn't saved"""
+        user = User()
+        self.storage.count()
+        self.storage.reload()
+        self.assertEqual(self.storage.all(), {})
+        self.assertIsNone(self.storage.get(User, user.id))
+
+    def test_point_read(self):
+        """get only reads the asked row"""
+        users = [User() for _ in range(3)]
+        self.storage.save()
+        other = self.fresh()
+        user = other.get(User, users[1].id)
+        self.assertEqual(user.id, users[1].id)
+        self.assertEqual(list(other._FileStorage__objects),
+                         [f"User.{users[1].id}"])
+        self.assertIs(other.get("User", users[1].id), user)
+        self.assertIsNone(other.get(User, "nope"))
+        self.assertIsNone(other.get("Nope", "nope"))
+
+    def test_single_row_writes(self):
+        """save only writes the changed rows"""
+        users = [User() for _ in range(3)]
+        self.storage.save()
+        users[0].first_name = "Betty"
+        with patch.object(self.storage, "column",
+                          wraps=self.storage.column) as column:
+            self.storage.save()
+        self.assertEqual(column.call_count, 0)
+        statements = []
+        self.storage.db().set_trace_callback(statements.append)
+        users[2].first_name = "John"
+        self.storage.save()
+        self.assertEqual([st.split()[0] for st in statements],
+                         ["BEGIN", "INSERT", "COMMIT"])
+
+    def test_count_and_delete(self):
+        """count sees new and deleted objects before they are saved"""
+        users = [User() for _ in range(3)]
+        self.storage.save()
+        other = self.fresh()
+        self.assertEqual(other.count(User), 3)
+        self.assertEqual(other.count(), 3)
+        other.delete(other.get(User, users[0].id))
+        self.assertEqual(other.count("User"), 2)
+        self.assertIsNone(other.get(User, users[0].id))
+        other.save()
+        self.assertEqual(len(self.rows("User")), 2)
+
+    def test_by_ref(self):
+        """foreign keys are indexed columns"""
+        city, other_city = City(), City()
+        city.state_id = "first"
+        other_city.state_id = "second"
+        self.storage.save()
+        other = self.fresh()
+        found = other.by_ref(City, "state_id", "first")
+        self.assertEqual(list(found), [f"City.{city.id}"])
+        found[f"City.{city.id}"].state_id = "second"
+        other.touch(found[f"City.{city.id}"])
+        self.assertEqual(
+            sorted(other.by_ref("City", "state_id", "second")),
+            sorted([f"City.{city.id}", f"City.{other_city.id}"]))
+        other.save()
+        review = Review()
+        review.text = "nice"
+        self.assertEqual(
+            self.storage.by_ref(Review, "text", "nice"),
+            {f"Review.{review.id}": review})
+        with sqlite3.connect(self.storage.fpa) as db:
+            indexes = [row[1] for row in db.execute(
+                "SELECT * FROM sqlite_master WHERE type = 'index'")]
+        self.assertIn("City_state_id", indexes)
+        self.assertIn("Review_place_id", indexes)
+
+    def test_batch_rollback(self):
+        """a failed batch rolls back objects and rows"""
+        user = User()
+        user.first_name = "Betty"
+        self.storage.save()
+        with self.assertRaises(KeyError):
+            with self.storage.batch():
+                user.first_name = "John"
+                BaseModel()
+                self.assertEqual(self.storage.count(), 2)
+                raise KeyError()
+        self.assertEqual(user.first_name, "Betty")
+        self.assertEqual(self.storage.count(), 1)
+        self.storage.save()
+        self.assertEqual(
+            self.fresh().get(User, user.id).first_name, "Betty")
+
+    def test_console(self):
+        """console commands work on SQLite"""
+        with patch('sys.stdout', new=io.StringIO()) as f:
+            HBNBCommand().onecmd("create City")
+            city_id = f.getvalue().strip()
+        HBNBCommand().onecmd(f"update City {city_id} name Kano")
+        self.storage.reload()
+        with patch('sys.stdout', new=io.StringIO()) as f:
+            HBNBCommand().onecmd(f"show City {city_id}")
+            HBNBCommand().onecmd("City.count()")
+            HBNBCommand().onecmd(f"destroy City {city_id}")
+            HBNBCommand().onecmd("City.count()")
+            output = f.getvalue().splitlines()
+        self.assertIn("'name': 'Kano'", output[0])
+        self.assertEqual(output[1:], ["1", "0"])